@@ -1,13 +1,19 @@
 """Script to convert Matplotlib generated figures into TikZ/PGFPlots figures.
 """
 from .__about__ import __version__
+from ._async import get_tikz_code_async, save_async
+from ._builder import TikzAxis
 from ._cleanfigure import clean_figure
-from ._save import Flavors, get_tikz_code, save
+from ._save import Flavors, get_tikz_bundle, get_tikz_code, save
 
 __all__ = [
     "__version__",
     "get_tikz_code",
+    "get_tikz_bundle",
     "save",
+    "get_tikz_code_async",
+    "save_async",
     "clean_figure",
     "Flavors",
+    "TikzAxis",
 ]
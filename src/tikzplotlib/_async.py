@@ -0,0 +1,95 @@
+"""Coroutine versions of the export functions for applications running on asyncio."""
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import Executor
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+
+from ._save import get_tikz_code, save
+
+# The export doesn't change the figure, but matplotlib updates some of its state
+# (e.g., ticks) lazily on access. A figure is only ever exported by one thread at a
+# time. Only the exports started here take these locks; calling get_tikz_code() for
+# the same figure from several threads isn't safe.
+_figure_locks = weakref.WeakKeyDictionary()
+_figure_locks_lock = threading.Lock()
+
+
+def _get_figure_lock(figure):
+    with _figure_locks_lock:
+        if figure not in _figure_locks:
+            _figure_locks[figure] = threading.Lock()
+        return _figure_locks[figure]
+
+
+def _locked(export, figure):
+    with _get_figure_lock(figure):
+        return export(figure)
+
+
+async def _run(export, figure, executor, semaphore):
+    """Runs ``export(figure)`` in `executor`."""
+    if figure == "gcf":
+        # pyplot's current figure is the one of the caller, not of the executor
+        figure = plt.gcf()
+    loop = asyncio.get_running_loop()
+    call = functools.partial(_locked, export, figure)
+    if semaphore is None:
+        # contextlib.nullcontext only supports `async with` from Python 3.10 on
+        return await loop.run_in_executor(executor, call)
+    async with semaphore:
+        return await loop.run_in_executor(executor, call)
+
+
+def _get_tikz_code(args, kwargs, figure):
+    return get_tikz_code(figure, *args, **kwargs)
+
+
+def _save(filepath, args, kwargs, figure):
+    save(filepath, figure, *args, **kwargs)
+
+
+async def get_tikz_code_async(
+    figure="gcf",
+    *args,
+    executor: Executor | None = None,
+    semaphore: asyncio.Semaphore | None = None,
+    **kwargs,
+):
+    """Same as `get_tikz_code()`, but the export runs in `executor` without blocking
+    the event loop. Exports of the same figure don't run concurrently.
+
+    :param executor: The executor to run the export in. Default is the one of the
+                     event loop.
+    :type executor: concurrent.futures.Executor
+
+    :param semaphore: If given, the export waits for this semaphore first. Share it
+                      between calls to limit the number of concurrent exports.
+    :type semaphore: asyncio.Semaphore
+
+    :returns: The TikZ code.
+    """
+    export = functools.partial(_get_tikz_code, args, kwargs)
+    return await _run(export, figure, executor, semaphore)
+
+
+async def save_async(
+    filepath: str | Path,
+    figure="gcf",
+    *args,
+    executor: Executor | None = None,
+    semaphore: asyncio.Semaphore | None = None,
+    **kwargs,
+):
+    """Same as `save()`, but the export and the writing of all files runs in
+    `executor` without blocking the event loop. See `get_tikz_code_async()`.
+
+    :returns: None
+    """
+    export = functools.partial(_save, filepath, args, kwargs)
+    await _run(export, figure, executor, semaphore)
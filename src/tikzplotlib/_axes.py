@@ -1,3 +1,7 @@
+import functools
+import hashlib
+import re
+
 import matplotlib as mpl
 import numpy as np
 from matplotlib.backends.backend_pgf import (
@@ -5,6 +9,7 @@ from matplotlib.backends.backend_pgf import (
 )
 
 from . import _color
+from ._util import get_legend_index
 
 
 def _common_texification(string):
@@ -17,9 +22,11 @@ class Axes:
         """Returns the PGFPlots code for an axis environment."""
         self.content = []
 
+        info = get_axes_info(data, obj)
+
         # Are we dealing with an axis that hosts a colorbar? Skip then, those are
         # treated implicitily by the associated axis.
-        self.is_colorbar = _is_colorbar_heuristic(obj)
+        self.is_colorbar = info["is colorbar"]
         if self.is_colorbar:
             return
 
@@ -28,13 +35,14 @@ class Axes:
         self.subplot_index = 0
         self.is_subplot = False
 
-        if isinstance(obj, mpl.axes.Subplot):
-            self._subplot(obj, data)
+        if info["geometry"] is not None:
+            self._subplot(info, data)
 
         self.axis_options = []
 
         # check if axes need to be displayed at all
-        if not obj.axison:
+        # (3D axes draw their axes themselves)
+        if not (obj._axis3don if obj.name == "3d" else obj.axison):
             self.axis_options.append("hide x axis")
             self.axis_options.append("hide y axis")
 
@@ -78,31 +86,18 @@ class Axes:
                 self.axis_options.append(f"ylabel style={{rotate={yrotation - 90}}}")
 
         # Axes limits.
-        ff = data["float format"]
         xlim = list(obj.get_xlim())
-        xlim0, xlim1 = sorted(xlim)
         ylim = list(obj.get_ylim())
-        ylim0, ylim1 = sorted(ylim)
-        # Sort the limits so make sure that the smaller of the two is actually *min.
-        self.axis_options.append(f"xmin={xlim0:{ff}}, xmax={xlim1:{ff}}")
-        self.axis_options.append(f"ymin={ylim0:{ff}}, ymax={ylim1:{ff}}")
-        # When the axis is inverted add additional option
-        if xlim != sorted(xlim):
-            self.axis_options.append("x dir=reverse")
-        if ylim != sorted(ylim):
-            self.axis_options.append("y dir=reverse")
+        self.axis_options += get_limit_options(data, "x", xlim)
+        self.axis_options += get_limit_options(data, "y", ylim)
+        if obj.name == "3d":
+            self._3d(data, obj)
 
         # axes scaling
         if obj.get_xscale() == "log":
-            self.axis_options.append("xmode=log")
-            self.axis_options.append(
-                f"log basis x={{{_try_f2i(obj.xaxis._scale.base)}}}"
-            )
+            self.axis_options += get_log_options("x", obj.xaxis._scale.base)
         if obj.get_yscale() == "log":
-            self.axis_options.append("ymode=log")
-            self.axis_options.append(
-                f"log basis y={{{_try_f2i(obj.yaxis._scale.base)}}}"
-            )
+            self.axis_options += get_log_options("y", obj.yaxis._scale.base)
 
         # Possible values for get_axisbelow():
         #   True (zorder = 0.5):   Ticks and gridlines are below all Artists.
@@ -122,7 +117,11 @@ class Axes:
         else:
             aspect_num = float(aspect)
 
-        self._set_axis_dimensions(data, aspect_num, xlim, ylim)
+        # The dimensions derived from the aspect ratio only hold for this axes, so
+        # they aren't written back to data.
+        self.axis_options += get_dimension_options(
+            data["axis width"], data["axis height"], aspect_num, xlim, ylim
+        )
 
         # axis positions
         xaxis_pos = obj.get_xaxis().label_position
@@ -154,7 +153,7 @@ class Axes:
             self.axis_options.append(f"axis background/.style={{fill={col}}}")
 
         # find color bar
-        colorbar = _find_associated_colorbar(obj)
+        colorbar = info["colorbar"]
         if colorbar:
             self._colorbar(colorbar, data)
 
@@ -180,38 +179,16 @@ class Axes:
 
         return ""
 
-    def _set_axis_dimensions(self, data, aspect_num, xlim, ylim):
-        if data["axis width"] and data["axis height"]:
-            # width and height overwrite aspect ratio
-            self.axis_options.append("width=" + data["axis width"])
-            self.axis_options.append("height=" + data["axis height"])
-        elif data["axis width"]:
-            # only data["axis width"] given. calculate height by the aspect ratio
-            self.axis_options.append("width=" + data["axis width"])
-            if aspect_num:
-                alpha = aspect_num * (ylim[1] - ylim[0]) / (xlim[1] - xlim[0])
-                if alpha == 1.0:
-                    data["axis height"] = data["axis width"]
-                else:
-                    # Concatenate the literals, as data["axis width"] could as well
-                    # be a LaTeX length variable such as \figurewidth.
-                    data["axis height"] = str(alpha) + "*" + data["axis width"]
-                self.axis_options.append("height=" + data["axis height"])
-        elif data["axis height"]:
-            # only data["axis height"] given. calculate width by the aspect ratio
-            self.axis_options.append("height=" + data["axis height"])
-            if aspect_num:
-                alpha = aspect_num * (ylim[1] - ylim[0]) / (xlim[1] - xlim[0])
-                if alpha == 1.0:
-                    data["axis width"] = data["axis height"]
-                else:
-                    # Concatenate the literals, as data["axis height"] could as
-                    # well be a LaTeX length variable such as \figureheight.
-                    data["axis width"] = str(1.0 / alpha) + "*" + data["axis height"]
-                self.axis_options.append("width=" + data["axis width"])
-        else:
-            # TODO keep an eye on https://tex.stackexchange.com/q/480058/13262
-            pass
+    def _3d(self, data, obj):
+        ff = data["float format"]
+        zlim0, zlim1 = sorted(obj.get_zlim())
+        self.axis_options.append(f"zmin={zlim0:{ff}}, zmax={zlim1:{ff}}")
+        # matplotlib's azimuth is measured from the x-axis, PGFPlots' from the
+        # negative y-axis
+        self.axis_options.append(f"view={{{obj.azim + 90:{ff}}}}{{{obj.elev:{ff}}}}")
+        zlabel = obj.get_zlabel()
+        if zlabel:
+            self.axis_options.append(f"zlabel={{{_common_texification(zlabel)}}}")
 
     def _ticks(self, data, obj):
         # get ticks
@@ -423,7 +400,7 @@ class Axes:
             colorbar.mappable.get_cmap(), data
         )
         if is_custom_cmap:
-            self.axis_options.append("colormap=" + mycolormap)
+            self.axis_options.append("colormap name=" + mycolormap)
         else:
             self.axis_options.append("colormap/" + mycolormap)
 
@@ -436,14 +413,13 @@ class Axes:
                 "colorbar style={{{}}}".format(",".join(colorbar_styles))
             )
 
-    def _subplot(self, obj, data):
-        # https://github.com/matplotlib/matplotlib/issues/7225#issuecomment-252173667
-        geom = obj.get_subplotspec().get_topmost_subplotspec().get_geometry()
+    def _subplot(self, info, data):
+        geom = info["geometry"]
 
         self.nsubplots = geom[0] * geom[1]
         if self.nsubplots > 1:
             # Is this an axis-colorbar pair? No need for groupplot then.
-            is_groupplot = self.nsubplots != 2 or not _find_associated_colorbar(obj)
+            is_groupplot = self.nsubplots != 2 or not info["colorbar"]
 
             if is_groupplot:
                 self.is_subplot = True
@@ -628,6 +604,101 @@ def _get_ticks(data, xy, ticks, ticklabels):
     return axis_options
 
 
+def get_figure_index(figure):
+    """Walks the figure once and gathers, for every axes, what the export needs to
+    know about the structure of the figure. See get_axes_info().
+    """
+    index = {}
+    axes = list(figure.axes)
+    while axes:
+        obj = axes.pop()
+        index[id(obj)] = _analyze_axes(obj)
+        axes.extend(getattr(obj, "child_axes", []))
+    return index
+
+
+def get_limit_options(data, axis, lim):
+    """Returns the options for the limits `lim` of the x- or y-axis `axis`. Limits in
+    descending order reverse the axis.
+    """
+    ff = data["float format"]
+    # Sort the limits so make sure that the smaller of the two is actually *min.
+    lim0, lim1 = sorted(lim)
+    options = [f"{axis}min={lim0:{ff}}, {axis}max={lim1:{ff}}"]
+    if list(lim) != sorted(lim):
+        options.append(f"{axis} dir=reverse")
+    return options
+
+
+def get_log_options(axis, base=10):
+    """Returns the options for a logarithmic x- or y-axis `axis`."""
+    return [f"{axis}mode=log", f"log basis {axis}={{{_try_f2i(base)}}}"]
+
+
+def get_dimension_options(width, height, aspect_num=None, xlim=None, ylim=None):
+    """Returns the options for the width and height of an axis. If only one of them is
+    given, the other one follows from the aspect ratio `aspect_num` of the units of
+    the axes, if any.
+    """
+    options = []
+    if width and height:
+        # width and height overwrite aspect ratio
+        options.append("width=" + width)
+        options.append("height=" + height)
+    elif width:
+        # only the width given. calculate height by the aspect ratio
+        options.append("width=" + width)
+        if aspect_num:
+            alpha = aspect_num * (ylim[1] - ylim[0]) / (xlim[1] - xlim[0])
+            if alpha == 1.0:
+                height = width
+            else:
+                # Concatenate the literals, as the width could as well be a LaTeX
+                # length variable such as \figurewidth.
+                height = str(alpha) + "*" + width
+            options.append("height=" + height)
+    elif height:
+        # only the height given. calculate width by the aspect ratio
+        options.append("height=" + height)
+        if aspect_num:
+            alpha = aspect_num * (ylim[1] - ylim[0]) / (xlim[1] - xlim[0])
+            if alpha == 1.0:
+                width = height
+            else:
+                # Concatenate the literals, as the height could as well be a LaTeX
+                # length variable such as \figureheight.
+                width = str(1.0 / alpha) + "*" + height
+            options.append("width=" + width)
+    else:
+        # TODO keep an eye on https://tex.stackexchange.com/q/480058/13262
+        pass
+    return options
+
+
+def get_axes_info(data, obj):
+    """Returns the entry of the axes `obj` in the figure index: whether it is a
+    colorbar, its associated colorbar, its subplot geometry and its legend index.
+    """
+    index = data["figure index"]
+    if id(obj) not in index:
+        # e.g., an axes which was added after the index was built
+        index[id(obj)] = _analyze_axes(obj)
+    return index[id(obj)]
+
+
+def _analyze_axes(obj):
+    geometry = None
+    if isinstance(obj, mpl.axes.Subplot):
+        # https://github.com/matplotlib/matplotlib/issues/7225#issuecomment-252173667
+        geometry = obj.get_subplotspec().get_topmost_subplotspec().get_geometry()
+    return {
+        "is colorbar": _is_colorbar_heuristic(obj),
+        "colorbar": _find_associated_colorbar(obj),
+        "geometry": geometry,
+        "legend index": get_legend_index(obj),
+    }
+
+
 def _is_colorbar_heuristic(obj):
     """Find out if the object is in fact a color bar."""
     # Not sure if these properties are always present
@@ -661,24 +732,103 @@ def _is_colorbar_heuristic(obj):
 
 def _mpl_cmap2pgf_cmap(cmap, data):
     """Converts a color map as given in matplotlib to a color map as
-    represented in PGFPlots.
+    represented in PGFPlots. Custom color maps are defined once in
+    data["custom colormaps"] and referenced by name.
     """
     if isinstance(cmap, mpl.colors.LinearSegmentedColormap):
-        return _handle_linear_segmented_color_map(cmap, data)
+        if cmap.is_gray():
+            is_custom_colormap = False
+            return ("blackwhite", is_custom_colormap)
+        X, colors = _get_memoized(_handle_linear_segmented_color_map, cmap._segmentdata)
+    else:
+        assert isinstance(
+            cmap, mpl.colors.ListedColormap
+        ), "Only LinearSegmentedColormap and ListedColormap are supported"
+        pgf_cm = _get_memoized(_get_builtin_pgf_cmap, cmap.colors)
+        if pgf_cm is not None:
+            is_custom_colormap = False
+            return (pgf_cm, is_custom_colormap)
+        X, colors = _get_memoized(_handle_listed_color_map, cmap.colors, cmap.N)
+
+    # The PGFPlots color map has an actual physical scale, like (0cm,10cm), and the
+    # points where the colors change is also given in those units. As of now
+    # (2010-05-06) it is crucial for PGFPlots that the difference between two successive
+    # points is an integer multiple of a given unity (parameter to the colormap; e.g.,
+    # 1cm).  At the same time, TeX suffers from significant round-off errors, so make
+    # sure that this unit is not too small such that the round- off errors don't play
+    # much of a role. A unit of 1pt, e.g., does most often not work.
+    unit = "pt"
+    ff = data["float format"]
+    color_changes = [
+        f"rgb({x}{unit})=({rgb[0]:{ff}},{rgb[1]:{ff}},{rgb[2]:{ff}})"
+        for x, rgb in zip(X, colors)
+    ]
+    definition = "{{[1{}]\n  {}\n}}".format(unit, ";\n  ".join(color_changes))
+
+    # Find a name which isn't taken by a different color map yet. The prefix keeps the
+    # built-in color maps of PGFPlots, like jet or hot, from being redefined.
+    base_name = "-".join(
+        ["tikzplotlib", re.sub("[^a-zA-Z0-9]+", "-", cmap.name).strip("-")]
+    ).rstrip("-")
+    name = base_name
+    k = 1
+    while data["custom colormaps"].get(name, definition) != definition:
+        k += 1
+        name = f"{base_name}{k}"
+    data["custom colormaps"][name] = definition
+
+    is_custom_colormap = True
+    return (name, is_custom_colormap)
+
+
+def _get_memoized(convert, source, *args):
+    """Returns ``convert(source, *args)``. The conversions of the last color maps are
+    kept, keyed by the content of their segment data or colors, so changing those in
+    place gives a new conversion.
+    """
+    try:
+        content = _Content(source)
+    except (TypeError, ValueError):
+        # e.g., functions in the segment data
+        return convert(source, *args)
+    return _convert_memoized(convert, content, args)
 
-    assert isinstance(
-        cmap, mpl.colors.ListedColormap
-    ), "Only LinearSegmentedColormap and ListedColormap are supported"
-    return _handle_listed_color_map(cmap, data)
 
+class _Content:
+    """Wraps the segment data or colors of a color map, hashed and compared by their
+    values.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        if isinstance(source, dict):
+            items = [(key, np.asarray(source[key])) for key in sorted(source)]
+        else:
+            items = [("", np.asarray(source))]
+        digest = hashlib.sha1()
+        for key, array in items:
+            if array.dtype.hasobject:
+                raise TypeError("Can't hash objects")
+            digest.update(f"{key}{array.dtype.str}{array.shape}".encode())
+            digest.update(np.ascontiguousarray(array).tobytes())
+        self.key = digest.hexdigest()
+
+    def __hash__(self):
+        return hash(self.key)
 
-def _handle_linear_segmented_color_map(cmap, data):
-    assert isinstance(cmap, mpl.colors.LinearSegmentedColormap)
+    def __eq__(self, other):
+        return self.key == other.key
 
-    if cmap.is_gray():
-        is_custom_colormap = False
-        return ("blackwhite", is_custom_colormap)
 
+@functools.lru_cache(maxsize=32)
+def _convert_memoized(convert, content, args):
+    return convert(content.source, *args)
+
+
+def _handle_linear_segmented_color_map(segdata):
+    """Returns the points where the linear interpolation of the color map is
+    interrupted, scaled to integers, and the colors at those points.
+    """
     # For an explanation of what _segmentdata contains, see
     # http://matplotlib.org/mpl_examples/pylab_examples/custom_cmap.py
     # A key sentence:
@@ -686,93 +836,39 @@ def _handle_linear_segmented_color_map(cmap, data):
     # elements in each row in the cdict entry for a given color as (x, y0, y1).  Then
     # for values of x between x[i] and x[i+1] the color value is interpolated between
     # y1[i] and y0[i+1].
-    segdata = cmap._segmentdata
-    red = segdata["red"]
-    green = segdata["green"]
-    blue = segdata["blue"]
-
-    # Loop over the data, stop at each spot where the linear interpolations is
-    # interrupted, and set a color mark there.
-    #
-    # Set initial color.
-    k_red = 0
-    k_green = 0
-    k_blue = 0
-    colors = []
-    X = []
-    while True:
-        # find next x
-        x = min(red[k_red][0], green[k_green][0], blue[k_blue][0])
-
-        if red[k_red][0] == x:
-            red_comp = red[k_red][1]
-            k_red += 1
-        else:
-            red_comp = _linear_interpolation(
-                x,
-                (red[k_red - 1][0], red[k_red][0]),
-                (red[k_red - 1][2], red[k_red][1]),
-            )
-
-        if green[k_green][0] == x:
-            green_comp = green[k_green][1]
-            k_green += 1
-        else:
-            green_comp = _linear_interpolation(
-                x,
-                (green[k_green - 1][0], green[k_green][0]),
-                (green[k_green - 1][2], green[k_green][1]),
-            )
+    channels = [
+        np.asarray(segdata[color], dtype=float) for color in ["red", "green", "blue"]
+    ]
 
-        if blue[k_blue][0] == x:
-            blue_comp = blue[k_blue][1]
-            k_blue += 1
-        else:
-            blue_comp = _linear_interpolation(
-                x,
-                (blue[k_blue - 1][0], blue[k_blue][0]),
-                (blue[k_blue - 1][2], blue[k_blue][1]),
-            )
-
-        X.append(x)
-        colors.append((red_comp, green_comp, blue_comp))
-
-        if x >= 1.0:
-            break
-
-    # The PGFPlots color map has an actual physical scale, like (0cm,10cm), and the
-    # points where the colors change is also given in those units. As of now
-    # (2010-05-06) it is crucial for PGFPlots that the difference between two successive
-    # points is an integer multiple of a given unity (parameter to the colormap; e.g.,
-    # 1cm).  At the same time, TeX suffers from significant round-off errors, so make
-    # sure that this unit is not too small such that the round- off errors don't play
-    # much of a role. A unit of 1pt, e.g., does most often not work.
-    unit = "pt"
+    # Set a color mark at each spot where the linear interpolation of any of the
+    # channels is interrupted.
+    X = np.unique(np.concatenate([channel[:, 0] for channel in channels]))
+    colors = np.column_stack([_get_segment_values(channel, X) for channel in channels])
 
     # Scale to integer (too high integers will firstly be slow and secondly may produce
     # dimension errors or memory errors in latex)
     # 0-1000 is the internal granularity of PGFplots.
     # 16300 was the maximum value for pgfplots<=1.13
-    X = _scale_to_int(np.array(X), 1000)
-
-    color_changes = []
-    ff = data["float format"]
-    for k, x in enumerate(X):
-        color_changes.append(
-            f"rgb({x}{unit})="
-            f"({colors[k][0]:{ff}},{colors[k][1]:{ff}},{colors[k][2]:{ff}})"
+    X = _scale_to_int(X, 1000)
+    return X, colors
+
+
+def _get_segment_values(channel, X):
+    """Evaluates the color channel given as rows (x, y0, y1) at the points X."""
+    k = np.minimum(np.searchsorted(channel[:, 0], X), len(channel) - 1)
+    is_node = channel[k, 0] == X
+    node_values = channel[k, 1]
+    # elsewhere, interpolate between y1 of the previous and y0 of the next node
+    k = np.maximum(k, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = _linear_interpolation(
+            X, (channel[k - 1, 0], channel[k, 0]), (channel[k - 1, 2], channel[k, 1])
         )
+    return np.where(is_node, node_values, values)
 
-    colormap_string = "{{mymap}}{{[1{}]\n  {}\n}}".format(
-        unit, ";\n  ".join(color_changes)
-    )
-    is_custom_colormap = True
-    return (colormap_string, is_custom_colormap)
-
-
-def _handle_listed_color_map(cmap, data):
-    assert isinstance(cmap, mpl.colors.ListedColormap)
 
+def _get_builtin_pgf_cmap(colors):
+    """Returns the name of the PGFPlots color map equal to the given colors, if any."""
     # check for predefined colormaps in both matplotlib and pgfplots
     from matplotlib import pyplot as plt
 
@@ -791,27 +887,18 @@ def _handle_listed_color_map(cmap, data):
         # 'winter': 'winter',
     }
     for mpl_cm, pgf_cm in cm_translate.items():
-        if cmap.colors == plt.get_cmap(mpl_cm).colors:
-            is_custom_colormap = False
-            return (pgf_cm, is_custom_colormap)
+        if np.array_equal(colors, plt.get_cmap(mpl_cm).colors):
+            return pgf_cm
+    return None
 
-    unit = "pt"
-    ff = data["float format"]
-    if cmap.N is None or cmap.N == len(cmap.colors):
-        colors = [
-            f"rgb({k}{unit})=({rgb[0]:{ff}},{rgb[1]:{ff}},{rgb[2]:{ff}})"
-            for k, rgb in enumerate(cmap.colors)
-        ]
-    else:
-        reps = int(float(cmap.N) / len(cmap.colors) - 0.5) + 1
-        repeated_cols = reps * cmap.colors
-        colors = [
-            f"rgb({k}{unit})=({rgb[0]:{ff}},{rgb[1]:{ff}},{rgb[2]:{ff}})"
-            for k, rgb in enumerate(repeated_cols[: cmap.N])
-        ]
-    colormap_string = "{{mymap}}{{[1{}]\n {}\n}}".format(unit, ";\n  ".join(colors))
-    is_custom_colormap = True
-    return (colormap_string, is_custom_colormap)
+
+def _handle_listed_color_map(colors, N):
+    """Returns the integer positions and the colors of a listed color map."""
+    if N is not None and N != len(colors):
+        reps = int(float(N) / len(colors) - 0.5) + 1
+        colors = (reps * list(colors))[:N]
+    colors = np.asarray(colors, dtype=float)[:, :3]
+    return list(range(len(colors))), colors
 
 
 def _scale_to_int(X, max_val):
@@ -870,6 +957,53 @@ def _find_associated_colorbar(obj):
     return None
 
 
+def get_auto_float_format(obj, target_resolution=600):
+    """Returns the shortest float format which still resolves the axes `obj` at the
+    given target resolution (in PPI). Coordinates are written with just as many
+    significant digits as are needed to be indistinguishable on the rendered plot.
+    """
+    from ._cleanfigure import _get_width_height_in_pixels
+
+    width, height = _get_width_height_in_pixels(obj.figure, target_resolution)
+    # get_position() would apply the aspect ratio, i.e., possibly change the limits
+    bbox = obj.get_position(original=True)
+    digits = [
+        _get_significant_digits(obj.get_xlim(), obj.get_xscale(), width * bbox.width),
+        _get_significant_digits(obj.get_ylim(), obj.get_yscale(), height * bbox.height),
+    ]
+    if obj.name == "3d":
+        # The z-axis is drawn vertically, at most as long as the axes is high.
+        digits.append(
+            _get_significant_digits(
+                obj.get_zlim(), obj.get_zscale(), height * bbox.height
+            )
+        )
+    return f".{max(digits)}g"
+
+
+def _get_significant_digits(lim, scale, num_pixels, max_digits=15):
+    """Number of significant digits needed to resolve a single pixel of an axis with
+    the limits `lim` spread over `num_pixels` pixels.
+    """
+    lim = np.asarray(lim, dtype=float)
+    # degenerate limits give infinite digits, capped below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if scale == "linear":
+            # the last digit of the largest value on the axis must resolve a pixel
+            resolution = abs(lim[1] - lim[0]) / num_pixels
+            digits = np.floor(np.log10(np.max(np.abs(lim)))) + 1 - np.log10(resolution)
+        elif scale == "log":
+            # log axes need a fixed relative resolution
+            resolution = abs(np.log10(lim[1]) - np.log10(lim[0])) / num_pixels
+            digits = 1 - np.log10(resolution * np.log(10))
+        else:
+            return max_digits
+
+    if not np.isfinite(digits):
+        return max_digits
+    return int(min(max(np.ceil(digits), 1), max_digits))
+
+
 def _try_f2i(x):
     """If possible, convert float to int without rounding.
     Used for log base: if not used, base for log scale can be "10.0" (and then
@@ -0,0 +1,383 @@
+"""PGFPlots code for lines given as arrays, without building a matplotlib figure."""
+from __future__ import annotations
+
+import datetime
+from pathlib import Path
+
+import matplotlib as mpl
+import matplotlib.dates
+import numpy as np
+
+from . import _line2d
+from .__about__ import __version__
+from ._axes import (
+    _common_texification,
+    get_dimension_options,
+    get_limit_options,
+    get_log_options,
+)
+from ._save import Flavors, _get_color_definitions, _tex_comment
+from ._util import get_date_options
+
+
+class TikzAxis:
+    """A PGFPlots axis with lines given as arrays, e.g., NumPy arrays, pandas or Arrow
+    columns, or anything else `numpy.asarray()` takes. The styles are translated and
+    the tables are written just as for the lines of a matplotlib figure, but no
+    matplotlib artists are created, and `save()` streams the tables to the file.
+
+    Example::
+
+        axis = tikzplotlib.TikzAxis(xlabel="time (s)", yscale="log")
+        axis.add_line(t, y, color="C1", linestyle="--", label="signal")
+        axis.save("signal.tex", externalize_tables=True)
+
+    :param title: title of the axis
+    :param xlabel: label of the x-axis
+    :param ylabel: label of the y-axis
+    :param xlim: (xmin, xmax), or ``None`` to let PGFPlots choose. For dates, given
+                 like the x values.
+    :param ylim: (ymin, ymax), or ``None`` to let PGFPlots choose
+    :param xscale: ``"linear"`` or ``"log"``
+    :param yscale: ``"linear"`` or ``"log"``
+    :param grid: whether to draw the major grid lines
+    :param options: more options of the axis environment
+    :type options: list of str
+    """
+
+    def __init__(
+        self,
+        title: str | None = None,
+        xlabel: str | None = None,
+        ylabel: str | None = None,
+        xlim: tuple | None = None,
+        ylim: tuple | None = None,
+        xscale: str = "linear",
+        yscale: str = "linear",
+        grid: bool = False,
+        options: list | None = None,
+    ):
+        for scale in [xscale, yscale]:
+            if scale not in ["linear", "log"]:
+                raise ValueError(
+                    f"Unsupported scale {scale!r}. Please choose from 'linear', 'log'"
+                )
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.xlim = xlim
+        self.ylim = ylim
+        self.xscale = xscale
+        self.yscale = yscale
+        self.grid = grid
+        self.options = [] if options is None else list(options)
+        self.lines = []
+
+    def add_line(
+        self,
+        x,
+        y,
+        color=None,
+        linewidth: float | None = None,
+        linestyle="-",
+        marker=None,
+        markersize: float | None = None,
+        markerfacecolor=None,
+        markeredgecolor=None,
+        alpha: float | None = None,
+        drawstyle: str | None = None,
+        label: str | None = None,
+    ):
+        """Adds a line. The styles are given as for matplotlib's `plot()`. Without a
+        color, the next one of the color cycle (``"C0"``, ``"C1"``, ...) is used.
+        Masked or NaN y values break the line. The x values may be dates, e.g.,
+        np.datetime64 or (timezone-aware) datetime objects.
+
+        :returns: the axis, such that calls can be chained
+        """
+        x, x_is_date = _as_column(x, "x", dates=True)
+        y, _ = _as_column(y, "y")
+        if x.ndim != 1 or y.ndim != 1 or len(x) != len(y):
+            raise ValueError(
+                "x and y must be one-dimensional and of the same length, "
+                f"got shapes {x.shape} and {y.shape}."
+            )
+        if self.lines and self.lines[0]["x is date"] != x_is_date:
+            raise ValueError("The x values of all lines must be dates, or none.")
+        if color is None:
+            color = f"C{len(self.lines)}"
+        rc = mpl.rcParams
+        self.lines.append(
+            {
+                "x": x,
+                "x is date": x_is_date,
+                "y": y,
+                "color": color,
+                "line width": rc["lines.linewidth"] if linewidth is None else linewidth,
+                "line style": linestyle,
+                "marker": marker,
+                "marker size": rc["lines.markersize"]
+                if markersize is None
+                else markersize,
+                "marker face color": color
+                if markerfacecolor is None
+                else markerfacecolor,
+                "marker edge color": color
+                if markeredgecolor is None
+                else markeredgecolor,
+                "alpha": alpha,
+                "drawstyle": drawstyle,
+                "label": label,
+            }
+        )
+        return self
+
+    def get_tikz_code(
+        self,
+        filepath: str | Path | None = None,
+        axis_width: str | None = None,
+        axis_height: str | None = None,
+        tex_relative_path_to_data: str | None = None,
+        externalize_tables: bool = False,
+        override_externals: bool = False,
+        externals_search_path: str | None = None,
+        externals: dict | None = None,
+        float_format: str = ".15g",
+        table_row_sep: str = "\n",
+        date_resolution: str = "m",
+        flavor: str = "latex",
+        wrap: bool = True,
+        include_disclaimer: bool = True,
+    ):
+        """Returns the TikZ code of the axis. The parameters are the ones of
+        `tikzplotlib.get_tikz_code()`; `filepath` only determines where externalized
+        tables go.
+
+        :returns: The TikZ code.
+        """
+        return "".join(
+            self._iter_code(
+                filepath,
+                axis_width,
+                axis_height,
+                tex_relative_path_to_data,
+                externalize_tables,
+                override_externals,
+                externals_search_path,
+                externals,
+                float_format,
+                table_row_sep,
+                date_resolution,
+                flavor,
+                wrap,
+                include_disclaimer,
+            )
+        )
+
+    def save(
+        self,
+        filepath: str | Path,
+        *args,
+        encoding: str | None = None,
+        **kwargs,
+    ):
+        """Same as `get_tikz_code()`, but writes the code to a file. The tables are
+        written piece by piece, the code is never held in memory as a whole.
+
+        :param encoding: Sets the text encoding of the output file, e.g. 'utf-8'.
+        :returns: None
+        """
+        with open(filepath, "w", encoding=encoding) as f:
+            f.writelines(self._iter_code(filepath, *args, **kwargs))
+
+    def _iter_code(  # noqa: C901
+        self,
+        filepath=None,
+        axis_width=None,
+        axis_height=None,
+        tex_relative_path_to_data=None,
+        externalize_tables=False,
+        override_externals=False,
+        externals_search_path=None,
+        externals=None,
+        float_format=".15g",
+        table_row_sep="\n",
+        date_resolution="m",
+        flavor="latex",
+        wrap=True,
+        include_disclaimer=True,
+    ):
+        if float_format == "auto":
+            raise ValueError(
+                "float_format='auto' needs the size of a matplotlib axes. "
+                "Please give a format like '.6g'."
+            )
+        if date_resolution not in ["D", "m", "s"]:
+            raise ValueError(
+                f"Unsupported date resolution {date_resolution!r}. "
+                "Please choose from 'D', 'm', 's'"
+            )
+        try:
+            flavor = Flavors[flavor.lower()]
+        except KeyError:
+            raise ValueError(
+                f"Unsupported TeX flavor {flavor!r}. "
+                f"Please choose from {', '.join(map(repr, Flavors))}"
+            )
+
+        data = {
+            "float format": float_format,
+            "table_row_sep": table_row_sep,
+            "date resolution": date_resolution,
+            "externalize tables": externalize_tables,
+            "override externals": override_externals,
+            "externals search path": externals_search_path,
+            "externals": externals,
+            "rel data path": None
+            if tex_relative_path_to_data is None
+            else Path(tex_relative_path_to_data),
+            "custom colors": {},
+            "tikz libs": set(),
+            "pgfplots libs": set(),
+            "flavor": flavor,
+        }
+        if filepath:
+            filepath = Path(filepath)
+            data["output dir"] = filepath.parent
+            data["base name"] = filepath.stem
+        else:
+            # a temporary directory is created once a file is written
+            data["output dir"] = None
+            data["base name"] = "tmp"
+
+        # All colors have to be known before the axis starts.
+        has_legend = any(line["label"] is not None for line in self.lines)
+        plots = []
+        for line in self.lines:
+            data, addplot_options = _line2d.get_line_options(
+                data,
+                color=line["color"],
+                line_width=line["line width"],
+                line_style=line["line style"],
+                drawstyle=line["drawstyle"],
+                alpha=line["alpha"],
+                marker=line["marker"],
+                marker_size=line["marker size"],
+                marker_face_color=line["marker face color"],
+                marker_edge_color=line["marker edge color"],
+            )
+            if line["label"] is None and has_legend:
+                addplot_options.append("forget plot")
+            plots.append((line, addplot_options))
+
+        axis_options = self._get_axis_options(data, axis_width, axis_height)
+
+        if include_disclaimer:
+            yield _tex_comment(
+                f"This file was created with tikzplotlib v{__version__}."
+            )
+        if wrap:
+            yield flavor.start("tikzpicture") + "\n\n"
+
+        coldefs = _get_color_definitions(data)
+        if coldefs:
+            yield "\n".join(coldefs) + "\n\n"
+
+        yield flavor.start("axis")
+        if axis_options:
+            yield "[\n" + ",\n".join(sorted(axis_options)) + "\n]\n"
+        else:
+            yield "\n"
+
+        for line, addplot_options in plots:
+            if len(line["x"]) == 0:
+                # An empty table would be read from a file.
+                continue
+            yield "\\addplot "
+            if addplot_options:
+                yield "[{}]\n".format(", ".join(addplot_options))
+            y = line["y"]
+            yield from _line2d.iter_table_code(
+                data,
+                line["x"],
+                np.ma.getdata(y),
+                np.ma.getmaskarray(y) if np.ma.isMaskedArray(y) else [],
+                x_is_date=line["x is date"],
+            )
+            if line["label"] is not None:
+                label = _common_texification(line["label"])
+                yield f"\\addlegendentry{{{label}}}\n"
+
+        yield flavor.end("axis") + "\n\n"
+        if wrap:
+            yield flavor.end("tikzpicture") + "\n"
+
+    def _get_axis_options(self, data, axis_width, axis_height):
+        options = list(self.options)
+        if self.title:
+            options.append(f"title={{{_common_texification(self.title)}}}")
+        if self.xlabel:
+            options.append(f"xlabel={{{_common_texification(self.xlabel)}}}")
+        if self.ylabel:
+            options.append(f"ylabel={{{_common_texification(self.ylabel)}}}")
+
+        if self.lines and self.lines[0]["x is date"]:
+            xlim = None if self.xlim is None else _as_column(self.xlim, "xlim", True)[0]
+            options += get_date_options(data, xlim)
+        elif self.xlim is not None:
+            options += get_limit_options(data, "x", self.xlim)
+        if self.ylim is not None:
+            options += get_limit_options(data, "y", self.ylim)
+
+        if self.xscale == "log":
+            options += get_log_options("x")
+        if self.yscale == "log":
+            options += get_log_options("y")
+        if self.grid:
+            options += ["xmajorgrids", "ymajorgrids"]
+
+        options += get_dimension_options(axis_width, axis_height)
+
+        for line in self.lines:
+            y = line["y"]
+            if np.ma.is_masked(y) or not _line2d._is_finite(np.ma.getdata(y)):
+                # PGFPlots interpolates over NaNs by default.
+                options.append("unbounded coords=jump")
+                break
+        return options
+
+
+def _as_column(values, name, dates=False):
+    """Returns the column `values` as NumPy array of numbers, and whether those are
+    dates. Columns of objects are converted like matplotlib does: dates, e.g., the
+    timezone-aware ones of pandas, to matplotlib dates in UTC and numbers to floats.
+    Missing values, e.g., the ones of the nullable columns of pandas, become NaN.
+    """
+    array = values if np.ma.isMaskedArray(values) else np.asarray(values)
+    kind = array.dtype.kind
+    if kind in "biuf":
+        return array, False
+    if kind == "M" and dates:
+        return array, True
+    if kind == "O":
+        if (
+            dates
+            and array.size > 0
+            and isinstance(array.flat[0], (datetime.date, np.datetime64))
+        ):
+            return np.asarray(mpl.dates.date2num(values)), True
+        missing = np.frompyfunc(_is_missing, 1, 1)(array).astype(bool)
+        if missing.any():
+            array = array.copy()
+            array[missing] = np.nan
+        try:
+            return array.astype(float), False
+        except (TypeError, ValueError):
+            pass
+    expected = "numbers or dates" if dates else "numbers"
+    raise TypeError(f"The {name} values must be {expected}, got {array.dtype}.")
+
+
+def _is_missing(value):
+    # None, or pd.NA, which isn't equal or unequal to anything
+    return value is None or not isinstance(value == value, (bool, np.bool_))
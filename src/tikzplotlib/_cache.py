@@ -0,0 +1,302 @@
+"""Reuse the PGFPlots code of axes which didn't change since the last export."""
+import hashlib
+import weakref
+
+import matplotlib as mpl
+import numpy as np
+from mpl_toolkits.mplot3d import art3d
+
+# Everything that determines the output of an artist, per artist type: getters
+# and attributes.
+_artist_properties = [
+    (
+        mpl.artist.Artist,
+        [
+            "get_visible",
+            "get_zorder",
+            "get_alpha",
+            "get_label",
+            "get_clip_on",
+            "get_rasterized",
+            "get_transform",
+        ],
+    ),
+    (
+        mpl.lines.Line2D,
+        [
+            "get_xydata",
+            "get_xdata",
+            "get_color",
+            "get_linestyle",
+            "get_linewidth",
+            "get_drawstyle",
+            "get_marker",
+            "get_markersize",
+            "get_markeredgecolor",
+            "get_markerfacecolor",
+            "get_markeredgewidth",
+            "get_markevery",
+            "get_fillstyle",
+        ],
+    ),
+    (
+        mpl.patches.Patch,
+        [
+            "get_path",
+            "get_patch_transform",
+            "get_facecolor",
+            "get_edgecolor",
+            "get_linewidth",
+            "get_linestyle",
+            "get_hatch",
+            "get_fill",
+        ],
+    ),
+    (
+        mpl.collections.Collection,
+        [
+            "get_offsets",
+            "get_transforms",
+            "get_facecolor",
+            "get_edgecolor",
+            "get_linewidth",
+            "get_linestyle",
+            "get_hatch",
+            "get_array",
+            "get_cmap",
+            "get_clim",
+        ],
+    ),
+    # QuadMesh.get_paths() creates one path per cell
+    (mpl.collections.QuadMesh, ["get_coordinates"]),
+    (mpl.collections.PathCollection, ["get_paths", "get_sizes"]),
+    (mpl.collections.PolyCollection, ["get_paths", "get_sizes"]),
+    (mpl.collections.LineCollection, ["get_paths"]),
+    (mpl.collections.PatchCollection, ["get_paths"]),
+    (
+        mpl.image.AxesImage,
+        ["get_array", "get_cmap", "get_clim", "get_extent", "get_interpolation"],
+    ),
+    (
+        mpl.text.Text,
+        [
+            "get_text",
+            "get_position",
+            "get_color",
+            "get_fontsize",
+            "get_rotation",
+            "get_ha",
+            "get_va",
+            "get_weight",
+            "get_style",
+            "get_bbox_patch",
+        ],
+    ),
+    (mpl.text.Annotation, ["get_anncoords"]),
+    (mpl.legend.Legend, ["get_frame_on", "get_bbox_to_anchor"]),
+]
+_artist_attributes = [
+    (mpl.image.AxesImage, ["origin"]),
+    (mpl.text.Annotation, ["xy", "arrow_patch"]),
+    (mpl.legend.Legend, ["_loc", "_ncol", "_ncols", "_alignment"]),
+    # 3D collections only have 2D colors and paths once they were drawn
+    (art3d.Poly3DCollection, ["_vec", "_facecolor3d", "_edgecolor3d"]),
+    (art3d.Line3DCollection, ["_segments3d"]),
+]
+
+# Options of the export which influence the code of the axes' children
+_data_keys = [
+    "float format",
+    "table_row_sep",
+    "date resolution",
+    "externalize tables",
+    "override externals",
+    "externals search path",
+    "base name",
+    "rel data path",
+    "dpi",
+    "flavor",
+    "strict",
+    "font size",
+    "axis width",
+    "axis height",
+    "add axis environment",
+    "rasterize threshold",
+    "marker size tolerance",
+    "image dpi",
+    "max image pixels",
+    "cull",
+]
+
+
+def recurse(data, obj, ax, recurse_func):
+    """Same as ``recurse_func(data, obj)`` for the axes `obj`, but reuses the content
+    of a previous export from ``data["cache"]`` if neither the axes nor any of its
+    children changed since. Otherwise, the result is stored in the cache.
+    """
+    cache = data["cache"]
+    # Drop entries of axes which don't exist anymore.
+    for key in [key for key, entry in cache.items() if entry["axes"]() is None]:
+        del cache[key]
+
+    fingerprint = _get_axes_fingerprint(data, obj, ax)
+    entry = cache.get(id(obj))
+    if entry is not None and entry["axes"]() is obj:
+        # Files written for the axes must still be there. (Without filepath, every
+        # export has a new temporary output directory.) In-memory externals are
+        # stored with the entry.
+        wrote_files = bool(entry["state changes"]["counters"])
+        same_dir = entry["output dir"] == _get_output_dir(data)
+        if entry["fingerprint"] == fingerprint and (same_dir or not wrote_files):
+            ax.axis_options = list(entry["axis options"])
+            _apply_state_changes(data, entry["state changes"])
+            return data, list(entry["content"])
+
+    state = _get_state(data)
+    data, content = recurse_func(data, obj)
+    cache[id(obj)] = {
+        "axes": weakref.ref(obj),
+        "fingerprint": fingerprint,
+        "output dir": _get_output_dir(data),
+        "axis options": list(ax.axis_options),
+        "state changes": _get_state_changes(state, _get_state(data)),
+        "content": list(content),
+    }
+    return data, content
+
+
+def _get_output_dir(data):
+    # output dirs are Paths (or None before a temporary one was created)
+    return "in-memory" if data["externals"] is not None else data["output dir"]
+
+
+def _get_axes_fingerprint(data, obj, ax):
+    figure = obj.figure
+    return (
+        tuple(ax.content),
+        tuple(sorted(ax.axis_options)),
+        obj.get_position(original=True).bounds,
+        tuple(figure.get_size_inches()),
+        figure.dpi,
+        obj.get_xlim(),
+        obj.get_ylim(),
+        obj.get_xscale(),
+        obj.get_yscale(),
+        type(obj.xaxis.converter).__name__,
+        type(obj.yaxis.converter).__name__,
+        _get_key([getattr(obj, name, None) for name in ["elev", "azim"]]),
+        _get_key([_call(obj, getter) for getter in ["get_zlim", "get_zlabel"]]),
+        tuple(data[key] for key in _data_keys),
+        tuple(sorted(_get_state(data)["counters"].items())),
+        frozenset(data["rectangle_legends"]),
+        # labels of containers, e.g., of bar charts
+        tuple(sorted(data["legend index"]["handle labels"].items())),
+        # taken color map names are avoided
+        tuple(data["custom colormaps"].items()),
+        tuple(
+            _get_artist_fingerprint(child)
+            for child in obj.get_children()
+            if not isinstance(child, (mpl.axis.Axis, mpl.spines.Spine))
+        ),
+    )
+
+
+def _get_artist_fingerprint(obj):
+    values = [type(obj).__name__, id(obj)]
+    for artist_type, getters in _artist_properties:
+        if isinstance(obj, artist_type):
+            values += [_call(obj, getter) for getter in getters]
+    for artist_type, attributes in _artist_attributes:
+        if isinstance(obj, artist_type):
+            values += [getattr(obj, attr, None) for attr in attributes]
+    values += [
+        _get_artist_fingerprint(child)
+        for child in obj.get_children()
+        if not isinstance(child, mpl.axis.Axis)
+    ]
+    return _get_key(values)
+
+
+def _call(obj, getter):
+    try:
+        return getattr(obj, getter)()
+    except AttributeError:
+        # e.g., colors of 3D collections which were never drawn
+        return None
+
+
+def _get_key(value):
+    """Turns `value` into something hashable which changes if `value` changes."""
+    if isinstance(value, np.ndarray):
+        return _get_array_key(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_get_key(val) for val in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, mpl.path.Path):
+        return (_get_array_key(value.vertices), _get_array_key(value.codes))
+    if isinstance(value, mpl.transforms.Transform):
+        return _get_array_key(value.get_affine().get_matrix())
+    if isinstance(value, mpl.transforms.BboxBase):
+        return value.bounds
+    if isinstance(value, mpl.colors.Colormap):
+        return (value.name, _get_array_key(value(np.arange(value.N))))
+    if isinstance(value, mpl.artist.Artist):
+        return _get_artist_fingerprint(value)
+    return repr(value)
+
+
+def _get_array_key(array):
+    if array is None:
+        return None
+    mask = np.ma.getmask(array)
+    array = np.ascontiguousarray(np.ma.getdata(array))
+    if array.dtype.hasobject:
+        return tuple(repr(val) for val in array.flat)
+    key = (array.dtype.str, array.shape, hashlib.blake2b(array).digest())
+    if mask is not np.ma.nomask:
+        key += (hashlib.blake2b(np.ascontiguousarray(mask)).digest(),)
+    return key
+
+
+def _get_state(data):
+    """Returns a copy of everything in `data` the drawing of artists adds to."""
+    return {
+        "tikz libs": set(data["tikz libs"]),
+        "pgfplots libs": set(data["pgfplots libs"]),
+        "rectangle_legends": set(data["rectangle_legends"]),
+        "custom colors": dict(data["custom colors"]),
+        "custom colormaps": dict(data["custom colormaps"]),
+        "counters": {key: val for key, val in data.items() if key.endswith("number")},
+        "externals": dict(data["externals"] or {}),
+    }
+
+
+def _get_state_changes(before, after):
+    changes = {
+        key: after[key] - before[key]
+        for key in ["tikz libs", "pgfplots libs", "rectangle_legends"]
+    }
+    for key in ["custom colors", "custom colormaps", "externals"]:
+        changes[key] = {
+            name: val for name, val in after[key].items() if name not in before[key]
+        }
+    changes["counters"] = {
+        key: val
+        for key, val in after["counters"].items()
+        if before["counters"].get(key) != val
+    }
+    return changes
+
+
+def _apply_state_changes(data, changes):
+    for key in ["tikz libs", "pgfplots libs", "rectangle_legends"]:
+        data[key] |= changes[key]
+    data["custom colors"].update(changes["custom colors"])
+    data["custom colormaps"].update(changes["custom colormaps"])
+    if data["externals"] is not None:
+        data["externals"].update(changes["externals"])
+    # The counters were equal when the entry was created, see the fingerprint.
+    data.update(changes["counters"])
@@ -1,13 +1,27 @@
+import collections
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
 import matplotlib as mpl
 import mpl_toolkits
 import numpy as np
 from matplotlib import pyplot as plt
 from mpl_toolkits import mplot3d
 
-STEP_DRAW_STYLES = ["steps-pre", "steps-post", "steps-mid"]
+from . import _surface
+
+STEP_DRAW_STYLES = ["steps", "steps-pre", "steps-post", "steps-mid"]
+
+# number of line segments which are clipped at once
+_chunk_size = 2**16
 
 
-def clean_figure(fig=None, target_resolution: int = 600, scale_precision: float = 1.0):
+def clean_figure(
+    fig=None,
+    target_resolution: int = 600,
+    scale_precision: float = 1.0,
+    workers: int = 1,
+):
     """Cleans figure as a preparation for tikz export.
     This will minimize the number of points required for the tikz figure.
     If the figure has subplots, it will recursively clean then up.
@@ -27,6 +41,10 @@ def clean_figure(fig=None, target_resolution: int = 600, scale_precision: float
                            By default 1
     :type scalePrecision: float, optional
 
+    :param workers: number of threads which clean the lines and collections. The
+                    figure is updated by the calling thread. By default 1
+    :type workers: int, optional
+
     Examples
     --------
 
@@ -89,9 +107,30 @@ def clean_figure(fig=None, target_resolution: int = 600, scale_precision: float
         fig = plt.gcf()
     elif fig == "gcf":  # tikzplotlib syntax
         fig = plt.gcf()
-    _recursive_cleanfigure(
+    tasks = _recursive_cleanfigure(
         fig, target_resolution=target_resolution, scale_precision=scale_precision
     )
+    # Every artist is updated as soon as its cleaned data is there, and no more than
+    # `workers` tasks are submitted at once, such that the data of only a few artists
+    # is held at once.
+    if workers > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(workers) as executor:
+            futures = collections.deque()
+            for task in tasks:
+                if len(futures) == workers:
+                    _apply_update(futures.popleft().result())
+                futures.append(executor.submit(task))
+            while futures:
+                _apply_update(futures.popleft().result())
+    else:
+        for task in tasks:
+            _apply_update(task())
+
+
+def _apply_update(update):
+    """Applies the update returned by a cleaning task, if there is one."""
+    if update is not None:
+        update()
 
 
 def _recursive_cleanfigure(obj, target_resolution=600, scale_precision=1.0):
@@ -106,22 +145,26 @@ def _recursive_cleanfigure(obj, target_resolution=600, scale_precision=1.0):
     :param scalePrecision: scalar value indicating precision when scaling down.
         By default 1
     :type scalePrecision: float, optional
+
+    :returns: the cleaning tasks. Every task returns the update of its artist, or
+        ``None``.
     """
+    tasks = []
     for child in obj.get_children():
         if isinstance(child, mpl.spines.Spine):
             pass
         if isinstance(child, mpl.axes.Axes):
-            # Note: containers contain Patches but are not child objects.
-            # This is a problem because a bar plot creates a Barcontainer.
-            _clean_containers(child)
-            _recursive_cleanfigure(
+            # Pending autoscaling changes the limits when they are read.
+            child.get_xlim()
+            tasks += _recursive_cleanfigure(
                 child,
                 target_resolution=target_resolution,
                 scale_precision=scale_precision,
             )
         elif isinstance(child, mpl_toolkits.mplot3d.axes3d.Axes3D):
-            _clean_containers(child)
-            _recursive_cleanfigure(
+            # Pending autoscaling changes the limits when they are read.
+            child.get_xlim()
+            tasks += _recursive_cleanfigure(
                 child,
                 target_resolution=target_resolution,
                 scale_precision=scale_precision,
@@ -129,23 +172,27 @@ def _recursive_cleanfigure(obj, target_resolution=600, scale_precision=1.0):
         elif isinstance(child, mpl.lines.Line2D):
             ax = child.axes
             fig = ax.figure
-            _cleanline(
+            task = functools.partial(
+                _cleanline,
                 fig,
                 ax,
                 linehandle=child,
                 target_resolution=target_resolution,
                 scale_precision=scale_precision,
             )
+            tasks.append(task)
         elif isinstance(child, mplot3d.art3d.Line3D):
             ax = child.axes
             fig = ax.figure
-            _cleanline(
+            task = functools.partial(
+                _cleanline,
                 fig,
                 ax,
                 linehandle=child,
                 target_resolution=target_resolution,
                 scale_precision=scale_precision,
             )
+            tasks.append(task)
         elif isinstance(child, mpl.image.AxesImage):
             pass
         elif isinstance(child, mpl.patches.Patch):
@@ -153,51 +200,52 @@ def _recursive_cleanfigure(obj, target_resolution=600, scale_precision=1.0):
         elif isinstance(child, mpl.collections.PathCollection):
             ax = child.axes
             fig = ax.figure
-            _clean_collections(
+            task = functools.partial(
+                _clean_collections,
                 fig,
                 ax,
                 child,
                 target_resolution=target_resolution,
                 scale_precision=scale_precision,
             )
-        elif isinstance(child, mpl.collections.LineCollection):
-            import warnings
-
-            warnings.warn(
-                "Cleaning Line Collections (scatter plot) is not supported yet."
+            tasks.append(task)
+        elif isinstance(
+            child, (mpl.collections.LineCollection, mplot3d.art3d.Line3DCollection)
+        ):
+            ax = child.axes
+            fig = ax.figure
+            task = functools.partial(
+                _clean_segment_collection,
+                fig,
+                ax,
+                child,
+                target_resolution=target_resolution,
+                scale_precision=scale_precision,
             )
+            tasks.append(task)
         elif isinstance(child, mplot3d.art3d.Path3DCollection):
             ax = child.axes
             fig = ax.figure
-            _clean_collections(
+            task = functools.partial(
+                _clean_collections,
                 fig,
                 ax,
                 child,
                 target_resolution=target_resolution,
                 scale_precision=scale_precision,
             )
-        elif isinstance(child, mplot3d.art3d.Line3DCollection):
-            import warnings
-
-            warnings.warn("Cleaning Line3DCollection is not supported yet.")
+            tasks.append(task)
         elif isinstance(child, mplot3d.art3d.Poly3DCollection):
-            import warnings
-
-            warnings.warn("Cleaning Poly3DCollections is not supported yet.")
+            task = functools.partial(
+                _clean_poly3d_collection,
+                child.axes,
+                child,
+                scale_precision=scale_precision,
+            )
+            tasks.append(task)
         else:
             pass
-
-
-def _clean_containers(axes):
-    """Containers are not children of axes. They need to be visited separately.
-
-    :param axes: matplotlib axes object
-    """
-    for container in axes.containers:
-        if isinstance(container, mpl.container.BarContainer):
-            import warnings
-
-            warnings.warn("Cleaning Bar Container (bar plot) is not supported yet.")
+    return tasks
 
 
 def _cleanline(fighandle, axhandle, linehandle, target_resolution, scale_precision):
@@ -214,42 +262,48 @@ def _cleanline(fighandle, axhandle, linehandle, target_resolution, scale_precisi
     :param scalePrecision: scalar value indicating precision when scaling down.
         By default 1
     :type scalePrecision: float, optional
+
+    :returns: the update of the line, or ``None``
     """
-    if _isStep(linehandle):
+    if _isStep(linehandle) and _lineIs3D(linehandle):
         import warnings
 
-        warnings.warn("step plot simplification not yet implemented.", Warning)
-        # TODO: simplifyStairs not yet working
-        # pruneOutsideBox(fighandle, axhandle, linehandle)
-        # simplifyStairs(fighandle, axhandle, linehandle)
-        # limitPrecision(fighandle, axhandle, linehandle, scalePrecision)
-    else:
+        warnings.warn("3D step plot simplification not yet implemented.", Warning)
+    elif _isStep(linehandle):
+        # Pruning works on the straight lines between the points, not on the stairs.
         data, is3D = _get_line_data(linehandle)
         xLim, yLim = _get_visual_limits(fighandle, axhandle)
         visual_data = _get_visual_data(axhandle, data, is3D)
-        hasLines = _line_has_lines(linehandle)
-
-        data = _prune_outside_box(xLim, yLim, data, visual_data, is3D, hasLines)
-        visual_data = _get_visual_data(axhandle, data, is3D)
-
-        if not is3D:
-            visual_data = _move_points_closer(xLim, yLim, visual_data)
 
+        # Every point is a marker.
+        hasMarkers = not linehandle.get_marker() == "None"
+        if not hasMarkers:
+            data = _simplify_stairs(
+                xLim,
+                yLim,
+                fighandle,
+                target_resolution,
+                visual_data,
+                data,
+                linehandle.get_drawstyle(),
+            )
+        data = _limit_precision(axhandle, data, is3D, scale_precision)
+        return functools.partial(_update_line_data, linehandle, data)
+    else:
+        data, is3D = _get_line_data(linehandle)
         hasMarkers = not linehandle.get_marker() == "None"
         hasLines = not linehandle.get_linestyle() == "None"
-        data = _simplify_line(
-            xLim,
-            yLim,
+        data, _ = _clean_data(
             fighandle,
-            target_resolution,
-            visual_data,
+            axhandle,
             data,
             is3D,
+            target_resolution,
+            scale_precision,
             hasMarkers,
             hasLines,
         )
-        data = _limit_precision(axhandle, data, is3D, scale_precision)
-        _update_line_data(linehandle, data)
+        return functools.partial(_update_line_data, linehandle, data)
 
 
 def _clean_collections(
@@ -268,39 +322,229 @@ def _clean_collections(
     :param scalePrecision: scalar value indicating precision when scaling down.
         By default 1
     :type scalePrecision: float, optional
+
+    :returns: the update of the collection, or ``None``
     """
     data, is3D = _get_collection_data(collection)
-    xLim, yLim = _get_visual_limits(fighandle, axhandle)
-    visual_data = _get_visual_data(axhandle, data, is3D)
+    data, _ = _clean_data(
+        fighandle,
+        axhandle,
+        data,
+        is3D,
+        target_resolution,
+        scale_precision,
+        hasMarkers=True,
+        hasLines=False,
+    )
+    return functools.partial(_update_collection_data, collection, data)
+
+
+def _update_collection_data(collection, data):
+    collection.set_offsets(data)
+
+
+def _clean_segment_collection(
+    fighandle, axhandle, collection, target_resolution, scale_precision
+):
+    """Clean a 2D or 3D collection of line segments, e.g. a streamplot or a wireframe.
+    All segments are cleaned at once, as one line with NaNs between the segments.
+    Segments which are split up keep their style, those which aren't visible at all
+    are removed.
+
+    :param fighandle: matplotlib figure object
+    :param axhandle: matplotlib axes object
+    :param collection: mpl.collections.LineCollection or mplot3d.art3d.Line3DCollection
+    :param target_resolution: target resolution of final figure in PPI.
+        If a scalar integer is provided, it is assumed to be square in both axis.
+        If a list or an np.array is provided, it is interpreted as [H, W].
+        By default 600
+    :type target_resolution: int, list or np.array, optional
+    :param scalePrecision: scalar value indicating precision when scaling down.
+        By default 1
+    :type scalePrecision: float, optional
 
-    hasLines = True
+    :returns: the update of the collection, or ``None``
+    """
+    if _surface.get_grid(collection) is not None:
+        # Wireframes are exported as a mesh of the whole grid.
+        return
+    segments, is3D = _get_segments(collection)
+    if segments is None:
+        import warnings
 
-    data = _prune_outside_box(xLim, yLim, data, visual_data, is3D, hasLines)
+        warnings.warn(
+            "Cleaning Line Collections which aren't in data coordinates "
+            "is not supported yet."
+        )
+        return
+    if len(segments) == 0:
+        return
+    data, source = _join_segments(segments, is3D)
+    data, id_orig = _clean_data(
+        fighandle,
+        axhandle,
+        data,
+        is3D,
+        target_resolution,
+        scale_precision,
+        hasMarkers=False,
+        hasLines=True,
+    )
+    segments, source = _split_segments(data, source[id_orig])
+    return functools.partial(_update_segment_collection, collection, segments, source)
+
+
+def _clean_data(
+    fighandle,
+    axhandle,
+    data,
+    is3D,
+    target_resolution,
+    scale_precision,
+    hasMarkers,
+    hasLines,
+):
+    """Prunes, moves and simplifies the data points. The stages only select the
+    points which are kept, by their indices into the data; the data is gathered only
+    once in the end.
+
+    :param data: array of data points. Shape [N, 2] or [N, 3]
+    :type data: np.ndarray
+
+    :returns: (data, id_orig), with the index of the original data point of every
+        new one. Points inserted on a line segment belong to its first point.
+    """
+    xLim, yLim = _get_visual_limits(fighandle, axhandle)
     visual_data = _get_visual_data(axhandle, data, is3D)
 
+    # The neighbors of visible points are kept without lines, too: Their markers
+    # may reach into the view.
+    id_orig, isNaN = _prune_outside_box(xLim, yLim, visual_data, hasLines=True)
+    visual_data = _gather(visual_data, id_orig, isNaN)
+    isNew = np.zeros(len(id_orig), dtype=bool)
     if not is3D:
-        visual_data = _move_points_closer(xLim, yLim, visual_data)
-        visual_data = _get_visual_data(axhandle, visual_data, is3D)
+        visual_data, id_moved, isNew = _move_points_closer(
+            xLim, yLim, visual_data, hasLines
+        )
+        id_orig = id_orig[id_moved]
 
-    hasMarkers = True
-    hasLines = False
-    data = _simplify_line(
+    keep = _get_simplify_mask(
         xLim,
         yLim,
         fighandle,
         target_resolution,
         visual_data,
-        data,
-        is3D,
         hasMarkers,
         hasLines,
     )
+    # Points which are NaN in the visual data are either NaN in the data or can't
+    # be drawn.
+    isNaN = np.any(np.isnan(visual_data), axis=1)[keep]
+    visualInsert = visual_data[np.logical_and(keep, isNew)]
+    id_orig, isNew = id_orig[keep], isNew[keep]
+
+    data = _gather(data, id_orig, isNaN)
+    if np.any(isNew):
+        data[isNew] = _get_data_from_visual(axhandle, visualInsert)
     data = _limit_precision(axhandle, data, is3D, scale_precision)
-    _update_collection_data(collection, data)
+    return data, id_orig
 
 
-def _update_collection_data(collection, data):
-    collection.set_offsets(data)
+def _get_segments(collection):
+    """Returns the segments of the collection in data coordinates, or ``None`` if
+    they aren't in data coordinates.
+
+    :returns: (segments, is3D)
+    """
+    is3D = isinstance(collection, mplot3d.art3d.Line3DCollection)
+    if is3D:
+        return [np.asarray(seg, dtype=float) for seg in collection._segments3d], is3D
+    if collection.get_transform() != collection.axes.transData or np.any(
+        collection.get_offsets()
+    ):
+        return None, is3D
+    return [np.asarray(seg, dtype=float) for seg in collection.get_segments()], is3D
+
+
+def _join_segments(segments, is3D):
+    """Joins the segments to one line, separated by NaNs.
+
+    :returns: (data, source), with the index of the segment of every data point, -1
+        for the separators.
+    """
+    dim = 3 if is3D else 2
+    lengths = np.array([len(seg) for seg in segments])
+    separator = np.full((1, dim), np.NaN)
+    data = np.concatenate(
+        [part for seg in segments for part in [seg.reshape(-1, dim), separator]]
+    )
+    source = np.repeat(np.arange(len(segments)), lengths + 1)
+    source[np.cumsum(lengths + 1) - 1] = -1
+    return data, source
+
+
+def _split_segments(data, source):
+    """Splits the data at the NaNs into segments.
+
+    :returns: (segments, source), with the index of the original segment of every
+        segment.
+    """
+    id_nan = np.any(np.isnan(data), axis=1)
+    # Every NaN starts a new segment.
+    segment_ids = np.cumsum(id_nan)[~id_nan]
+    data = data[~id_nan]
+    source = source[~id_nan]
+    starts = np.flatnonzero(np.diff(segment_ids)) + 1
+    if len(data) == 0:
+        return [], source
+    return np.split(data, starts), source[np.concatenate([[0], starts])]
+
+
+def _update_segment_collection(collection, segments, source):
+    """Sets the segments of the collection. Styles given per segment (matplotlib
+    cycles through them) stay with the original segments, given by `source`.
+    """
+    if len(source) > 0:
+        array = collection.get_array()
+        if array is not None:
+            collection.set_array(array[source % len(array)])
+        else:
+            colors = collection.get_edgecolor()
+            if len(colors) > 1:
+                collection.set_edgecolor(colors[source % len(colors)])
+        linewidths = np.asarray(collection.get_linewidth())
+        if len(linewidths) > 1:
+            collection.set_linewidth(linewidths[source % len(linewidths)])
+        # unscaled dash patterns
+        linestyles = getattr(collection, "_us_linestyles", [])
+        if len(linestyles) > 1:
+            collection.set_linestyle([linestyles[k % len(linestyles)] for k in source])
+    collection.set_segments(segments)
+
+
+def _clean_poly3d_collection(axhandle, collection, scale_precision):
+    """Clean a 3D polygon collection, e.g. a surface. The polygons aren't pruned or
+    simplified: 3D axes don't clip at their limits, and surfaces are exported as a
+    grid of their vertices. Only the precision is limited, for all vertices at once.
+
+    :param axhandle: matplotlib axes object
+    :param collection: mplot3d.art3d.Poly3DCollection
+    :param scalePrecision: scalar value indicating precision when scaling down.
+        By default 1
+    :type scalePrecision: float, optional
+
+    :returns: the update of the collection, or ``None``
+    """
+    vec = getattr(collection, "_vec", None)
+    segslices = getattr(collection, "_segslices", None)
+    if vec is None or not segslices:
+        return
+    data = _limit_precision(axhandle, vec[:3].T.copy(), True, scale_precision)
+    return functools.partial(
+        collection.set_verts,
+        [data[segslice] for segslice in segslices],
+        closed=getattr(collection, "_closed", True),
+    )
 
 
 def _isStep(linehandle):
@@ -360,71 +604,26 @@ def _get_visual_limits(fighandle, axhandle):
     return xLim, yLim
 
 
-def _replace_data_with_NaN(data, id_replace, is3D):
-    """Replaces data at id_replace with NaNs.
+def _gather(data, id_keep, isNaN):
+    """Returns the data points id_keep, with those where isNaN is set replaced by
+    NaNs.
 
-    :param data: array of x and y data with shape [N, 2]
+    :param data: array of data points. Shape [N, 2] or [N, 3]
     :type data: np.ndarray
-    :param id_replace: array with indices to replace. Shape [K,]
-    :type id_replace: np.array
-    :param linehandle: matplotlib line handle object
-    :type linehandle: object
+    :param id_keep: array of indices of the points to keep. Shape [K, ]
+    :type id_keep: np.ndarray
+    :param isNaN: mask of the kept points which are replaced. Shape [K, ]
+    :type isNaN: np.ndarray
 
     :returns: new_data
     """
-    if _isempty(id_replace):
-        return data
-
-    if is3D:
-        xData, yData, zData = _split_data_3D(data)
-    else:
-        xData, yData = _split_data_2D(data)
-
-    xData[id_replace] = np.NaN
-    yData[id_replace] = np.NaN
-    if is3D:
-        zData = zData.copy()
-        zData[id_replace] = np.NaN
-
-    if is3D:
-        new_data = _stack_data_3D(xData, yData, zData)
-    else:
-        new_data = _stack_data_2D(xData, yData)
+    new_data = data[id_keep]
+    if not np.issubdtype(new_data.dtype, np.floating):
+        new_data = new_data.astype(float)
+    new_data[isNaN] = np.NaN
     return new_data
 
 
-def _remove_data(data, id_remove, is3D):
-    """remove data at id_remove
-
-    :param data: array of x and y data with shape [N, 2]
-    :type data: np.ndarray
-    :param id_remove: array of x and y data with shape [N, 2]
-    :type id_remove: np.array
-    :param linehandle: matplotlib linehandle object
-    :type linehandle: object
-
-    :returns: new_data
-    """
-    if _isempty(id_remove):
-        return data
-
-    if is3D:
-        xData, yData, zData = _split_data_3D(data)
-    else:
-        xData, yData = _split_data_2D(data)
-
-    xData = np.delete(xData, id_remove, axis=0)
-    yData = np.delete(yData, id_remove, axis=0)
-    if is3D:
-        zData = np.delete(zData, id_remove, axis=0)
-
-    if is3D:
-        newdata = _stack_data_3D(xData, yData, zData)
-    else:
-        newdata = _stack_data_2D(xData, yData)
-    return newdata
-
-
 def _update_line_data(linehandle, data):
     is3D = _lineIs3D(linehandle)
     if is3D:
@@ -462,54 +661,6 @@ def _stack_data_3D(xData, yData, zData):
     return data
 
 
-def _diff(x, *args, **kwargs):
-    """modification of np.diff(x, *args, **kwargs).
-    - If x is empty, return np.array([False])
-    - else: return np.diff(x, *args, **kwargs)
-
-    :param x: array to diff
-    :type x: np.ndarray
-    :param *args: additional arguments passed to `np.diff`
-    :param **kwargs: additional keyword arguments passed to `np.diff`
-    """
-    if _isempty(x):
-        return np.array([False])
-    else:
-        return np.diff(x, *args, **kwargs)
-
-
-def _remove_NaNs(data):
-    """Removes superfluous NaNs in the data, i.e. those at the end/beginning of the data and consecutive ones.
-
-    :param linehandle: matplotlib linehandle object
-
-    :returns: data without NaNs
-    """
-    id_nan = np.any(np.isnan(data), axis=1)
-    id_remove = np.argwhere(id_nan).reshape((-1,))
-    if _isempty(id_remove):
-        pass
-    else:
-        id_remove = id_remove[
-            np.concatenate(
-                [_diff(id_remove, axis=0) == 1, np.array([False]).reshape((-1,))]
-            )
-        ]
-
-    id_first = np.argwhere(np.logical_not(id_nan))[0]
-    id_last = np.argwhere(np.logical_not(id_nan))[-1]
-
-    if _isempty(id_first):
-        # remove entire data
-        id_remove = np.arange(len(data))
-    else:
-        id_remove = np.concatenate(
-            [np.arange(0, id_first), id_remove, np.arange(id_last + 1, len(data))]
-        )
-    data = np.delete(data, id_remove, axis=0)
-    return data
-
-
 def _isInBox(data, xLim, yLim):
     """Returns a mask that indicates, whether a data point is within the limits.
 
@@ -595,6 +746,7 @@ def _get_collection_data(collection):
 def _get_visual_data(axhandle, data, is3D):
     """Returns the visual representation of the data,
     respecting possible log_scaling and projection into the image plane.
+    Without either, this is the data itself, which must not be changed.
 
     :param axhandle: handle for matplotlib axis object
     :type axhandle: object
@@ -603,15 +755,18 @@ def _get_visual_data(axhandle, data, is3D):
 
     :returns : visualData
     """
+    isXlog = axhandle.get_xscale() == "log"
+    isYlog = axhandle.get_yscale() == "log"
+    if not is3D and not isXlog and not isYlog:
+        return data
+
     if is3D:
         xData, yData, zData = _split_data_3D(data)
     else:
         xData, yData = _split_data_2D(data)
 
-    isXlog = axhandle.get_xscale() == "log"
     if isXlog:
         xData = np.log10(xData)
-    isYlog = axhandle.get_yscale() == "log"
     if isYlog:
         yData = np.log10(yData)
     if is3D:
@@ -652,87 +807,65 @@ def _isempty(array):
     return _elements(array) == 0
 
 
-def _line_has_lines(linehandle):
-    """check if linestyle is not None and linewidth is larger than 0"""
-    hasLines = (linehandle.get_linestyle() is not None) and (
-        linehandle.get_linewidth() > 0.0
-    )
-    return hasLines
-
-
-def _prune_outside_box(xLim, yLim, data, visual_data, is3D, hasLines):
+def _prune_outside_box(xLim, yLim, visual_data, hasLines):
     """Some sections of the line may sit outside of the visible box. Cut those off.
 
-    This method is not pure because it updates the linehandle object's data.
+    Of consecutive points which aren't plotted, the first one is replaced by a NaN
+    to break the line, and the others are removed, as are those at the beginning
+    and the end of the line. Without lines, all of them are removed.
 
-    :param fighandle: matplotlib figure handle object
-    :type fighandle: obj
-    :param axhandle: matplotlib axes handle object
-    :type axhandle: obj
-    :param linehandle: matplotlib line2D handle object
-    :type linehandle: obj
+    :param visual_data: visual representation of the data. Shape [N, 2]
+    :type visual_data: np.ndarray
+    :param hasLines: whether the points are connected by lines
+    :type hasLines: bool
 
-    :returns: data.
+    :returns: (id_keep, isNaN), the indices of the points which are kept, and the
+        mask of those which are replaced by NaNs.
     """
-    if _elements(visual_data) == 0:
-        return data
-
     tol = 1.0e-10
     relaxedXLim = xLim + np.array([-tol, tol])
     relaxedYLim = yLim + np.array([-tol, tol])
 
-    dataIsInBox = _isInBox(visual_data, relaxedXLim, relaxedYLim)
+    shouldPlot = _isInBox(visual_data, relaxedXLim, relaxedYLim)
+    if hasLines and len(visual_data) > 1:
+        segvis = _segment_visible(visual_data, xLim, yLim)
+        shouldPlot[1:] |= segvis
+        shouldPlot[:-1] |= segvis
 
-    shouldPlot = dataIsInBox
-    if hasLines:
-        segvis = _segment_visible(visual_data, dataIsInBox, xLim, yLim)
-        shouldPlot = np.logical_or(
-            shouldPlot, np.concatenate([np.array([False]).reshape((-1,)), segvis])
-        )
-        shouldPlot = np.logical_or(
-            shouldPlot, np.concatenate([segvis, np.array([False]).reshape((-1,))])
-        )
-
-    id_replace = np.array([[]])
-    id_remove = np.array([[]])
+    isNaN = np.zeros(len(visual_data), dtype=bool)
+    if hasLines and np.any(shouldPlot):
+        # the first ones of consecutive points which aren't plotted
+        isNaN[1:] = np.logical_and(shouldPlot[:-1], np.logical_not(shouldPlot[1:]))
+        id_last = len(shouldPlot) - 1 - np.argmax(shouldPlot[::-1])
+        isNaN[id_last + 1 :] = False
 
-    if not np.all(shouldPlot):
-        id_remove = np.argwhere(np.logical_not(shouldPlot))
+    id_keep = np.flatnonzero(np.logical_or(shouldPlot, isNaN))
+    return id_keep, isNaN[id_keep]
 
-        # If there are consecutive data points to be removed, only replace
-        # the first one by a NaN. Consecutive data points have
-        # diff(id_remove)==1, so replace diff(id_remove)>1 by NaN and remove
-        # the rest
-        idx = np.diff(id_remove, axis=0) > 1
-        idx = np.concatenate([np.array([True]).reshape((-1, 1)), idx], axis=0)
-
-        id_replace = id_remove[idx]
-        id_remove = id_remove[np.logical_not(idx)]
-
-    data = _replace_data_with_NaN(data, id_replace, is3D)
-    data = _remove_data(data, id_remove, is3D)
-    data = _remove_NaNs(data)
-    return data
 
-
-def _move_points_closer(xLim, yLim, data):
+def _move_points_closer(xLim, yLim, visual_data, hasLines=True):
     """Move all points outside a box much larger than the visible one
     to the boundary of that box and make sure that lines in the visible
     box are preserved. This typically involves replacing one point by
     two new ones and a NaN.
 
+    Every line segment is clipped against the box: A point outside of the box is
+    replaced by a NaN, with the point where the line leaves the box before and the
+    one where it enters the box again after it. Points without lines outside of the
+    box are removed.
+
     TODO: 3D simplification of frontal 2D projection. This requires the
     full transformation rather than the projection, as we have to calculate
     the inverse transformation to project back into 3D.
 
-    :param fighandle: matplotlib figure handle object
-    :type fighandle: obj
-    :param axhandle: matplotlib axes handle object
-    :type axhandle: obj
-    :param linehandle: matplotlib line handle object
-    :type linehandle: obj
+    :param visual_data: visual representation of the data. Shape [N, 2]
+    :type visual_data: np.ndarray
+    :param hasLines: whether the points are connected by lines
+    :type hasLines: bool
 
-    :returns: data.
+    :returns: (visual_data, id_orig, isNew), with the index of the original point of
+        every new one, and the mask of the inserted points. Points inserted on a line
+        segment belong to its first point.
     """
     # Calculate the extension of the extended box
     xWidth = xLim[1] - xLim[0]
@@ -744,56 +877,124 @@ def _move_points_closer(xLim, yLim, data):
     largeXlim = xLim + extendedFactor * np.array([-xWidth, xWidth])
     largeYlim = yLim + extendedFactor * np.array([-yWidth, yWidth])
 
-    dataIsInLargeBox = _isInBox(data, largeXlim, largeYlim)
+    dataIsInLargeBox = _isInBox(visual_data, largeXlim, largeYlim)
 
-    dataIsInLargeBox = np.logical_or(dataIsInLargeBox, np.any(np.isnan(data), axis=1))
-
-    id_replace = np.argwhere(np.logical_not(dataIsInLargeBox))
+    dataIsInLargeBox = np.logical_or(
+        dataIsInLargeBox, np.any(np.isnan(visual_data), axis=1)
+    )
 
-    dataInsert = np.array([[]])
-    if not _isempty(id_replace):
-        raise NotImplementedError(
-            "There is data outside of the box. Don't know how to handle during cleaning. Please check if x/ylim is to tight"
-        )
-    data = _insert_data(data, id_replace, dataInsert)
+    id_orig = np.arange(len(visual_data))
+    isNew = np.zeros(len(visual_data), dtype=bool)
+    id_replace = np.flatnonzero(np.logical_not(dataIsInLargeBox))
     if _isempty(id_replace):
-        return data
-    else:
-        raise NotImplementedError
+        return visual_data, id_orig, isNew
+    if not hasLines:
+        return (
+            visual_data[dataIsInLargeBox],
+            id_orig[dataIsInLargeBox],
+            isNew[dataIsInLargeBox],
+        )
+
+    # Clip the line segments X1--X2 which have an end outside of the box.
+    X1 = visual_data[:-1]
+    X2 = visual_data[1:]
+    isClipped = np.logical_not(
+        np.logical_and(dataIsInLargeBox[:-1], dataIsInLargeBox[1:])
+    )
+    isVisible, t1, t2 = _clip_segments(X1, X2, largeXlim, largeYlim)
+    isVisible = np.logical_and(isVisible, isClipped)
+
+    # where the lines enter the box, and where they leave it
+    isEntering = np.logical_and(isVisible, np.logical_not(dataIsInLargeBox[:-1]))
+    isLeaving = np.logical_and(isVisible, np.logical_not(dataIsInLargeBox[1:]))
+    idEntering = np.flatnonzero(isEntering)
+    idLeaving = np.flatnonzero(isLeaving)
+    entering = X1[idEntering] + t1[idEntering, None] * (X2[idEntering] - X1[idEntering])
+    leaving = X1[idLeaving] + t2[idLeaving, None] * (X2[idLeaving] - X1[idLeaving])
+
+    # Both come after the first point of the segment, entering before leaving.
+    idSegment = np.concatenate([idEntering, idLeaving])
+    order = np.argsort(idSegment, kind="stable")
+    idSegment = idSegment[order]
+    visualInsert = np.concatenate([entering, leaving])[order]
+
+    visual_data = _insert_data(visual_data, idSegment + 1, visualInsert)
+    # where the replaced points are now
+    id_replace += np.searchsorted(idSegment + 1, id_replace, side="right")
+    visual_data[id_replace] = np.NaN
+    id_orig = np.insert(id_orig, idSegment + 1, idSegment)
+    isNew = np.insert(isNew, idSegment + 1, True)
+    return visual_data, id_orig, isNew
+
+
+def _clip_segments(X1, X2, xLim, yLim):
+    """Clips the line segments X1--X2 against the box given by xLim and yLim
+    (Liang-Barsky). Segments with NaNs aren't visible.
+
+    :param X1: first points of the segments. Shape [N, 2]
+    :type X1: np.ndarray
+    :param X2: second points of the segments. Shape [N, 2]
+    :type X2: np.ndarray
+
+    :returns: (isVisible, t1, t2), the mask of the segments which are partly in the
+        box, and the parameters of the part in the box, X1 + t * (X2 - X1).
+    """
+    n = len(X1)
+    t1 = np.zeros(n)
+    t2 = np.ones(n)
+    isVisible = np.logical_and(
+        np.all(np.isfinite(X1), axis=1), np.all(np.isfinite(X2), axis=1)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k, lim in enumerate([xLim, yLim]):
+            d = X2[:, k] - X1[:, k]
+            # The segment is in the box where p * t <= q for both edges.
+            for p, q in [(-d, X1[:, k] - lim[0]), (d, lim[1] - X1[:, k])]:
+                r = q / p
+                np.maximum(t1, r, out=t1, where=p < 0)
+                np.minimum(t2, r, out=t2, where=p > 0)
+                # parallel to the edge, and outside of it
+                isVisible &= np.logical_or(p != 0, q >= 0)
+    isVisible &= t1 <= t2
+    return isVisible, t1, t2
+
+
+def _get_data_from_visual(axhandle, visual_data):
+    """Inverse of `_get_visual_data` for 2D data.
+
+    :returns: data
+    """
+    xData, yData = _split_data_2D(visual_data)
+    if _axIsXLog(axhandle):
+        xData = 10.0**xData
+    if _axIsYLog(axhandle):
+        yData = 10.0**yData
+    return _stack_data_2D(xData, yData)
 
 
 def _insert_data(data, id_insert, dataInsert):
-    """Inserts the elements of the cell array dataInsert at position id_insert.
+    """Inserts the rows of dataInsert before the rows id_insert of data. Rows which
+    are inserted at the same position keep their order.
 
-    :param fighandle: matplotlib figure handle object
-    :type fighandle: obj
-    :param linehandle: matplotlib line handle object
-    :type linehandle: obj
-    :param id_insert: array of indices where to insert. Shape [N, 2]
+    :param data: array of data. Shape [N, 2] or [N, 3]
+    :type data: np.ndarray
+    :param id_insert: array of indices where to insert. Shape [K, ]
     :type id_insert: np.ndarray
-    :param dataInsert: array of data to insert.  Shape [N, 2]
+    :param dataInsert: array of data to insert. Shape [K, 2] or [K, 3]
     :type dataInsert: np.ndarray
 
     :returns: data.
     """
     if _isempty(id_insert):
         return data
-    # TODO: actually implement rest of function
-    raise NotImplementedError
+    return np.insert(data, id_insert, dataInsert, axis=0)
 
 
-def _simplify_line(
-    xLim,
-    yLim,
-    fighandle,
-    target_resolution,
-    visual_data,
-    data,
-    is3D,
-    hasMarkers,
-    hasLines,
+def _get_simplify_mask(
+    xLim, yLim, fighandle, target_resolution, visual_data, hasMarkers, hasLines
 ):
-    """Reduce the number of data points in the line 'handle'.
+    """Returns the mask of the data points which are kept when reducing the number
+    of data points of a line.
 
     Applies a path-simplification algorithm if there are no markers or
     pixelization otherwise. Changes are visually negligible at the target
@@ -806,43 +1007,33 @@ def _simplify_line(
 
     :param fighandle: matplotlib figure handle object
     :type fighandle: obj
-    :param axhandle: matplotlib axes handle object
-    :type axhandle: obj
-    :param linehandle: matplotlib line handle object
-    :type linehandle: obj
     :param target_resolution: target resolution of final figure in PPI.
         If a scalar integer is provided, it is assumed to be square in both axis.
         If a list or an np.array is provided, it is interpreted as [H, W]
     :type target_resolution: int, list of int or np.array
+    :param visual_data: visual representation of the data. Shape [N, 2]
+    :type visual_data: np.ndarray
 
-    :returns: data.
+    :returns: mask
     """
-    if type(target_resolution) not in [list, np.ndarray, np.array]:
-        if np.isinf(target_resolution) or target_resolution == 0:
-            return data
-    elif any(np.logical_or(np.isinf(target_resolution), target_resolution == 0)):
-        return data
-    W, H = _get_width_height_in_pixels(fighandle, target_resolution)
-    xDataVis, yDataVis = _split_data_2D(visual_data)
+    mask = np.ones(len(visual_data), dtype=bool)
+    pixel_scale = _get_pixel_scale(xLim, yLim, fighandle, target_resolution)
+    if pixel_scale is None:
+        return mask
+    xDataVis = visual_data[:, 0]
+    yDataVis = visual_data[:, 1]
     # Only simplify if there are more than 2 points
-    if np.size(xDataVis) <= 2 or np.size(yDataVis) <= 2:
-        return data
+    if np.size(xDataVis) <= 2:
+        return mask
 
     # Automatically guess a tol based on the area of the figure and
     # the area and resolution of the output
-    xRange = xLim[1] - xLim[0]
-    yRange = yLim[1] - yLim[0]
-
-    # Conversion factors of data units into pixels
-    xToPix = W / xRange
-    yToPix = H / yRange
+    xToPix, yToPix = pixel_scale
 
-    id_remove = np.array([])
     # If the path has markers, perform pixelation instead of simplification
     if hasMarkers and not hasLines:
         # Pixelate data at the zoom multiplier
         mask = _pixelate(xDataVis, yDataVis, xToPix, yToPix)
-        id_remove = np.argwhere(mask * 1 == 0)
     elif hasLines and not hasMarkers:
         # Get the width of a pixel
         xPixelWidth = 1 / xToPix
@@ -855,40 +1046,131 @@ def _simplify_line(
         # If lines were separated by a NaN, diff(~id_nan) would give 1 for
         # the start of a line and -1 for the index after the end of
         # a line.
-
         id_diff = np.diff(
             1
             * np.concatenate(
                 [np.array([False]), np.logical_not(id_nan), np.array([False])]
             ),
             axis=0,
-        ).reshape((-1,))
-        lineStart = np.argwhere(id_diff == 1)
-        lineStart = lineStart.reshape((-1,))
-        lineEnd = np.argwhere(id_diff == -1) - 1
-        lineEnd = lineEnd.reshape((-1,))
-        numLines = np.size(lineStart)
-
-        # original_code : id_remove = cell(numLines, 1)
-        id_remove = [np.array([], dtype=np.int32).reshape((-1,))] * numLines
+        )
+        lineStart = np.flatnonzero(id_diff == 1)
+        lineEnd = np.flatnonzero(id_diff == -1) - 1
 
         # Simplify the line segments
-        for ii in np.arange(numLines):
-            # Actual data that inherits the simplifications
-            x = xDataVis[lineStart[ii] : lineEnd[ii] + 1]
-            y = yDataVis[lineStart[ii] : lineEnd[ii] + 1]
-
+        for start, end in zip(lineStart, lineEnd):
             # Line simplification
-            if np.size(x) > 2:
-                mask = _opheim_simplify(x, y, tol)
-                id_remove[ii] = np.argwhere(mask == 0).reshape((-1,)) + lineStart[ii]
-        # Merge the indices of the line segments
-        # original code : id_remove = cat(1, id_remove{:})
-        id_remove = np.concatenate(id_remove)
-
-    # remove the data points
-    data = _remove_data(data, id_remove, is3D)
-    return data
+            if end - start + 1 > 2:
+                mask[start : end + 1] = _opheim_simplify(
+                    xDataVis[start : end + 1], yDataVis[start : end + 1], tol
+                )
+    return mask
+
+
+def _get_pixel_scale(xLim, yLim, fighandle, target_resolution):
+    """Returns the conversion factors of visual data units into pixels at the target
+    resolution, or ``None`` if the simplification is disabled.
+
+    :returns: (xToPix, yToPix)
+    """
+    if type(target_resolution) not in [list, np.ndarray, np.array]:
+        if np.isinf(target_resolution) or target_resolution == 0:
+            return None
+    elif any(np.logical_or(np.isinf(target_resolution), target_resolution == 0)):
+        return None
+    W, H = _get_width_height_in_pixels(fighandle, target_resolution)
+    xRange = xLim[1] - xLim[0]
+    yRange = yLim[1] - yLim[0]
+    return W / xRange, H / yRange
+
+
+def _simplify_stairs(
+    xLim, yLim, fighandle, target_resolution, visual_data, data, drawstyle
+):
+    """Reduce the number of data points of a step plot. Steps at the same level (at
+    the target resolution) are merged, and of the steps within one pixel column,
+    only the first and the last one, and the ones with the minimal and the maximal
+    level are kept. The draw style of the line is kept, so the result is the same up
+    to one pixel.
+
+    :param drawstyle: "steps-pre" (or "steps"), "steps-post" or "steps-mid"
+    :type drawstyle: str
+
+    :returns: data.
+    """
+    pixel_scale = _get_pixel_scale(xLim, yLim, fighandle, target_resolution)
+    if pixel_scale is None or len(data) <= 2:
+        return data
+    xToPix, yToPix = pixel_scale
+    xDataVis, yDataVis = _split_data_2D(visual_data)
+    xPix = xDataVis * xToPix
+    yPix = yDataVis * yToPix
+
+    keep = _merge_stair_levels(yPix, drawstyle)
+    idx = np.flatnonzero(keep)
+    idx = idx[_reduce_pixel_columns(xPix[idx], yPix[idx])]
+    idx = idx[_merge_stair_levels(yPix[idx], drawstyle)]
+
+    return data[idx]
+
+
+def _merge_stair_levels(y, drawstyle):
+    """Returns the mask of the steps to keep if steps at the same level (rounded to
+    pixels) are merged. With "steps-post", a level holds from its point to the next
+    one, with "steps-pre" from the previous point to its one. The first and the last
+    point always stay.
+
+    :param y: y coordinates in pixels. Shape [N, ]
+    :type y: np.ndarray
+
+    :returns: mask
+    """
+    level = np.round(y)
+    same_as_previous = level[1:-1] == level[:-2]
+    same_as_next = level[1:-1] == level[2:]
+    if drawstyle == "steps-post":
+        remove = same_as_previous
+    elif drawstyle in ["steps-pre", "steps"]:
+        remove = same_as_next
+    else:
+        # steps-mid: the jumps are halfway to the neighbors
+        remove = np.logical_and(same_as_previous, same_as_next)
+    mask = np.ones(len(y), dtype=bool)
+    mask[1:-1] = np.logical_not(remove)
+    return mask
+
+
+def _reduce_pixel_columns(x, y):
+    """Returns the mask of the first, the last, the lowest and the highest point of
+    every run of points within the same pixel column. Points with NaNs stay.
+
+    :param x: x coordinates in pixels. Shape [N, ]
+    :type x: np.ndarray
+    :param y: y coordinates in pixels. Shape [N, ]
+    :type y: np.ndarray
+
+    :returns: mask
+    """
+    n = len(x)
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+    isfinite = np.logical_and(np.isfinite(x), np.isfinite(y))
+    column = np.floor(x)
+    is_start = np.ones(n, dtype=bool)
+    is_start[1:] = (column[1:] != column[:-1]) | ~isfinite[1:] | ~isfinite[:-1]
+    starts = np.flatnonzero(is_start)
+    mask[starts] = True
+    mask[np.append(starts[1:], n) - 1] = True
+
+    run = np.cumsum(is_start) - 1
+    y = np.where(isfinite, y, 0.0)
+    for extreme in [np.minimum, np.maximum]:
+        is_extreme = y == extreme.reduceat(y, starts)[run]
+        # only the first one of every run
+        ids = np.flatnonzero(is_extreme)
+        ids = ids[np.concatenate([[True], run[ids][1:] != run[ids][:-1]])]
+        mask[ids] = True
+    return mask
 
 
 def _pixelate(x, y, xToPix, yToPix):
@@ -1035,13 +1317,12 @@ def _opheim_simplify(x, y, tol):
 
 def _limit_precision(axhandle, data, is3D, alpha):
     """Limit the precision of the given data. If alpha is 0 or negative do nothing.
+    The data is changed in place.
 
-    :param fighandle: matplotlib figure handle object
-    :type fighandle: obj
     :param axhandle: matplotlib axes handle object
     :type axhandle: obj
-    :param linehandle: matplotlib line handle object
-    :type linehandle: obj
+    :param data: array of data points. Shape [N, 2] or [N, 3]
+    :type data: np.ndarray
     :param alpha: scalar value indicating precision when scaling down. By default 1
     :type alpha: float
 
@@ -1050,22 +1331,12 @@ def _limit_precision(axhandle, data, is3D, alpha):
     if alpha <= 0:
         return data
 
-    if is3D:
-        xData, yData, zData = _split_data_3D(data)
-    else:
-        xData, yData = _split_data_2D(data)
-
     isXlog = axhandle.get_xscale() == "log"
     isYlog = axhandle.get_yscale() == "log"
     if is3D:
         isZlog = axhandle.get_zscale() == "log"
-
-    # Put the data into a matrix and log bits into vector
-    if is3D:
-        data = np.stack([xData, yData, zData], axis=1)
         isLog = np.array([isXlog, isYlog, isZlog])
     else:
-        data = np.stack([xData, yData], axis=1)
         isLog = np.array([isXlog, isYlog])
 
     # Only do something if the data is not empty
@@ -1082,22 +1353,21 @@ def _limit_precision(axhandle, data, is3D, alpha):
     # of the largest number. Scale it with a user defined value alpha
     leastSignificantBit = np.finfo(maxValue).eps * alpha
 
-    data = np.round(data / leastSignificantBit) * leastSignificantBit
+    data /= leastSignificantBit
+    np.round(data, out=data)
+    data *= leastSignificantBit
     data[:, isLog] = 10.0 ** data[:, isLog]
     return data
 
 
-def _segment_visible(data, dataIsInBox, xLim, yLim):
+def _segment_visible(data, xLim, yLim):
     """Given a bounding box {x,y}Lim, determine whether the line between all
-    pairs of subsequent data points [data(idx,:)<-->data(idx+1,:)] is visible.
-    There are two possible cases:
-    1: One of the data points is within the limits
-    2: The line segments between the datapoints crosses the bounding box
+    pairs of subsequent data points [data(idx,:)<-->data(idx+1,:)] is visible,
+    i.e., whether part of it is within the limits. The segments are clipped in
+    chunks to keep the temporary arrays small.
 
     :param data: array of data points. Shape [N, 2]
     :type data: np.ndarray
-    :param dataIsInBox: boolean mask that specifies if data point lies within visual box
-    :type dataIxInBox: np.ndarray
     :param xLim: x axes limits
     :type xLim: list, np.array
     :param yLim: y axes limits
@@ -1105,53 +1375,16 @@ def _segment_visible(data, dataIsInBox, xLim, yLim):
 
     :returns : mask
     """
-    n = np.shape(data)[0]
-    mask = np.zeros((n - 1, 1)) == 1
-
-    # Only check if there is more than 1 point
-    if n > 1:
-        # Define the vectors of data points for the segments X1--X2
-        idx = np.arange(n - 1)
-        X1 = data[idx, :]
-        X2 = data[idx + 1, :]
-
-        # One of the neighbors is inside the box and the other is finite
-        thisVisible = np.logical_and(dataIsInBox[idx], np.all(np.isfinite(X2), 1))
-        nextVisible = np.logical_and(dataIsInBox[idx + 1], np.all(np.isfinite(X1), 1))
-
-        bottomLeft, topLeft, bottomRight, topRight = _corners2D(xLim, yLim)
-
-        left = _segments_intersect(X1, X2, bottomLeft, topLeft)
-        right = _segments_intersect(X1, X2, bottomRight, topRight)
-        bottom = _segments_intersect(X1, X2, bottomLeft, bottomRight)
-        top = _segments_intersect(X1, X2, topLeft, topRight)
-
-        # Check the result
-        mask1 = np.logical_or(thisVisible, nextVisible)
-        mask2 = np.logical_or(left, right)
-        mask3 = np.logical_or(top, bottom)
-
-        mask = np.logical_or(mask1, mask2)
-        mask = np.logical_or(mask3, mask)
-
+    n = max(len(data) - 1, 0)
+    mask = np.empty(n, dtype=bool)
+    for k in range(0, n, _chunk_size):
+        stop = min(k + _chunk_size, n)
+        mask[k:stop], _, _ = _clip_segments(
+            data[k:stop], data[k + 1 : stop + 1], xLim, yLim
+        )
     return mask
 
 
-def _corners2D(xLim, yLim):
-    """Determine the corners of the axes as defined by xLim and yLim
-
-    :param xLim: x limits interval. Shape [2, ]
-    :type xLim: np.array
-    :param yLim: y limits interval. Shape [2, ]
-    :type yLim: np.array
-    """
-    bottomLeft = np.array([xLim[0], yLim[0]])
-    topLeft = np.array([xLim[0], yLim[1]])
-    bottomRight = np.array([xLim[1], yLim[0]])
-    topRight = np.array([xLim[1], yLim[1]])
-    return bottomLeft, topLeft, bottomRight, topRight
-
-
 def _corners3D(xLim, yLim, zLim):
     """Determine the corners of the 3D axes as defined by xLim, yLim and zLim.
 
@@ -1227,78 +1460,3 @@ def _get_projection_matrix(axhandle):
 
     P = rotationX @ rotationZ @ scaleMatrix
     return P
-
-
-def _segments_intersect(X1, X2, X3, X4):
-    """Checks whether the segments X1--X2 and X3--X4 intersect.
-
-    :param X1: X1
-    :type X1: np.ndarray
-    :param X2: X2
-    :type X2: np.ndarray
-    :param X3: X3
-    :type X3: np.ndarray
-    :param X4: X4
-    :type X4: np.ndarray
-
-    :returns: mask
-    :rtype: boolean np.ndarray
-    """
-    Lambda = _cross_lines(X1, X2, X3, X4)
-
-    # Check whether lambda is in bound
-    mask1 = np.logical_and(0.0 < Lambda[:, 0], Lambda[:, 0] < 1.0)
-    mask2 = np.logical_and(0.0 < Lambda[:, 1], Lambda[:, 1] < 1.0)
-    mask = np.logical_and(mask1, mask2)
-    return mask
-
-
-def _cross_lines(X1, X2, X3, X4):
-    """Checks whether the segments X1--X2 and X3--X4 intersect.
-    See https://en.wikipedia.org/wiki/Line-line_intersection for reference.
-    Given four points X_k=(x_k,y_k), k in {1,2,3,4}, and the two lines defined by those,
-
-        L1(lambda) = X1 + lambda (X2 - X1)
-        L2(lambda) = X3 + lambda (X4 - X3)
-
-    returns the lambda for which they intersect (and Inf if they are parallel).
-    Technically, one needs to solve the 2x2 equation system
-
-        x1 + lambda1 (x2-x1)  =  x3 + lambda2 (x4-x3)
-        y1 + lambda1 (y2-y1)  =  y3 + lambda2 (y4-y3)
-
-    for lambda1 and lambda2.
-
-    Now X1 is a vector of all data points X1 and X2 is a vector of all
-    consecutive data points X2
-    n is the number of segments (not points in the plot!)
-
-    :param X1: X1
-    :type X1: np.ndarray
-    :param X2: X2
-    :type X2: np.ndarray
-    :param X3: X3
-    :type X3: np.ndarray
-    :param X4: X4
-    :type X4: np.ndarray
-    """
-    detA = -(X2[:, 0] - X1[:, 0]) * (X4[1] - X3[1]) + (X2[:, 1] - X1[:, 1]) * (
-        X4[0] - X3[0]
-    )
-
-    id_detA = detA != 0
-
-    n = X2.shape[0]
-    Lambda = np.zeros((n, 2))
-    if id_detA.any():
-        # NOTE: watch out for broadcasting
-        rhs = -X1.reshape((-1, 2)) + X3.reshape((-1, 2))
-        Rotate = np.array([[0, -1], [1, 0]])
-        Lambda[id_detA, 0] = (rhs[id_detA, :] @ Rotate @ (X4 - X3).T) / detA[id_detA]
-        Lambda[id_detA, 1] = (
-            np.sum(
-                -(X2[id_detA, :] - X1[id_detA, :]) @ Rotate * rhs[id_detA, :], axis=1
-            )
-            / detA[id_detA]
-        )
-    return Lambda
@@ -0,0 +1,214 @@
+"""Contour lines as one `contour prepared` plot of PGFPlots, or, with matplotlib
+before 3.8, as one plot per level.
+"""
+import matplotlib as mpl
+import numpy as np
+from matplotlib.path import Path
+
+from . import _color, _files
+from ._axes import _mpl_cmap2pgf_cmap
+from ._path import (
+    is_data_path_collection,
+    mpl_linestyle2pgfplots_linestyle,
+    mpl_linewidth2pgfp_linewidth,
+)
+from ._util import get_legend_text, has_legend
+
+
+def is_contour_lines(obj):
+    """Whether `obj` is a set of contour lines (not filled ones). From matplotlib 3.8
+    on, contour sets are artists; before, every level is a collection of its own and
+    those are drawn one by one.
+    """
+    return isinstance(obj, mpl.contour.ContourSet) and not obj.filled
+
+
+def is_contour_level(obj):
+    """Whether `obj` is one level of contour lines as drawn by matplotlib before 3.8:
+    a collection of unfilled paths in data coordinates, all drawn alike. The contour
+    set the level belongs to can't be found from it, so every level is a plot of its
+    own.
+    """
+    return (
+        is_data_path_collection(obj)
+        and len(obj.get_facecolor()) == 0
+        and len(np.unique(obj.get_edgecolor(), axis=0)) <= 1
+        and len(set(obj.get_linewidth())) <= 1
+        and len({repr(ls) for ls in obj.get_linestyle()}) <= 1
+    )
+
+
+def _get_level_paths(obj):
+    if isinstance(obj, mpl.collections.Collection):
+        # one (compound) path per level
+        return obj.get_paths()
+    return [Path.make_compound_path(*col.get_paths()) for col in obj.collections]
+
+
+def _get_level_property(obj, getter):
+    if isinstance(obj, mpl.collections.Collection):
+        return list(getattr(obj, getter)())
+    return [getattr(col, getter)()[0] for col in obj.collections]
+
+
+def get_table(levels, paths):
+    """Returns the points (x, y, level) of all contour lines, and the indices of the
+    points starting a line other than the first one.
+    """
+    vertices = [path.vertices.reshape(-1, 2) for path in paths]
+    codes = [
+        path.codes
+        if path.codes is not None
+        else np.repeat([Path.MOVETO, Path.LINETO], [1, len(path.vertices) - 1])
+        for path in paths
+    ]
+    lengths = [len(verts) for verts in vertices]
+    if sum(lengths) == 0:
+        return np.empty((0, 3)), np.empty(0, dtype=int)
+    vertices = np.concatenate(vertices)
+    codes = np.concatenate(codes)
+    points = np.column_stack([vertices, np.repeat(levels, lengths)])
+
+    # A closed line ends where it started.
+    is_start = codes == Path.MOVETO
+    starts = np.flatnonzero(is_start)
+    closing = codes == Path.CLOSEPOLY
+    points[closing, :2] = vertices[starts[np.cumsum(is_start)[closing] - 1]]
+
+    keep = codes != Path.STOP
+    points = points[keep]
+    starts = np.flatnonzero(is_start[keep])
+    return points, starts[starts > 0]
+
+
+def draw_contourset(data, obj):
+    """Returns the PGFPlots code for all contour lines of the contour set `obj`, or
+    ``None`` if the levels differ in other ways than their color.
+    """
+    linewidths = _get_level_property(obj, "get_linewidth")
+    linestyles = _get_level_property(obj, "get_linestyle")
+    if len(set(linewidths)) > 1 or len({repr(ls) for ls in linestyles}) > 1:
+        # e.g., dashed negative levels
+        return None
+    colors = _get_level_property(obj, "get_edgecolor")
+    if obj.colors is not None and len(np.unique(colors, axis=0)) > 1:
+        # The colors aren't mapped from the levels.
+        return None
+
+    ff = data["float format"]
+    content = []
+
+    contour_options = ["labels=false"]
+    draw_options = []
+    if obj.colors is None:
+        # colors by the colormap
+        mycolormap, is_custom_cmap = _mpl_cmap2pgf_cmap(obj.get_cmap(), data)
+        draw_options += [
+            "point meta=\\thisrow{level}",
+            "colormap" + (" name=" if is_custom_cmap else "/") + mycolormap,
+            f"point meta min={obj.norm.vmin:{ff}}",
+            f"point meta max={obj.norm.vmax:{ff}}",
+        ]
+    else:
+        data, col, _ = _color.mpl_color2xcolor(data, colors[0])
+        contour_options.append(f"draw color={col}")
+    draw_options.insert(0, "contour prepared={{{}}}".format(", ".join(contour_options)))
+
+    if obj.get_alpha() is not None:
+        draw_options.append(f"draw opacity={obj.get_alpha():{ff}}")
+    if linewidths:
+        width = mpl_linewidth2pgfp_linewidth(data, linewidths[0])
+        if width:
+            draw_options.append(width)
+    if linestyles:
+        style = mpl_linestyle2pgfplots_linestyle(data, linestyles[0])
+        if style is not None and style != "solid":
+            draw_options.append(style)
+
+    if has_legend(obj.axes):
+        draw_options.append("forget plot")
+
+    content.append("\\addplot [{}]\n".format(", ".join(draw_options)))
+
+    points, starts = get_table(obj.levels, _get_level_paths(obj))
+    rows = np.array(
+        [" ".join(f"{val:{ff}}" for val in point) + "\n" for point in points],
+        dtype=object,
+    )
+    # An empty line ends a contour line.
+    rows = np.insert(rows, starts, "\n")
+    plot_table = ["x y level\n"] + list(rows)
+
+    if data["externalize tables"]:
+        filepath, rel_filepath = _files.new_filepath(data, "table", ".dat")
+        with _files.open_external(data, filepath, rel_filepath) as f:
+            # No encoding handling required: plot_table is only ASCII
+            f.writelines(plot_table)
+        content.append(f"table [z=level] {{{rel_filepath.as_posix()}}};\n")
+    else:
+        content.append("table [z=level] {%\n")
+        content.extend(plot_table)
+        content.append("};\n")
+
+    return data, content
+
+
+def draw_contour_level(data, obj):
+    """Returns the PGFPlots code for one level of contour lines, see
+    `is_contour_level()`: one plot, with a jump between the lines.
+    """
+    paths = obj.get_paths()
+    if len(paths) == 0:
+        return data, []
+
+    ff = data["float format"]
+    content = []
+
+    draw_options = []
+    edgecolors = obj.get_edgecolor()
+    if len(edgecolors) > 0:
+        data, col, _ = _color.mpl_color2xcolor(data, edgecolors[0])
+        draw_options.append(col)
+    if obj.get_alpha() is not None:
+        draw_options.append(f"opacity={obj.get_alpha():{ff}}")
+    linewidths = obj.get_linewidth()
+    if len(linewidths) > 0:
+        width = mpl_linewidth2pgfp_linewidth(data, linewidths[0])
+        if width:
+            draw_options.append(width)
+    linestyles = obj.get_linestyle()
+    if len(linestyles) > 0:
+        style = mpl_linestyle2pgfplots_linestyle(data, linestyles[0])
+        if style is not None and style != "solid":
+            draw_options.append(style)
+    draw_options.append("unbounded coords=jump")
+
+    legend_text = get_legend_text(data, obj)
+    if legend_text is None and has_legend(obj.axes):
+        draw_options.append("forget plot")
+
+    content.append("\\addplot [{}]\n".format(", ".join(draw_options)))
+
+    points, starts = get_table([0.0], [Path.make_compound_path(*paths)])
+    rows = np.array(
+        [f"{x:{ff}} {y:{ff}}\n" for x, y in points[:, :2]],
+        dtype=object,
+    )
+    # NaNs separate the lines.
+    plot_table = list(np.insert(rows, starts, "nan nan\n"))
+
+    if data["externalize tables"]:
+        filepath, rel_filepath = _files.new_filepath(data, "table", ".dat")
+        with _files.open_external(data, filepath, rel_filepath) as f:
+            # No encoding handling required: plot_table is only ASCII
+            f.writelines(plot_table)
+        content.append(f"table {{{rel_filepath.as_posix()}}};\n")
+    else:
+        content.append("table {%\n")
+        content.extend(plot_table)
+        content.append("};\n")
+
+    if legend_text is not None:
+        content.append(f"\\addlegendentry{{{legend_text}}}\n")
+
+    return data, content
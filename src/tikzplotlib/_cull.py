@@ -0,0 +1,146 @@
+"""Skip artists outside of the view of the axes, and the points of lines far out of
+it. Nothing of the figure is changed.
+"""
+import matplotlib as mpl
+import numpy as np
+
+from ._util import get_legend_text, transform_to_data_coordinates
+
+# number of points which are tested at once
+_chunk_size = 2**16
+
+
+def _is_cullable(obj):
+    # Only artists which are clipped to the rectangular view of rectilinear axes
+    axes = obj.axes
+    if axes is None or axes.name != "rectilinear" or not obj.get_clip_on():
+        return False
+    clip_box = obj.get_clip_box()
+    return (
+        clip_box is not None
+        and obj.get_clip_path() is None
+        and np.allclose(clip_box.bounds, axes.bbox.bounds)
+    )
+
+
+def _get_margin(obj):
+    """Returns how far (in points) the artist is drawn around its data, e.g., markers
+    and thick lines.
+    """
+    if isinstance(obj, mpl.lines.Line2D):
+        if obj.get_marker() in [None, "None", "none", ""]:
+            return obj.get_linewidth()
+        return obj.get_linewidth() + obj.get_markersize() + obj.get_markeredgewidth()
+    if isinstance(obj, mpl.collections.Collection):
+        linewidths = obj.get_linewidth()
+        margin = max(linewidths) if len(linewidths) > 0 else 0.0
+        sizes = obj.get_sizes() if hasattr(obj, "get_sizes") else None
+        if sizes is not None and len(sizes) > 0:
+            # sizes are areas in points**2
+            margin += np.sqrt(max(sizes))
+        return margin
+    if isinstance(obj, mpl.patches.Patch):
+        return obj.get_linewidth()
+    return 0.0
+
+
+def get_view(obj):
+    """Returns the limits (xmin, xmax, ymin, ymax) in data coordinates in which the
+    artist `obj` can be seen in its axes.
+    """
+    axes = obj.axes
+    # one extra pixel for antialiasing
+    margin = _get_margin(obj) * axes.figure.dpi / 72 + 1
+    corners = axes.bbox.padded(margin).get_points()
+    (x0, y0), (x1, y1) = axes.transData.inverted().transform(corners)
+    return min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1)
+
+
+def _get_data_bbox(obj):
+    """Returns the bounding box of the artist in data coordinates, or ``None`` if it
+    isn't known.
+    """
+    to_data = obj.axes.transData.inverted()
+    if isinstance(obj, mpl.lines.Line2D):
+        xydata = obj.get_xydata()
+        xdata, ydata = transform_to_data_coordinates(obj, xydata[:, 0], xydata[:, 1])
+        is_finite = np.isfinite(xdata) & np.isfinite(ydata)
+        if not np.any(is_finite):
+            return None
+        xdata = xdata[is_finite]
+        ydata = ydata[is_finite]
+        return mpl.transforms.Bbox.from_extents(
+            np.min(xdata), np.min(ydata), np.max(xdata), np.max(ydata)
+        )
+    if isinstance(obj, mpl.collections.Collection):
+        bbox = obj.get_datalim(obj.axes.transData)
+    elif isinstance(obj, (mpl.patches.Patch, mpl.image.AxesImage)):
+        bbox = mpl.transforms.TransformedBbox(obj.get_window_extent(), to_data)
+    else:
+        return None
+    if not np.all(np.isfinite(bbox.get_points())) or bbox.width < 0:
+        # e.g., a collection without any paths
+        return None
+    return bbox
+
+
+def is_out_of_view(data, obj):
+    """Whether the artist `obj` can't be seen in its axes. Artists with a legend entry
+    are always kept.
+    """
+    if not _is_cullable(obj) or get_legend_text(data, obj) is not None:
+        return False
+    bbox = _get_data_bbox(obj)
+    if bbox is None:
+        return False
+    xmin, xmax, ymin, ymax = get_view(obj)
+    x0, x1 = sorted(bbox.intervalx)
+    y0, y1 = sorted(bbox.intervaly)
+    return x1 < xmin or x0 > xmax or y1 < ymin or y0 > ymax
+
+
+def get_visible_slice(obj, xdata, ydata):
+    """Returns the slice of the points of the line `obj` (in data coordinates) which
+    can be seen in its axes, plus one point before and after to get the line to the
+    border right. If there is nothing to trim, this is the slice of all points.
+    """
+    if not _is_cullable(obj) or obj.get_markevery() or len(xdata) < 2:
+        # mark indices refer to all points
+        return slice(None)
+    view = get_view(obj)
+    n = len(xdata) - 1  # number of segments
+
+    first = None
+    for k in range(0, n, _chunk_size):
+        is_visible = _segments_visible(xdata, ydata, k, min(k + _chunk_size, n), view)
+        if np.any(is_visible):
+            first = k + np.argmax(is_visible)
+            break
+    if first is None:
+        # Whether the line is drawn at all isn't decided here.
+        return slice(None)
+
+    for k in range((n - 1) // _chunk_size * _chunk_size, -1, -_chunk_size):
+        is_visible = _segments_visible(xdata, ydata, k, min(k + _chunk_size, n), view)
+        if np.any(is_visible):
+            last = k + len(is_visible) - 1 - np.argmax(is_visible[::-1])
+            break
+    return slice(first, last + 2)
+
+
+def _segments_visible(xdata, ydata, start, stop, view):
+    """Whether the segments from the points `start` to `stop` (excluding) to their
+    successors might be seen. Segments with NaNs are, too.
+    """
+    xmin, xmax, ymin, ymax = view
+    x0 = np.asarray(xdata[start:stop])
+    x1 = np.asarray(xdata[start + 1 : stop + 1])
+    y0 = np.asarray(ydata[start:stop])
+    y1 = np.asarray(ydata[start + 1 : stop + 1])
+    with np.errstate(invalid="ignore"):
+        return ~(
+            ((x0 < xmin) & (x1 < xmin))
+            | ((x0 > xmax) & (x1 > xmax))
+            | ((y0 < ymin) & (y1 < ymin))
+            | ((y0 > ymax) & (y1 > ymax))
+        )
@@ -1,3 +1,6 @@
+import contextlib
+import io
+import tempfile
 from pathlib import Path
 
 
@@ -7,9 +10,18 @@ def _gen_filepath(data, nb_key, ext):
     if data["rel data path"]:
         rel_filepath = data["rel data path"] / rel_filepath
 
+    if data["externals"] is not None:
+        # in-memory externals, there is no file
+        return None, rel_filepath
     return data["output dir"] / rel_filepath, rel_filepath
 
 
+def _exists(data, filepath, rel_filepath):
+    if data["externals"] is not None:
+        return rel_filepath.as_posix() in data["externals"]
+    return filepath.is_file()
+
+
 def new_filepath(data, file_kind, ext):
     """Returns an available filepath.
 
@@ -22,9 +34,14 @@ def new_filepath(data, file_kind, ext):
 
     :returns: (filepath, rel_filepath) where filepath is a path in the
               filesystem and rel_filepath is the path to be used in the tex
-              code.
+              code. With in-memory externals, filepath is ``None``.
     """
 
+    if data["externals"] is None and data["output dir"] is None:
+        # Without filepath, the files go to a temporary directory. It's only created
+        # once it is needed.
+        data["output dir"] = Path(tempfile.mkdtemp())
+
     nb_key = file_kind + "number"
     if nb_key not in data.keys():
         data[nb_key] = -1
@@ -33,8 +50,27 @@ def new_filepath(data, file_kind, ext):
     filepath, rel_filepath = _gen_filepath(data, nb_key, ext)
     if not data["override externals"]:
         # Make sure not to overwrite anything.
-        while filepath.is_file():
+        while _exists(data, filepath, rel_filepath):
             data[nb_key] += 1
             filepath, rel_filepath = _gen_filepath(data, nb_key, ext)
 
     return filepath, rel_filepath
+
+
+@contextlib.contextmanager
+def open_external(data, filepath, rel_filepath, mode="w"):
+    """Opens an external file, as given by `new_filepath`, for writing. With in-memory
+    externals, the content is stored in ``data["externals"]`` instead.
+
+    :param mode: ``"w"`` for text (which must be ASCII) or ``"wb"`` for bytes.
+    :type mode: str
+    """
+    if data["externals"] is None:
+        with open(filepath, mode) as f:
+            yield f
+        return
+
+    f = io.BytesIO() if "b" in mode else io.StringIO()
+    yield f
+    value = f.getbuffer() if "b" in mode else f.getvalue().encode("ascii")
+    data["externals"][rel_filepath.as_posix()] = value
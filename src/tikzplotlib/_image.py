@@ -4,6 +4,9 @@ import PIL
 
 from . import _files
 
+# size in bytes of the (float) values which are resampled at once
+_tile_bytes = 2**24
+
 
 def draw_image(data, obj):
     """Returns the PGFPlots code for an image environment."""
@@ -12,19 +15,21 @@ def draw_image(data, obj):
     filepath, rel_filepath = _files.new_filepath(data, "img", ".png")
 
     # store the image as in a file
-    img_array = obj.get_array()
+    img_array = _downsample(data, obj, obj.get_array())
 
     dims = img_array.shape
     if len(dims) == 2:  # the values are given as one real number: look at cmap
         clims = obj.get_clim()
-        plt.imsave(
-            fname=filepath,
-            arr=img_array,
-            cmap=obj.get_cmap(),
-            vmin=clims[0],
-            vmax=clims[1],
-            origin=obj.origin,
-        )
+        with _files.open_external(data, filepath, rel_filepath, "wb") as f:
+            plt.imsave(
+                fname=f,
+                arr=img_array,
+                cmap=obj.get_cmap(),
+                vmin=clims[0],
+                vmax=clims[1],
+                origin=obj.origin,
+                format="png",
+            )
     else:
         # RGB (+alpha) information at each point
         assert len(dims) == 3 and dims[2] in [3, 4]
@@ -40,7 +45,8 @@ def draw_image(data, obj):
         # If the input image is PIL:
         # image = PIL.Image.fromarray(img_array)
 
-        image.save(filepath, origin=obj.origin)
+        with _files.open_external(data, filepath, rel_filepath, "wb") as f:
+            image.save(f, format="png", origin=obj.origin)
 
     # write the corresponding information to the TikZ file
     extent = obj.get_extent()
@@ -62,3 +68,92 @@ def draw_image(data, obj):
         f"ymin={extent[2]:{ff}}, ymax={extent[3]:{ff}}] {{{posix_filepath}}};\n"
     )
     return data, content
+
+
+def _get_target_shape(data, obj, shape):
+    """Returns the number of pixels (rows, columns) the image needs for the image dpi
+    and the maximum number of pixels. Images are never upsampled.
+    """
+    rows, cols = shape[:2]
+    if data["image dpi"] and obj.axes is not None:
+        # size of the image in the figure in inches
+        bbox = obj.get_window_extent()
+        dpi_scale = data["image dpi"] / obj.figure.dpi
+        rows = min(rows, max(1, round(abs(bbox.height) * dpi_scale)))
+        cols = min(cols, max(1, round(abs(bbox.width) * dpi_scale)))
+    max_pixels = data["max image pixels"]
+    if max_pixels and rows * cols > max_pixels:
+        alpha = np.sqrt(max_pixels / (rows * cols))
+        rows = max(1, int(rows * alpha))
+        cols = max(1, int(cols * alpha))
+    return rows, cols
+
+
+def _downsample(data, obj, img_array):
+    """Resamples the image to the size it is printed at, by area averaging or, if the
+    image isn't interpolated, by picking the nearest pixels. The array is processed
+    in tiles of a bounded number of input rows, such that memory maps are never
+    loaded as a whole.
+    """
+    rows, cols = _get_target_shape(data, obj, img_array.shape)
+    if (rows, cols) == img_array.shape[:2]:
+        return img_array
+
+    in_rows, in_cols = img_array.shape[:2]
+    # the pixels of the output row k are the input rows row_starts[k]:row_starts[k+1]
+    row_starts = (np.arange(rows + 1) * in_rows) // rows
+    col_starts = (np.arange(cols + 1) * in_cols) // cols
+    row_size = 8 * in_cols * int(np.prod(img_array.shape[2:]))
+    tile_rows = max(1, _tile_bytes // row_size)
+
+    if obj.get_interpolation() in ["nearest", "none"]:
+        # center of the output pixels
+        center_rows = (row_starts[:-1] + row_starts[1:]) // 2
+        center_cols = (col_starts[:-1] + col_starts[1:]) // 2
+        tiles = [
+            img_array[center_rows[k : k + tile_rows]][:, center_cols]
+            for k in range(0, rows, tile_rows)
+        ]
+        concatenate = (
+            np.ma.concatenate if np.ma.isMaskedArray(img_array) else np.concatenate
+        )
+        return concatenate(tiles)
+
+    # Area averaging, masked pixels don't count. The sums of output rows which span
+    # several tiles are accumulated.
+    is_masked = np.ma.is_masked(img_array)
+    sums = np.zeros((rows, cols) + img_array.shape[2:])
+    counts = np.zeros((rows, cols) + img_array.shape[2:])
+    # the output row of every input row
+    out_rows = np.repeat(np.arange(rows), np.diff(row_starts))
+    for k in range(0, in_rows, tile_rows):
+        tile = img_array[k : k + tile_rows]
+        tile_out_rows = out_rows[k : k + len(tile)]
+        # the first input row of every output row in the tile
+        starts = np.flatnonzero(np.diff(tile_out_rows, prepend=-1))
+        targets = tile_out_rows[starts]
+        if is_masked:
+            valid = ~np.ma.getmaskarray(tile)
+            values = np.where(valid, np.ma.getdata(tile), 0.0)
+            counts[targets] += _block_sums(valid.astype(float), starts, col_starts)
+        else:
+            values = np.asarray(tile, dtype=float)
+            row_counts = np.diff(np.append(starts, len(tile)))
+            block_counts = np.multiply.outer(row_counts, np.diff(col_starts))
+            counts[targets] += block_counts.reshape(
+                block_counts.shape + (1,) * (tile.ndim - 2)
+            )
+        sums[targets] += _block_sums(values, starts, col_starts)
+
+    with np.errstate(invalid="ignore"):
+        out = sums / counts
+    if is_masked:
+        out = np.ma.masked_array(out, mask=counts == 0)
+    if img_array.dtype.kind in "iu":
+        out = np.round(out).astype(img_array.dtype)
+    return out
+
+
+def _block_sums(array, row_starts, col_starts):
+    array = np.add.reduceat(array, row_starts, axis=0)
+    return np.add.reduceat(array, col_starts[:-1], axis=1)
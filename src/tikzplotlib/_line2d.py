@@ -1,19 +1,23 @@
 import datetime
 
 import numpy as np
-from matplotlib.dates import num2date
 
 from . import _color as mycol
-from . import _files
+from . import _cull, _files
 from . import _path as mypath
 from ._markers import _mpl_marker2pgfp_marker
-from ._util import get_legend_text, has_legend, transform_to_data_coordinates
+from ._util import (
+    get_legend_text,
+    has_legend,
+    mpl_dates2strings,
+    set_date_coordinates,
+    transform_to_data_coordinates,
+)
 
 
 def draw_line2d(data, obj):
     """Returns the PGFPlots code for an Line2D environment."""
     content = []
-    addplot_options = []
 
     # If line is of length 0, do nothing.  Otherwise, an empty \addplot table will be
     # created, which will be interpreted as an external data source in either the file
@@ -26,18 +30,71 @@ def draw_line2d(data, obj):
     if len(xdata) == 0:
         return data, []
 
+    data, addplot_options = get_line_options(
+        data,
+        color=obj.get_color(),
+        line_width=obj.get_linewidth(),
+        line_style=obj.get_linestyle(),
+        drawstyle=obj.get_drawstyle(),
+        alpha=obj.get_alpha(),
+        marker=obj.get_marker(),
+        marker_size=obj.get_markersize(),
+        mark_every=obj.get_markevery(),
+        marker_face_color=obj.get_markerfacecolor(),
+        marker_edge_color=obj.get_markeredgecolor(),
+        line=obj,
+    )
+
+    # Check if a line is in a legend and forget it if not.
+    # Fixes <https://github.com/nschloe/tikzplotlib/issues/167>.
+    legend_text = get_legend_text(data, obj)
+    if legend_text is None and has_legend(obj.axes):
+        addplot_options.append("forget plot")
+
+    # process options
+    content.append("\\addplot ")
+    if addplot_options:
+        opts = ", ".join(addplot_options)
+        content.append(f"[{opts}]\n")
+
+    c, axis_options = _table(obj, data)
+    content += c
+
+    if legend_text is not None:
+        content.append(f"\\addlegendentry{{{legend_text}}}\n")
+
+    return data, content
+
+
+def get_line_options(
+    data,
+    color,
+    line_width,
+    line_style,
+    drawstyle=None,
+    alpha=None,
+    marker=None,
+    marker_size=None,
+    mark_every=None,
+    marker_face_color=None,
+    marker_edge_color=None,
+    line=None,
+):
+    """Returns the \\addplot options of a line with the given styles, as matplotlib
+    specifies them. `line` is the Line2D, if there is one.
+    """
+    addplot_options = []
+
     # get the linewidth (in pt)
-    line_width = mypath.mpl_linewidth2pgfp_linewidth(data, obj.get_linewidth())
+    line_width = mypath.mpl_linewidth2pgfp_linewidth(data, line_width)
     if line_width:
         addplot_options.append(line_width)
 
     # get line color
-    color = obj.get_color()
     data, line_xcolor, _ = mycol.mpl_color2xcolor(data, color)
     addplot_options.append(line_xcolor)
 
     # get draw style
-    drawstyle = obj.get_drawstyle()
     if drawstyle in [None, "default"]:
         pass
     else:
@@ -50,30 +107,23 @@ def draw_line2d(data, obj):
             style = "const plot mark left"
         addplot_options.append(style)
 
-    alpha = obj.get_alpha()
     if alpha is not None:
         addplot_options.append(f"opacity={alpha}")
 
-    linestyle = mypath.mpl_linestyle2pgfplots_linestyle(
-        data, obj.get_linestyle(), line=obj
-    )
+    linestyle = mypath.mpl_linestyle2pgfplots_linestyle(data, line_style, line=line)
     if linestyle is not None and linestyle != "solid":
         addplot_options.append(linestyle)
 
-    marker_face_color = obj.get_markerfacecolor()
-    marker_edge_color = obj.get_markeredgecolor()
-
     is_filled = marker_face_color is not None and not (
         isinstance(marker_face_color, str) and marker_face_color.lower() == "none"
     )
-    data, marker, extra_mark_options = _mpl_marker2pgfp_marker(
-        data, obj.get_marker(), is_filled
-    )
+    data, marker, extra_mark_options = _mpl_marker2pgfp_marker(data, marker, is_filled)
     if marker:
         _marker(
-            obj,
             data,
             marker,
+            marker_size,
+            mark_every,
             addplot_options,
             extra_mark_options,
             marker_face_color,
@@ -84,25 +134,7 @@ def draw_line2d(data, obj):
     if marker and linestyle is None:
         addplot_options.append("only marks")
 
-    # Check if a line is in a legend and forget it if not.
-    # Fixes <https://github.com/nschloe/tikzplotlib/issues/167>.
-    legend_text = get_legend_text(obj)
-    if legend_text is None and has_legend(obj.axes):
-        addplot_options.append("forget plot")
-
-    # process options
-    content.append("\\addplot ")
-    if addplot_options:
-        opts = ", ".join(addplot_options)
-        content.append(f"[{opts}]\n")
-
-    c, axis_options = _table(obj, data)
-    content += c
-
-    if legend_text is not None:
-        content.append(f"\\addlegendentry{{{legend_text}}}\n")
-
-    return data, content
+    return data, addplot_options
 
 
 def draw_linecollection(data, obj):
@@ -131,9 +163,10 @@ def draw_linecollection(data, obj):
 
 
 def _marker(
-    obj,
     data,
     marker,
+    mark_size,
+    mark_every,
     addplot_options,
     extra_mark_options,
     marker_face_color,
@@ -142,14 +175,12 @@ def _marker(
 ):
     addplot_options.append("mark=" + marker)
 
-    mark_size = obj.get_markersize()
     if mark_size:
         ff = data["float format"]
         # setting half size because pgfplots counts the radius/half-width
         pgf_size = 0.5 * mark_size
         addplot_options.append(f"mark size={pgf_size:{ff}}")
 
-    mark_every = obj.get_markevery()
     if mark_every:
         if type(mark_every) is int:
             addplot_options.append(f"mark repeat={mark_every:d}")
@@ -187,9 +218,37 @@ def _marker(
     addplot_options.append(f"mark options={{{opts}}}")
 
 
-def _table(obj, data):  # noqa: C901
+# number of table rows which are formatted at once
+_chunk_size = 2**16
+
+
+def _get_xydata(obj):
+    """Returns the x and y data of the line as views. Plain numeric arrays are taken
+    as they were plotted, so float32 data or memory maps aren't upcast to a float64
+    copy. For everything else, matplotlib's float version of the data is used.
+    """
     # get_xydata() always gives float data, no matter what
-    xdata, ydata = obj.get_xydata().T
+    xydata = obj.get_xydata()
+    columns = [xydata[:, 0], xydata[:, 1]]
+    for k, orig in enumerate(obj.get_data(orig=True)):
+        if (
+            type(orig) in [np.ndarray, np.memmap]
+            and orig.dtype.kind in "fiu"
+            and orig.shape == columns[k].shape
+        ):
+            columns[k] = orig
+    return columns
+
+
+def _is_finite(array):
+    return all(
+        np.all(np.isfinite(array[k : k + _chunk_size]))
+        for k in range(0, len(array), _chunk_size)
+    )
+
+
+def _table(obj, data):  # noqa: C901
+    xdata, ydata = _get_xydata(obj)
 
     # get_{x,y}data gives datetime or string objects if so specified in the plotter
     xdata_alt = obj.get_xdata()
@@ -199,9 +258,9 @@ def _table(obj, data):  # noqa: C901
 
     ff = data["float format"]
 
-    if isinstance(xdata_alt[0], datetime.datetime):
-        xdata = xdata_alt
-    else:
+    # Dates are converted from the float data in one go further down.
+    x_is_date = isinstance(xdata_alt[0], (datetime.datetime, np.datetime64))
+    if not x_is_date:
         if isinstance(xdata_alt[0], str):
             data["current axes"].axis_options += [
                 "xtick={{{}}}".format(",".join([f"{x:{ff}}" for x in xdata])),
@@ -232,28 +291,47 @@ def _table(obj, data):  # noqa: C901
             # pandas.Series have the method mask
             # https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.mask.html
             ydata_mask = []
+        else:
+            ydata_mask = np.broadcast_to(ydata_mask, ydata.shape)
+
+    if data["cull"]:
+        # Points far outside of the view aren't needed.
+        visible = _cull.get_visible_slice(obj, xdata, ydata)
+        xdata = xdata[visible]
+        ydata = ydata[visible]
+        if len(ydata_mask) > 0:
+            ydata_mask = ydata_mask[visible]
 
     axis_options = []
 
-    content = []
+    if x_is_date:
+        set_date_coordinates(data)
 
-    if isinstance(xdata[0], datetime.datetime):
-        xdata = [date.strftime("%Y-%m-%d %H:%M") for date in xdata]
+    if np.any(ydata_mask) or not _is_finite(ydata):
+        # matplotlib jumps at masked or nan values, while PGFPlots by default
+        # interpolates. Hence, if we have a masked plot, make sure that PGFPlots jumps
+        # as well.
+        if "unbounded coords=jump" not in data["current axes"].axis_options:
+            data["current axes"].axis_options.append("unbounded coords=jump")
+
+    content = list(iter_table_code(data, xdata, ydata, ydata_mask, x_is_date))
+    return content, axis_options
+
+
+def iter_table_code(data, xdata, ydata, ydata_mask=(), x_is_date=False):
+    """Yields the code of the table of a line, piece by piece. Externalized tables are
+    written once they are reached. The data isn't copied as a whole, so long lines can
+    be streamed to a file.
+
+    :param ydata_mask: mask of the y values which aren't plotted, or empty
+    :param x_is_date: whether the x values are dates (matplotlib's float dates or
+                      np.datetime64)
+    """
+    ff = data["float format"]
+    if x_is_date:
         xformat = ""
         col_sep = ","
         opts = ["header=false", "col sep=comma"]
-        data["current axes"].axis_options.append("date coordinates in=x")
-        # Replace float xmin/xmax by datetime
-        # <https://github.com/matplotlib/matplotlib/issues/13727>.
-        data["current axes"].axis_options = [
-            option
-            for option in data["current axes"].axis_options
-            if not option.startswith("xmin")
-        ]
-        xmin, xmax = data["current mpl axes obj"].get_xlim()
-        mindate = num2date(xmin).strftime("%Y-%m-%d %H:%M")
-        maxdate = num2date(xmax).strftime("%Y-%m-%d %H:%M")
-        data["current axes"].axis_options.append(f"xmin={mindate}, xmax={maxdate}")
     else:
         opts = []
         xformat = ff
@@ -264,25 +342,28 @@ def _table(obj, data):  # noqa: C901
         opts.append("row sep=" + data["table_row_sep"].strip())
 
     table_row_sep = data["table_row_sep"]
-    ydata[ydata_mask] = np.nan
-    if np.any(ydata_mask) or ~np.all(np.isfinite(ydata)):
-        # matplotlib jumps at masked or nan values, while PGFPlots by default
-        # interpolates. Hence, if we have a masked plot, make sure that PGFPlots jumps
-        # as well.
-        if "unbounded coords=jump" not in data["current axes"].axis_options:
-            data["current axes"].axis_options.append("unbounded coords=jump")
 
-    plot_table = [
-        f"{x:{xformat}}{col_sep}{y:{ff}}{table_row_sep}" for x, y in zip(xdata, ydata)
-    ]
+    def plot_table():
+        # The table is formatted chunk by chunk to keep the memory bounded for long
+        # lines. The data of the line itself isn't touched.
+        for k in range(0, len(xdata), _chunk_size):
+            x = xdata[k : k + _chunk_size]
+            y = ydata[k : k + _chunk_size]
+            if len(ydata_mask) > 0:
+                y = np.where(ydata_mask[k : k + _chunk_size], np.nan, y)
+            if x_is_date:
+                x = mpl_dates2strings(x, data["date resolution"])
+            yield "".join(
+                f"{x:{xformat}}{col_sep}{y:{ff}}{table_row_sep}" for x, y in zip(x, y)
+            )
 
     min_extern_length = 3
 
     if data["externalize tables"] and len(xdata) >= min_extern_length:
         filepath, rel_filepath = _files.new_filepath(data, "table", ".dat")
-        with open(filepath, "w") as f:
+        with _files.open_external(data, filepath, rel_filepath) as f:
             # No encoding handling required: plot_table is only ASCII
-            f.write("".join(plot_table))
+            f.writelines(plot_table())
 
         if data["externals search path"] is not None:
             esp = data["externals search path"]
@@ -290,14 +371,12 @@ def _table(obj, data):  # noqa: C901
 
         opts_str = ("[" + ",".join(opts) + "] ") if len(opts) > 0 else ""
         posix_filepath = rel_filepath.as_posix()
-        content.append(f"table {{{opts_str}}}{{{posix_filepath}}};\n")
+        yield f"table {{{opts_str}}}{{{posix_filepath}}};\n"
     else:
         if len(opts) > 0:
             opts_str = ",".join(opts)
-            content.append(f"table [{opts_str}] {{%\n")
+            yield f"table [{opts_str}] {{%\n"
         else:
-            content.append("table {%\n")
-        content.extend(plot_table)
-        content.append("};\n")
-
-    return content, axis_options
+            yield "table {%\n"
+        yield from plot_table()
+        yield "};\n"
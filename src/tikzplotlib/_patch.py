@@ -41,18 +41,14 @@ def draw_patch(data, obj):
         return _draw_polygon(data, obj, draw_options)
 
 
-def _is_in_legend(obj):
-    label = obj.get_label()
-    leg = obj.axes.get_legend()
-    if leg is None:
-        return False
-    return label in [txt.get_text() for txt in leg.get_texts()]
+def _is_in_legend(data, obj):
+    return obj.get_label() in data["legend index"]["label texts"]
 
 
-def _patch_legend(obj, draw_options, legend_type):
+def _patch_legend(data, obj, draw_options, legend_type):
     """Decorator for handling legend of mpl.Patch"""
     legend = ""
-    if _is_in_legend(obj):
+    if _is_in_legend(data, obj):
         # Unfortunately, patch legend entries need \addlegendimage in Pgfplots.
         do = ", ".join([legend_type] + draw_options) if draw_options else ""
         label = obj.get_label()
@@ -96,7 +92,7 @@ def draw_patchcollection(data, obj):
         content.append(cont)
 
     legend_type = "area legend" if is_area else "line legend"
-    legend = _patch_legend(obj, draw_options, legend_type) or "\n"
+    legend = _patch_legend(data, obj, draw_options, legend_type) or "\n"
     content.append(legend)
 
     return data, content
@@ -107,7 +103,7 @@ def _draw_polygon(data, obj, draw_options):
         data, obj.get_path(), draw_options=draw_options
     )
     legend_type = "area legend" if is_area else "line legend"
-    content += _patch_legend(obj, draw_options, legend_type)
+    content += _patch_legend(data, obj, draw_options, legend_type)
 
     return data, content
 
@@ -124,12 +120,7 @@ def _draw_rectangle(data, obj, draw_options):
 
     # Get actual label, bar charts by default only give rectangles labels of
     # "_nolegend_". See <https://stackoverflow.com/q/35881290/353337>.
-    handles, labels = obj.axes.get_legend_handles_labels()
-    labelsFound = [
-        label for h, label in zip(handles, labels) if obj in h.get_children()
-    ]
-    if len(labelsFound) == 1:
-        label = labelsFound[0]
+    label = data["legend index"]["handle labels"].get(id(obj), label)
 
     left_lower_x = obj.get_x()
     left_lower_y = obj.get_y()
@@ -168,7 +159,7 @@ def _draw_ellipse(data, obj, draw_options):
         f"\\draw[{do}] (axis cs:{x:{ff}},{y:{ff}}) ellipse "
         f"({0.5 * obj.width:{ff}} and {0.5 * obj.height:{ff}});\n"
     )
-    content += _patch_legend(obj, draw_options, "area legend")
+    content += _patch_legend(data, obj, draw_options, "area legend")
 
     return data, content
 
@@ -181,7 +172,7 @@ def _draw_circle(data, obj, draw_options):
     content = (
         f"\\draw[{do}] (axis cs:{x:{ff}},{y:{ff}}) circle ({obj.get_radius():{ff}});\n"
     )
-    content += _patch_legend(obj, draw_options, "area legend")
+    content += _patch_legend(data, obj, draw_options, "area legend")
     return data, content
 
 
@@ -199,5 +190,5 @@ def _draw_fancy_arrow(data, obj, draw_options):
         data, content, _, _ = mypath.draw_path(
             data, obj._path_original, draw_options=draw_options + style
         )
-    content += _patch_legend(obj, draw_options, "line legend")
+    content += _patch_legend(data, obj, draw_options, "line legend")
     return data, content
@@ -1,13 +1,18 @@
 import matplotlib as mpl
 import numpy as np
-from matplotlib.dates import DateConverter, num2date
 from matplotlib.markers import MarkerStyle
 
 from . import _color, _files
 from ._axes import _mpl_cmap2pgf_cmap
 from ._hatches import _mpl_hatch2pgfp_pattern
 from ._markers import _mpl_marker2pgfp_marker
-from ._util import get_legend_text, has_legend
+from ._util import (
+    get_legend_text,
+    has_legend,
+    is_date_axis,
+    mpl_dates2strings,
+    set_date_coordinates,
+)
 
 
 def draw_path(data, path, draw_options=None, simplify=None):
@@ -22,10 +27,7 @@ def draw_path(data, path, draw_options=None, simplify=None):
     ):
         return data, "", None, False
 
-    x_is_date = isinstance(data["current mpl axes obj"].xaxis.converter, DateConverter)
-    nodes = []
-    ff = data["float format"]
-    xformat = "" if x_is_date else ff
+    segments = []
     prev = None
     is_area = None
     for vert, code in path.iter_segments(simplify=simplify):
@@ -40,14 +42,8 @@ def draw_path(data, path, draw_options=None, simplify=None):
         #
         # if code == mpl.path.Path.STOP: pass
         is_area = False
-        if code == mpl.path.Path.MOVETO:
-            if x_is_date:
-                vert = [num2date(vert[0]), vert[1]]
-            nodes.append(f"(axis cs:{vert[0]:{xformat}},{vert[1]:{ff}})")
-        elif code == mpl.path.Path.LINETO:
-            if x_is_date:
-                vert = [num2date(vert[0]), vert[1]]
-            nodes.append(f"--(axis cs:{vert[0]:{xformat}},{vert[1]:{ff}})")
+        if code in [mpl.path.Path.MOVETO, mpl.path.Path.LINETO]:
+            points = [vert[0:2]]
         elif code == mpl.path.Path.CURVE3:
             # Quadratic Bezier curves aren't natively supported in TikZ, but
             # can be emulated as cubic Beziers.
@@ -70,47 +66,77 @@ def draw_path(data, path, draw_options=None, simplify=None):
             Q1 = 1.0 / 3.0 * prev + 2.0 / 3.0 * vert[0:2]
             Q2 = 2.0 / 3.0 * vert[0:2] + 1.0 / 3.0 * vert[2:4]
             Q3 = vert[2:4]
-            if x_is_date:
-                Q1 = [num2date(Q1[0]), Q1[1]]
-                Q2 = [num2date(Q2[0]), Q2[1]]
-                Q3 = [num2date(Q3[0]), Q3[1]]
-            nodes.append(
-                ".. controls "
-                f"(axis cs:{Q1[0]:{xformat}},{Q1[1]:{ff}}) and "
-                f"(axis cs:{Q2[0]:{xformat}},{Q2[1]:{ff}}) .. "
-                f"(axis cs:{Q3[0]:{xformat}},{Q3[1]:{ff}})"
-            )
+            points = [Q1, Q2, Q3]
         elif code == mpl.path.Path.CURVE4:
             # Cubic Bezier curves.
-            if x_is_date:
-                vert = [
-                    num2date(vert[0]),
-                    vert[1],
-                    num2date(vert[2]),
-                    vert[3],
-                    num2date(vert[4]),
-                    vert[5],
-                ]
-            nodes.append(
-                ".. controls "
-                f"(axis cs:{vert[0]:{xformat}},{vert[1]:{ff}}) and "
-                f"(axis cs:{vert[2]:{xformat}},{vert[3]:{ff}}) .. "
-                f"(axis cs:{vert[4]:{xformat}},{vert[5]:{ff}})"
-            )
+            points = [vert[0:2], vert[2:4], vert[4:6]]
         else:
             assert code == mpl.path.Path.CLOSEPOLY
-            nodes.append("--cycle")
+            points = []
             is_area = True
+        segments.append((code, points))
 
         # Store the previous point for quadratic Beziers.
         prev = vert[0:2]
 
+    # Format all coordinates at once; converting dates one by one is slow.
+    ff = data["float format"]
+    xy = np.array([point for _, points in segments for point in points]).reshape(-1, 2)
+    if is_date_axis(data["current mpl axes obj"].xaxis):
+        set_date_coordinates(data)
+        xstrings = mpl_dates2strings(xy[:, 0], data["date resolution"])
+    else:
+        xstrings = [f"{x:{ff}}" for x in xy[:, 0]]
+    coords = iter(f"(axis cs:{x},{y:{ff}})" for x, y in zip(xstrings, xy[:, 1]))
+
+    nodes = []
+    for code, points in segments:
+        if code == mpl.path.Path.MOVETO:
+            nodes.append(next(coords))
+        elif code == mpl.path.Path.LINETO:
+            nodes.append("--" + next(coords))
+        elif code in [mpl.path.Path.CURVE3, mpl.path.Path.CURVE4]:
+            c0, c1, c2 = next(coords), next(coords), next(coords)
+            nodes.append(f".. controls {c0} and {c1} .. {c2}")
+        else:
+            nodes.append("--cycle")
+
     do = "[{}]".format(", ".join(draw_options)) if draw_options else ""
     path_command = "\\path {}\n{};\n".format(do, "\n".join(nodes))
 
     return data, path_command, draw_options, is_area
 
 
+# Above this number of different colors, scatter points are colored individually.
+_max_scatter_classes = 256
+
+
+def is_data_path_collection(obj):
+    """Whether the path collection `obj` holds paths in data coordinates, like the
+    contour levels of matplotlib before 3.8, instead of the markers of a scatter plot.
+    """
+    return (
+        isinstance(obj, mpl.collections.PathCollection)
+        and obj.axes is not None
+        and obj.get_transform() == obj.axes.transData
+        and len(obj.get_sizes()) == 0
+    )
+
+
+def _get_scatter_classes(columns):
+    """Returns the unique rows of the per-point `columns` and the class index of every
+    point, or ``None`` if there are no columns or too many classes.
+    """
+    if not columns:
+        return None
+    unique_rows, class_indices = np.unique(
+        np.column_stack(columns), axis=0, return_inverse=True
+    )
+    if len(unique_rows) > _max_scatter_classes:
+        return None
+    return unique_rows, class_indices
+
+
 def draw_pathcollection(data, obj):
     """Returns PGFPlots code for a number of patch objects."""
     content = []
@@ -126,6 +152,8 @@ def draw_pathcollection(data, obj):
     table_options = []
 
     is_filled = False
+    # colors of the points, if they differ
+    per_point_colors = {}
 
     if obj.get_array() is not None:
         dd_strings = np.column_stack([dd_strings, obj.get_array()])
@@ -140,12 +168,10 @@ def draw_pathcollection(data, obj):
             mycolormap, is_custom_cmap = _mpl_cmap2pgf_cmap(obj.get_cmap(), data)
             draw_options.append("scatter")
             draw_options.append(
-                "colormap" + ("=" if is_custom_cmap else "/") + mycolormap
+                "colormap" + (" name=" if is_custom_cmap else "/") + mycolormap
             )
     else:
         # gather the draw options
-        add_individual_color_code = False
-
         try:
             ec = obj.get_edgecolors()
         except TypeError:
@@ -157,13 +183,7 @@ def draw_pathcollection(data, obj):
                 ec = ec[0]
             else:
                 assert len(ec) == len(dd)
-                labels.append("draw")
-                ec_strings = [
-                    ",".join(fmt.format(item) for item in row)
-                    for row in ec[:, :3] * 255
-                ]
-                dd_strings = np.column_stack([dd_strings, ec_strings])
-                add_individual_color_code = True
+                per_point_colors["draw"] = ec[:, :3]
                 ec = None
 
         try:
@@ -178,13 +198,7 @@ def draw_pathcollection(data, obj):
                 is_filled = True
             else:
                 assert len(fc) == len(dd)
-                labels.append("fill")
-                fc_strings = [
-                    ",".join(fmt.format(item) for item in row)
-                    for row in fc[:, :3] * 255
-                ]
-                dd_strings = np.column_stack([dd_strings, fc_strings])
-                add_individual_color_code = True
+                per_point_colors["fill"] = fc[:, :3]
                 fc = None
                 is_filled = True
 
@@ -193,23 +207,6 @@ def draw_pathcollection(data, obj):
         except (TypeError, IndexError):
             ls = None
 
-        if add_individual_color_code:
-            draw_options.extend(
-                [
-                    "scatter",
-                    "visualization depends on={value \\thisrow{draw} \\as \\drawcolor}",
-                    "visualization depends on={value \\thisrow{fill} \\as \\fillcolor}",
-                    "scatter/@pre marker code/.code={%\n"
-                    + "  \\expanded{%\n"
-                    + "  \\noexpand\\definecolor{thispointdrawcolor}{RGB}{\\drawcolor}%\n"
-                    + "  \\noexpand\\definecolor{thispointfillcolor}{RGB}{\\fillcolor}%\n"
-                    + "  }%\n"
-                    + "  \\scope[draw=thispointdrawcolor, fill=thispointfillcolor]%\n"
-                    + "}",
-                    "scatter/@post marker code/.code={%\n  \\endscope\n}",
-                ]
-            )
-
         # "solution" from
         # <https://github.com/matplotlib/matplotlib/issues/4672#issuecomment-378702670>
         marker0 = None
@@ -233,6 +230,98 @@ def draw_pathcollection(data, obj):
     if is_contour:
         draw_options = ["draw=none"]
 
+    radii = None
+    if not is_contour and len(obj.get_sizes()) == len(dd):
+        # See Pgfplots manual, chapter 4.25.
+        # In Pgfplots, \mark size specifies radii, in matplotlib circle areas.
+        radii = np.sqrt(obj.get_sizes() / np.pi)
+        tol = data["marker size tolerance"]
+        if tol:
+            radii = np.round(radii / tol) * tol
+
+    # Points of the same colors and sizes form a class which is styled only once.
+    # Styling every point in TeX is slow. The sizes can't be part of the classes if
+    # the colors come from a colormap.
+    sizes_in_classes = radii is not None and obj.get_array() is None
+    class_columns = list(per_point_colors.values())
+    classes = _get_scatter_classes(
+        class_columns + ([radii[:, None]] if sizes_in_classes else [])
+    )
+    if classes is None and sizes_in_classes:
+        # too many different sizes, keep them per point
+        sizes_in_classes = False
+        classes = _get_scatter_classes(class_columns)
+
+    class_styles = []
+    if classes is not None:
+        unique_rows, class_indices = classes
+        for row in unique_rows:
+            style = []
+            for k, key in enumerate(per_point_colors):
+                data, col, _ = _color.mpl_color2xcolor(data, row[3 * k : 3 * k + 3])
+                style.append(f"{key}={col}")
+            if sizes_in_classes:
+                style.append(f"mark size={row[-1]:{data['float format']}}")
+            class_styles.append(style)
+        labels.append("class")
+        dd_strings = np.column_stack(
+            [dd_strings, np.char.add("c", class_indices.astype(str))]
+        )
+        table_options.extend(["x=x", "y=y", "meta=class"])
+        draw_options.extend(["scatter", "scatter src=explicit symbolic"])
+    elif per_point_colors:
+        for key, colors in per_point_colors.items():
+            labels.append(key)
+            color_strings = [
+                ",".join(fmt.format(item) for item in row) for row in colors * 255
+            ]
+            dd_strings = np.column_stack([dd_strings, color_strings])
+        draw_options.extend(
+            [
+                "scatter",
+                "visualization depends on={value \\thisrow{draw} \\as \\drawcolor}",
+                "visualization depends on={value \\thisrow{fill} \\as \\fillcolor}",
+                "scatter/@pre marker code/.code={%\n"
+                + "  \\expanded{%\n"
+                + "  \\noexpand\\definecolor{thispointdrawcolor}{RGB}{\\drawcolor}%\n"
+                + "  \\noexpand\\definecolor{thispointfillcolor}{RGB}{\\fillcolor}%\n"
+                + "  }%\n"
+                + "  \\scope[draw=thispointdrawcolor, fill=thispointfillcolor]%\n"
+                + "}",
+                "scatter/@post marker code/.code={%\n  \\endscope\n}",
+            ]
+        )
+
+    if radii is not None and not sizes_in_classes:
+        dd_strings = np.column_stack([dd_strings, radii])
+        labels.append("sizedata")
+        draw_options.extend(
+            [
+                "visualization depends on="
+                + "{\\thisrow{sizedata} \\as\\perpointmarksize}",
+                "scatter",
+            ]
+        )
+        if class_styles:
+            # scatter/classes replace the pre marker code
+            class_styles = [
+                style + ["mark size=\\perpointmarksize"] for style in class_styles
+            ]
+        else:
+            draw_options.append(
+                "scatter/@pre marker code/.append style="
+                + "{/tikz/mark size=\\perpointmarksize}"
+            )
+
+    if class_styles:
+        draw_options.append(
+            "scatter/classes={\n  "
+            + ",\n  ".join(
+                f"c{k}={{{','.join(style)}}}" for k, style in enumerate(class_styles)
+            )
+            + "\n}"
+        )
+
     if marker0 is not None:
         data, pgfplots_marker, marker_options = _mpl_marker2pgfp_marker(
             data, marker0, is_filled
@@ -245,7 +334,7 @@ def draw_pathcollection(data, obj):
     data, extra_draw_options = get_draw_options(data, obj, ec, fc, ls, None)
     draw_options += extra_draw_options
 
-    legend_text = get_legend_text(obj)
+    legend_text = get_legend_text(data, obj)
     if legend_text is None and has_legend(obj.axes):
         draw_options.append("forget plot")
 
@@ -258,30 +347,12 @@ def draw_pathcollection(data, obj):
                 if path.codes is not None
                 else np.array([1] + [2] * (len(dd) - 1))
             )
+            # An empty line between the segments triggers "move to" in pgfplots
             dd_strings = []
-            for row, code in zip(dd, codes):
-                if code == 1:  # MOVETO
-                    # Inserts a newline to trigger "move to" in pgfplots
-                    dd_strings.append([])
-                dd_strings.append([fmt.format(val) for val in row])
-            dd_strings = np.array(dd_strings[1:], dtype=object)
-
-        if len(obj.get_sizes()) == len(dd):
-            # See Pgfplots manual, chapter 4.25.
-            # In Pgfplots, \mark size specifies radii, in matplotlib circle areas.
-            radii = np.sqrt(obj.get_sizes() / np.pi)
-            dd_strings = np.column_stack([dd_strings, radii])
-            labels.append("sizedata")
-            draw_options.extend(
-                [
-                    "visualization depends on="
-                    + "{\\thisrow{sizedata} \\as\\perpointmarksize}",
-                    "scatter",
-                    "scatter/@pre marker code/.append style="
-                    + "{/tikz/mark size=\\perpointmarksize}",
-                    # "scatter/@post marker code/.style={}"
-                ]
-            )
+            for segment in np.split(dd, np.flatnonzero(codes[1:] == 1) + 1):
+                dd_strings.append([])
+                dd_strings += [[fmt.format(val) for val in row] for row in segment]
+            dd_strings = dd_strings[1:]
 
         # remove duplicates
         draw_options = sorted(list(set(draw_options)))
@@ -308,7 +379,7 @@ def draw_pathcollection(data, obj):
 
         if data["externalize tables"]:
             filepath, rel_filepath = _files.new_filepath(data, "table", ".dat")
-            with open(filepath, "w") as f:
+            with _files.open_external(data, filepath, rel_filepath) as f:
                 # No encoding handling required: plot_table is only ASCII
                 f.write("".join(plot_table))
             content.append(str(rel_filepath))
@@ -0,0 +1,125 @@
+import numpy as np
+from matplotlib.backend_bases import RendererBase
+
+from . import _color, _files
+from ._axes import _mpl_cmap2pgf_cmap
+from ._util import get_legend_text, has_legend
+
+
+def _get_arrows(obj):
+    """Returns the tails of the arrows and the vectors to their tips, both in data
+    coordinates, as matplotlib would draw them, and the mask of the drawn arrows.
+    """
+    # The arrows are given in arrow width units. Pending autoscaling of the limits is
+    # done by getting them.
+    obj.axes.get_xlim()
+    verts = _get_arrow_polygons(obj)
+    to_display = obj.get_transform()
+    tip = to_display.transform(verts[:, 3])
+    # The tail is the middle of the end of the shaft.
+    tail = to_display.transform(0.5 * (verts[:, 0] + verts[:, 6]))
+
+    # relative to the anchor points, which is exact for arrows starting there
+    offsets = obj.get_offsets()
+    offsets_display = obj.get_offset_transform().transform(offsets)
+    to_data = obj.axes.transData.inverted()
+    anchors = to_data.transform(offsets_display)
+    tail_data = offsets + (to_data.transform(offsets_display + tail) - anchors)
+    tip_data = offsets + (to_data.transform(offsets_display + tip) - anchors)
+
+    # masked U or V are filled in, Umask has the mask of both
+    mask = ~np.asarray(obj.Umask, dtype=bool)
+    mask = mask & np.all(np.isfinite(tail_data), axis=1)
+    mask &= np.all(np.isfinite(tip_data), axis=1)
+    return tail_data, tip_data - tail_data, mask
+
+
+def _get_arrow_polygons(obj):
+    try:
+        # What matplotlib does before drawing. The signature of the private
+        # _make_verts differs between matplotlib versions.
+        obj._init()
+        verts = obj._make_verts(obj.U, obj.V, obj.angles)
+    except (AttributeError, TypeError):
+        # Let matplotlib set up the polygons by drawing the quiver, which also
+        # autoscales its norm.
+        stale = obj.stale
+        obj.draw(_NullRenderer())
+        obj.stale = stale
+        return np.array([path.vertices for path in obj.get_paths()])
+    return np.ma.getdata(verts)
+
+
+class _NullRenderer(RendererBase):
+    """A renderer which doesn't draw anything."""
+
+    def draw_path(self, *args, **kwargs):
+        pass
+
+    def draw_markers(self, *args, **kwargs):
+        pass
+
+    def draw_path_collection(self, *args, **kwargs):
+        pass
+
+
+def draw_quiver(data, obj):
+    """Returns the PGFPlots code for a quiver plot: One table with the tails of the
+    arrows and their vectors.
+    """
+    content = []
+    ff = data["float format"]
+
+    tails, vectors, mask = _get_arrows(obj)
+    columns = [tails[mask, 0], tails[mask, 1], vectors[mask, 0], vectors[mask, 1]]
+    labels = ["x", "y", "u", "v"]
+
+    quiver_options = ["u=\\thisrow{u}", "v=\\thisrow{v}"]
+    draw_options = ["-stealth"]
+    if obj.get_array() is not None:
+        # colors by the colormap
+        columns.append(np.ma.getdata(obj.get_array()).ravel()[mask])
+        labels.append("c")
+        quiver_options.append("colored=mapped color")
+        mycolormap, is_custom_cmap = _mpl_cmap2pgf_cmap(obj.get_cmap(), data)
+        draw_options += [
+            "point meta=\\thisrow{c}",
+            "colormap" + (" name=" if is_custom_cmap else "/") + mycolormap,
+        ]
+        vmin, vmax = obj.get_clim()
+        if vmin is not None and vmax is not None:
+            draw_options += [
+                f"point meta min={vmin:{ff}}",
+                f"point meta max={vmax:{ff}}",
+            ]
+    else:
+        data, col, _ = _color.mpl_color2xcolor(data, obj.get_facecolor()[0])
+        draw_options.append(f"color={col}")
+
+    draw_options.insert(0, "quiver={{{}}}".format(",".join(quiver_options)))
+
+    legend_text = get_legend_text(data, obj)
+    if legend_text is None and has_legend(obj.axes):
+        draw_options.append("forget plot")
+
+    content.append("\\addplot [{}]\n".format(", ".join(draw_options)))
+
+    plot_table = [" ".join(labels) + "\n"] + [
+        " ".join(f"{val:{ff}}" for val in row) + "\n"
+        for row in np.column_stack(columns)
+    ]
+    if data["externalize tables"]:
+        filepath, rel_filepath = _files.new_filepath(data, "table", ".dat")
+        with _files.open_external(data, filepath, rel_filepath) as f:
+            # No encoding handling required: plot_table is only ASCII
+            f.writelines(plot_table)
+        content.append(f"table {{{rel_filepath.as_posix()}}};\n")
+    else:
+        content.append("table {%\n")
+        content.extend(plot_table)
+        content.append("};\n")
+
+    if legend_text is not None:
+        content.append(f"\\addlegendentry{{{legend_text}}}\n")
+
+    return data, content
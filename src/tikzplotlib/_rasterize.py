@@ -0,0 +1,212 @@
+import matplotlib as mpl
+from PIL import Image
+
+from . import _files
+
+
+def is_rasterized(data, obj):
+    """Check if the artist is to be rendered to an image instead of vector code:
+    quad meshes, artists marked with set_rasterized(True), and artists with more
+    points than the rasterize threshold.
+    """
+    if obj.axes is None or not isinstance(
+        obj, (mpl.lines.Line2D, mpl.patches.Patch, mpl.collections.Collection)
+    ):
+        return False
+    if isinstance(obj, mpl.collections.QuadMesh) or obj.get_rasterized():
+        return True
+    threshold = data["rasterize threshold"]
+    return threshold is not None and _get_num_points(obj) > threshold
+
+
+def _get_num_points(obj):
+    if isinstance(obj, mpl.lines.Line2D):
+        return len(obj.get_xydata())
+    if isinstance(obj, mpl.collections.Collection):
+        num_vertices = sum(len(path.vertices) for path in obj.get_paths())
+        return max(len(obj.get_offsets()), num_vertices)
+    if isinstance(obj, mpl.patches.Patch):
+        return len(obj.get_path().vertices)
+    return 0
+
+
+def draw_rasterized(data, obj):
+    """Returns the PGFPlots code for an graphics environment holding a
+    rendering of the object.
+    """
+    content = []
+
+    # Generate file name for current object
+    filepath, rel_filepath = _files.new_filepath(data, "img", ".png")
+
+    # Render the object and save as png file
+    from matplotlib.backends.backend_agg import RendererAgg
+
+    # The figure is rendered at the dpi of the export without changing the dpi of
+    # the figure itself: everything in display coordinates is scaled on the way to
+    # the renderer.
+    dpi = data["dpi"]
+    scale = mpl.transforms.Affine2D().scale(dpi / obj.figure.dpi)
+
+    # Only keep what is inside of the axes box; axes, ticks and labels remain vector
+    # graphics.
+    cbox = mpl.transforms.TransformedBbox(obj.axes.bbox, scale)
+    width = int(round(cbox.extents[2]))
+    height = int(round(cbox.extents[3]))
+    ren = RendererAgg(width, height, dpi)
+    obj.draw(_ScaledRenderer(ren, scale))
+
+    # Generate a image from the render buffer
+    image = Image.frombuffer(
+        "RGBA", ren.get_canvas_width_height(), ren.buffer_rgba(), "raw", "RGBA", 0, 1
+    )
+    # Crop the image to the actual content (removing the the regions otherwise
+    # used for axes, etc.)
+    # 'image.crop' expects the crop box to specify the left, upper, right, and
+    # lower pixel. 'cbox.extents' gives the left, lower, right, and upper
+    # pixel.
+    box = (
+        int(round(cbox.extents[0])),
+        0,
+        int(round(cbox.extents[2])),
+        int(round(cbox.extents[3] - cbox.extents[1])),
+    )
+    cropped = image.crop(box)
+    with _files.open_external(data, filepath, rel_filepath, "wb") as f:
+        cropped.save(f, format="png")
+
+    # write the corresponding information to the TikZ file
+    extent = obj.axes.get_xlim() + obj.axes.get_ylim()
+
+    # Explicitly use \pgfimage as includegrapics command, as the default
+    # \includegraphics fails unexpectedly in some cases
+    ff = data["float format"]
+    posix_filepath = rel_filepath.as_posix()
+    content.append(
+        "\\addplot graphics [includegraphics cmd=\\pgfimage,"
+        f"xmin={extent[0]:{ff}}, xmax={extent[1]:{ff}}, "
+        f"ymin={extent[2]:{ff}}, ymax={extent[3]:{ff}}] {{{posix_filepath}}};\n"
+    )
+
+    return data, content
+
+
+class _ScaledRenderer:
+    """Wraps a renderer such that all display coordinates get transformed by `scale`
+    before they are drawn.
+    """
+
+    def __init__(self, renderer, scale):
+        self._renderer = renderer
+        self._scale = scale
+        self._factor = scale.get_matrix()[0, 0]
+
+    def __getattr__(self, name):
+        return getattr(self._renderer, name)
+
+    def _scale_gc(self, gc):
+        cliprect = gc.get_clip_rectangle()
+        if cliprect is not None:
+            gc.set_clip_rectangle(
+                mpl.transforms.TransformedBbox(cliprect, self._scale).frozen()
+            )
+        clippath, clippath_trans = gc.get_clip_path()
+        if clippath is not None:
+            gc.set_clip_path(
+                mpl.transforms.TransformedPath(clippath, clippath_trans + self._scale)
+            )
+        return gc
+
+    def draw_path(self, gc, path, transform, rgbFace=None):
+        self._renderer.draw_path(
+            self._scale_gc(gc), path, transform + self._scale, rgbFace
+        )
+
+    def draw_markers(self, gc, marker_path, marker_trans, path, trans, rgbFace=None):
+        # The markers are sized by the renderer's points_to_pixels already.
+        self._renderer.draw_markers(
+            self._scale_gc(gc),
+            marker_path,
+            marker_trans,
+            path,
+            trans + self._scale,
+            rgbFace,
+        )
+
+    def draw_path_collection(
+        self, gc, master_transform, paths, all_transforms, offsets, offsetTrans, *args
+    ):
+        self._renderer.draw_path_collection(
+            self._scale_gc(gc),
+            master_transform + self._scale,
+            paths,
+            all_transforms,
+            offsets,
+            offsetTrans + self._scale,
+            *args,
+        )
+
+    def draw_quad_mesh(
+        self,
+        gc,
+        master_transform,
+        meshWidth,
+        meshHeight,
+        coordinates,
+        offsets,
+        offsetTrans,
+        *args,
+    ):
+        self._renderer.draw_quad_mesh(
+            self._scale_gc(gc),
+            master_transform + self._scale,
+            meshWidth,
+            meshHeight,
+            coordinates,
+            offsets,
+            offsetTrans + self._scale,
+            *args,
+        )
+
+    def draw_gouraud_triangle(self, gc, points, colors, transform):
+        self._renderer.draw_gouraud_triangle(
+            self._scale_gc(gc), points, colors, transform + self._scale
+        )
+
+    def draw_gouraud_triangles(self, gc, triangles_array, colors_array, transform):
+        self._renderer.draw_gouraud_triangles(
+            self._scale_gc(gc), triangles_array, colors_array, transform + self._scale
+        )
+
+    def get_image_magnification(self):
+        # Images are resampled to the size they take up in the rendering.
+        return self._factor * self._renderer.get_image_magnification()
+
+    def draw_image(self, gc, x, y, im, transform=None):
+        if transform is None:
+            # Agg doesn't take a transform at all.
+            x, y = self._scale.transform((x, y))
+            self._renderer.draw_image(self._scale_gc(gc), x, y, im)
+        else:
+            self._renderer.draw_image(
+                self._scale_gc(gc), x, y, im, transform + self._scale
+            )
+
+    def get_canvas_width_height(self):
+        # Text is flipped in the display coordinates of the figure.
+        width, height = self._renderer.get_canvas_width_height()
+        return width / self._factor, height / self._factor
+
+    def get_text_width_height_descent(self, s, prop, ismath):
+        # Text is laid out in the display coordinates of the figure, with the
+        # position of every line added to the unscaled anchor.
+        width, height, descent = self._renderer.get_text_width_height_descent(
+            s, prop, ismath
+        )
+        return width / self._factor, height / self._factor, descent / self._factor
+
+    def draw_text(self, gc, x, y, s, prop, angle, *args, **kwargs):
+        x, y = self._scale.transform((x, y))
+        self._renderer.draw_text(
+            self._scale_gc(gc), x, y, s, prop, angle, *args, **kwargs
+        )
@@ -1,18 +1,25 @@
 from __future__ import annotations
 
 import enum
-import tempfile
 import warnings
 from pathlib import Path
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 
-from . import _axes
+from . import _axes, _cache, _contour, _cull
 from . import _image as img
-from . import _legend, _line2d, _patch, _path
-from . import _quadmesh as qmsh
-from . import _text
+from . import (
+    _legend,
+    _line2d,
+    _patch,
+    _path,
+    _quiver,
+    _rasterize,
+    _surface,
+    _text,
+    _util,
+)
 from .__about__ import __version__
 
 
@@ -40,6 +47,15 @@ def get_tikz_code(
     float_format: str = ".15g",
     table_row_sep: str = "\n",
     flavor: str = "latex",
+    date_resolution: str = "m",
+    cache: dict | None = None,
+    share_axis_options: bool = False,
+    rasterize_threshold: int | None = None,
+    marker_size_tolerance: float | None = None,
+    externals: dict | None = None,
+    image_dpi: int | None = None,
+    max_image_pixels: int | None = None,
+    cull: bool = False,
 ):
     """Main function. Here, the recursion into the image starts and the
     contents are picked up. The actual file gets written in this routine.
@@ -126,6 +142,9 @@ def get_tikz_code(
     :type standalone: bool
 
     :param float_format: Format for float entities. Default is ```".15g"```.
+                         If ``"auto"``, the number of significant digits is derived
+                         per axes from its limits and size such that the output is
+                         indistinguishable at 600 PPI.
     :type float_format: str
 
     :param table_row_sep: Row separator for table data. Default is ```"\\n"```.
@@ -136,6 +155,56 @@ def get_tikz_code(
                    Default is ``"latex"``.
     :type flavor: str
 
+    :param date_resolution: Resolution of date coordinates, given as NumPy datetime
+                            unit. Supported are ``"D"`` (days), ``"m"`` (minutes)
+                            and ``"s"`` (seconds). Default is ``"m"``.
+    :type date_resolution: str
+
+    :param cache: If not ``None``, a dictionary in which the code of every axes is
+                  stored. Pass the same dictionary to later exports of the figure to
+                  reuse the code of axes which didn't change in the meantime.
+                  Default is ``None``.
+    :type cache: dict
+
+    :param share_axis_options: If ``True``, options common to all axes are collected
+                               in the style ``tikzplotlib/axis common``, which is
+                               defined once and used by every axis.
+                               Default is ``False``.
+    :type share_axis_options: bool
+
+    :param rasterize_threshold: If not ``None``, lines, patches and collections with
+                                more points than this are rendered to a PNG file,
+                                just like artists with ``set_rasterized(True)``.
+                                Default is ``None``.
+    :type rasterize_threshold: int
+
+    :param marker_size_tolerance: If not ``None``, the marker sizes (radii in pt) of
+                                  scatter plots are rounded to multiples of this
+                                  before points of equal size are grouped.
+                                  Default is ``None``.
+    :type marker_size_tolerance: float
+
+    :param externals: If not ``None``, external files like images and tables aren't
+                      written to disk, but stored in this dictionary as
+                      ``{relative path: bytes}``. See also `get_tikz_bundle()`.
+                      Default is ``None``.
+    :type externals: dict
+
+    :param image_dpi: If not ``None``, images with more pixels than needed for this
+                      resolution at the size they take up in the figure are
+                      downsampled. Default is ``None``.
+    :type image_dpi: int
+
+    :param max_image_pixels: If not ``None``, images with more pixels than this are
+                             downsampled. Default is ``None``.
+    :type max_image_pixels: int
+
+    :param cull: Whether to leave out invisible artists and those outside of the view
+                 of their axes, and the points of lines far outside of it. Keep it
+                 off to widen the axis limits in the TeX file later.
+                 Default is ``False``.
+    :type cull: bool
+
     :returns: None
 
     The following optional attributes of matplotlib's objects are recognized
@@ -164,15 +233,17 @@ def get_tikz_code(
         data["output dir"] = filepath.parent
         data["base name"] = filepath.stem
     else:
-        directory = tempfile.mkdtemp()
-        data["output dir"] = Path(directory)
+        # a temporary directory is created once a file is written
+        data["output dir"] = None
         data["base name"] = "tmp"
+    data["externals"] = externals
 
     data["strict"] = strict
     data["tikz libs"] = set()
     data["pgfplots libs"] = set()
     data["font size"] = textsize
     data["custom colors"] = {}
+    data["custom colormaps"] = {}
     data["legend colors"] = []
     data["add axis environment"] = add_axis_environment
     data["show_info"] = show_info
@@ -194,9 +265,25 @@ def get_tikz_code(
             savefig_dpi if isinstance(savefig_dpi, int) else mpl.rcParams["figure.dpi"]
         )
 
-    data["float format"] = float_format
+    data["float format [base]"] = float_format
+    data["float format"] = ".15g" if float_format == "auto" else float_format
     data["table_row_sep"] = table_row_sep
 
+    if date_resolution not in ["D", "m", "s"]:
+        raise ValueError(
+            f"Unsupported date resolution {date_resolution!r}. "
+            "Please choose from 'D', 'm', 's'"
+        )
+    data["date resolution"] = date_resolution
+    data["cache"] = cache
+    data["rasterize threshold"] = rasterize_threshold
+    data["marker size tolerance"] = marker_size_tolerance
+    data["image dpi"] = image_dpi
+    data["max image pixels"] = max_image_pixels
+    data["cull"] = cull
+    data["axis options blocks"] = []
+    data["legend index"] = _util.get_legend_index(None)
+
     try:
         data["flavor"] = Flavors[flavor.lower()]
     except KeyError:
@@ -205,6 +292,9 @@ def get_tikz_code(
             f"Please choose from {', '.join(map(repr, Flavors))}"
         )
 
+    # Gather the structure of the figure (colorbars, subplots, legends) once.
+    data["figure index"] = _axes.get_figure_index(figure)
+
     # print message about necessary pgfplot libs to command line
     if show_info:
         _print_pgfplot_libs_message(data)
@@ -238,6 +328,15 @@ def get_tikz_code(
     if coldefs:
         code += "\n".join(coldefs) + "\n\n"
 
+    cmapdefs = _get_colormap_definitions(data)
+    if cmapdefs:
+        code += "\n".join(cmapdefs) + "\n\n"
+
+    if share_axis_options:
+        styledefs, content = _share_axis_options(data, content)
+        if styledefs:
+            code += "\n".join(styledefs) + "\n\n"
+
     code += "".join(content)
 
     if wrap and add_axis_environment:
@@ -264,6 +363,18 @@ def save(filepath: str | Path, *args, encoding: str | None = None, **kwargs):
         f.write(code)
 
 
+def get_tikz_bundle(*args, **kwargs):
+    """Same as `get_tikz_code()`, but the external files like images and tables are
+    returned along with the code instead of being written to disk.
+
+    :returns: (code, files) where files maps the paths of the external files, as used
+              in the code, to their content as bytes-like objects.
+    """
+    files = {}
+    code = get_tikz_code(*args, externals=files, **kwargs)
+    return code, files
+
+
 def _tex_comment(comment):
     """Prepends each line in string with the LaTeX comment key, '%'."""
     return "% " + str.replace(comment, "\n", "\n% ") + "\n"
@@ -280,6 +391,41 @@ def _get_color_definitions(data):
     ]
 
 
+def _get_colormap_definitions(data):
+    """Returns the list of custom colormap definitions for the TikZ file."""
+    return [
+        f"\\pgfplotsset{{colormap={{{name}}}{definition}}}"
+        for name, definition in data["custom colormaps"].items()
+    ]
+
+
+def _share_axis_options(data, content):
+    """Moves the options which all axes have in common into a style. Returns the
+    style definition and the content with the axis options replaced.
+    """
+    blocks = data["axis options blocks"]
+    if len(blocks) < 2:
+        return [], content
+
+    common = set.intersection(*[set(options) for _, options in blocks])
+    if not common:
+        return [], content
+
+    style = "tikzplotlib/axis common"
+    new_blocks = {}
+    for block, options in blocks:
+        options = [style] + [option for option in options if option not in common]
+        new_blocks[id(block)] = "[\n" + ",\n".join(options) + "\n]\n"
+    content = [new_blocks.get(id(item), item) for item in content]
+
+    # the options are sorted already
+    common = [option for option in blocks[0][1] if option in common]
+    styledefs = [
+        f"\\pgfplotsset{{{style}/.style={{\n  " + ",\n  ".join(common) + "\n}}"
+    ]
+    return styledefs, content
+
+
 def _print_pgfplot_libs_message(data):
     """Prints message to screen indicating the use of PGFPlots and its
     libraries."""
@@ -314,12 +460,24 @@ class _ContentManager:
 
 
 def _draw_collection(data, child):
+    grid = _surface.get_grid(child)
+    if grid is not None:
+        return _surface.draw_surface(data, child, grid)
+    if isinstance(child, mpl.quiver.Quiver):
+        return _quiver.draw_quiver(data, child)
+    if _contour.is_contour_lines(child):
+        result = _contour.draw_contourset(data, child)
+        if result is not None:
+            return result
+    if _contour.is_contour_level(child):
+        return _contour.draw_contour_level(data, child)
     if isinstance(child, mpl.collections.PathCollection):
+        if _path.is_data_path_collection(child) and len(child.get_facecolor()) == 0:
+            # unfilled paths of their own, not markers
+            return _patch.draw_patchcollection(data, child)
         return _path.draw_pathcollection(data, child)
     elif isinstance(child, mpl.collections.LineCollection):
         return _line2d.draw_linecollection(data, child)
-    elif isinstance(child, mpl.collections.QuadMesh):
-        return qmsh.draw_quadmesh(data, child)
     else:
         return _patch.draw_patchcollection(data, child)
 
@@ -335,10 +493,24 @@ def _recurse(data, obj):
         if isinstance(child, mpl.spines.Spine):
             continue
 
-        if isinstance(child, mpl.axes.Axes):
+        if data["cull"] and (
+            not child.get_visible() or _cull.is_out_of_view(data, child)
+        ):
+            continue
+
+        if _rasterize.is_rasterized(data, child):
+            data, cont = _rasterize.draw_rasterized(data, child)
+            content.extend(cont, child.get_zorder())
+        elif isinstance(child, mpl.axes.Axes):
+            # With float_format="auto", the precision is chosen per axes.
+            float_format = data["float format"]
+            if data["float format [base]"] == "auto":
+                data["float format"] = _axes.get_auto_float_format(child)
+
             ax = _axes.Axes(data, child)
 
             if ax.is_colorbar:
+                data["float format"] = float_format
                 continue
 
             # add extra axis options
@@ -347,14 +519,25 @@ def _recurse(data, obj):
 
             data["current mpl axes obj"] = child
             data["current axes"] = ax
+            data["legend index"] = _axes.get_axes_info(data, child)["legend index"]
 
             # Run through the child objects, gather the content.
-            data, children_content = _recurse(data, child)
+            if data["cache"] is None:
+                data, children_content = _recurse(data, child)
+            else:
+                data, children_content = _cache.recurse(data, child, ax, _recurse)
+            data["float format"] = float_format
 
             # populate content and add axis environment if desired
             if data["add axis environment"]:
+                begin_code = ax.get_begin_code()
+                if ax.axis_options:
+                    # remember the options block for _share_axis_options()
+                    data["axis options blocks"].append(
+                        (begin_code[-1], list(ax.axis_options))
+                    )
                 content.extend(
-                    ax.get_begin_code() + children_content + [ax.get_end_code(data)], 0
+                    begin_code + children_content + [ax.get_end_code(data)], 0
                 )
             else:
                 content.extend(children_content, 0)
@@ -0,0 +1,189 @@
+"""Surfaces and wireframes of 3D axes as native PGFPlots surf/mesh plots."""
+import numpy as np
+from mpl_toolkits.mplot3d import art3d
+
+from . import _color, _files
+from ._axes import _mpl_cmap2pgf_cmap
+from ._path import mpl_linewidth2pgfp_linewidth
+from ._util import get_legend_text, has_legend
+
+
+def get_grid(obj):
+    """Returns the structured grid (rows x cols x 3) the surface or wireframe `obj`
+    was created from, or ``None`` if there is none.
+    """
+    if isinstance(obj, art3d.Poly3DCollection):
+        return _get_surface_grid(obj)
+    if isinstance(obj, art3d.Line3DCollection):
+        return _get_wireframe_grid(obj)
+    return None
+
+
+def _get_surface_grid(obj):
+    # plot_surface() creates one polygon per patch of the (strided) grid, row by row.
+    # It runs along the perimeter of the patch: cstride points on the top edge,
+    # rstride on the right, followed by the bottom and the left edge. The strides of
+    # the last row and column may be smaller.
+    vec = getattr(obj, "_vec", None)
+    segslices = getattr(obj, "_segslices", None)
+    if vec is None or not segslices:
+        return None
+    if obj.get_array() is None and len(np.unique(obj._facecolor3d, axis=0)) > 1:
+        # shaded facets, PGFPlots doesn't do lighting
+        return None
+    polys = [vec[:3, segslice].T for segslice in segslices]
+    if any(len(poly) < 4 or len(poly) % 2 == 1 for poly in polys):
+        return None
+
+    corners = []
+    rstride = None
+    cstride = None
+    for k, poly in enumerate(polys):
+        half = len(poly) // 2
+        following = polys[k + 1][0] if k + 1 < len(polys) else None
+        # The top right corner is the top left one of the next patch in the row.
+        top_right = _find(poly, following, 1, half)
+        if top_right is not None:
+            cstride = top_right
+            rstride = half - cstride
+        elif rstride is not None:
+            # last patch of the row
+            cstride = half - rstride
+            rstride = None
+        else:
+            # The only patch of the row: The bottom left corner is the top left one of
+            # the patch in the next row. Otherwise, it's the last patch, in the same
+            # column as the previous one.
+            bottom_left = _find(poly, following, half + 1, len(poly))
+            if bottom_left is not None:
+                cstride = half - (len(poly) - bottom_left)
+            elif cstride is None:
+                if half != 2:
+                    return None
+                # a single quadrilateral
+                cstride = 1
+            if not 0 < cstride < half:
+                return None
+        r = half - cstride
+        corners.append(poly[[0, cstride, cstride + r, 2 * cstride + r]])
+    return _get_corner_grid(np.array(corners))
+
+
+def _find(poly, point, start, stop):
+    """Returns the first index in [start, stop) of `point` in `poly`, if any."""
+    if point is None:
+        return None
+    hits = np.flatnonzero(np.all(poly[start:stop] == point, axis=1))
+    return start + hits[0] if len(hits) > 0 else None
+
+
+def _get_corner_grid(corners):
+    """Returns the grid of the corners (top left, top right, bottom right, bottom left)
+    of the patches if they form one, row by row.
+    """
+    tl, tr, br, bl = corners.transpose(1, 0, 2)
+    # A new row of patches starts where the top left corner isn't the top right one
+    # of the previous patch.
+    new_rows = np.flatnonzero(~np.all(tl[1:] == tr[:-1], axis=1))
+    ncols = new_rows[0] + 1 if len(new_rows) > 0 else len(tl)
+    if len(tl) % ncols != 0:
+        return None
+    nrows = len(tl) // ncols
+
+    grid = np.empty((nrows + 1, ncols + 1, 3))
+    grid[:-1, :-1] = tl.reshape(nrows, ncols, 3)
+    grid[:-1, -1] = tr.reshape(nrows, ncols, 3)[:, -1]
+    grid[-1, :-1] = bl.reshape(nrows, ncols, 3)[-1]
+    grid[-1, -1] = br[-1]
+    cells = [grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1]]
+    for corner, cell in zip([tl, tr, br, bl], cells):
+        if not np.array_equal(corner, cell.reshape(-1, 3)):
+            return None
+    return grid
+
+
+def _get_wireframe_grid(obj):
+    # plot_wireframe() creates the lines along the rows, followed by the lines along
+    # the columns. Only if all points of the grid are on both, the grid is known.
+    segments = [np.asarray(segment) for segment in getattr(obj, "_segments3d", [])]
+    if not segments:
+        return None
+    ncols = len(segments[0])
+    nrows = len(segments) - ncols
+    if nrows < 2 or ncols < 2:
+        return None
+    if any(len(segment) != ncols for segment in segments[:nrows]) or any(
+        len(segment) != nrows for segment in segments[nrows:]
+    ):
+        return None
+    grid = np.array(segments[:nrows], dtype=float)
+    if not np.array_equal(np.array(segments[nrows:]), grid.transpose(1, 0, 2)):
+        return None
+    return grid
+
+
+def draw_surface(data, obj, grid):
+    """Returns the PGFPlots code for a surface or wireframe, given by its grid."""
+    content = []
+    ff = data["float format"]
+
+    is_wireframe = isinstance(obj, art3d.Line3DCollection)
+    draw_options = ["mesh" if is_wireframe else "surf"]
+    if obj.get_array() is not None:
+        mycolormap, is_custom_cmap = _mpl_cmap2pgf_cmap(obj.get_cmap(), data)
+        draw_options.append(
+            "colormap" + (" name=" if is_custom_cmap else "/") + mycolormap
+        )
+        # The color limits of matplotlib, not the ones of the z values of the grid.
+        # Unless given, they are only set when the figure is drawn.
+        obj.autoscale_None()
+        vmin, vmax = obj.get_clim()
+        draw_options += [
+            f"point meta min={vmin:{ff}}",
+            f"point meta max={vmax:{ff}}",
+        ]
+    else:
+        # A single color is a colormap of that color.
+        colors = obj.get_edgecolor() if is_wireframe else obj._facecolor3d
+        data, col, _ = _color.mpl_color2xcolor(data, colors[0])
+        draw_options.append(f"colormap={{{col}}}{{color=({col}) color=({col})}}")
+
+    if is_wireframe:
+        linewidth = mpl_linewidth2pgfp_linewidth(data, obj.get_linewidth()[0])
+        if linewidth:
+            draw_options.append(linewidth)
+    else:
+        edgecolors = obj._edgecolor3d
+        if len(edgecolors) > 0 and obj.get_linewidth()[0] > 0:
+            data, col, _ = _color.mpl_color2xcolor(data, edgecolors[0])
+            draw_options += ["shader=faceted", f"faceted color={col}"]
+        else:
+            draw_options.append("shader=flat")
+
+    nrows, ncols = grid.shape[:2]
+    draw_options += [f"mesh/rows={nrows}", f"mesh/cols={ncols}"]
+
+    legend_text = get_legend_text(data, obj)
+    if legend_text is None and has_legend(obj.axes):
+        draw_options.append("forget plot")
+
+    content.append("\\addplot3 [{}]\n".format(", ".join(draw_options)))
+
+    plot_table = [
+        " ".join(f"{val:{ff}}" for val in point) + "\n" for point in grid.reshape(-1, 3)
+    ]
+    if data["externalize tables"]:
+        filepath, rel_filepath = _files.new_filepath(data, "table", ".dat")
+        with _files.open_external(data, filepath, rel_filepath) as f:
+            # No encoding handling required: plot_table is only ASCII
+            f.writelines(plot_table)
+        content.append(f"table {{{rel_filepath.as_posix()}}};\n")
+    else:
+        content.append("table {%\n")
+        content.extend(plot_table)
+        content.append("};\n")
+
+    if legend_text is not None:
+        content.append(f"\\addlegendentry{{{legend_text}}}\n")
+
+    return data, content
@@ -1,26 +1,50 @@
+import matplotlib.dates
 import matplotlib.transforms
 import numpy as np
 
+# matplotlib 3.5 wraps the date converter such that it doesn't subclass DateConverter
+_date_converters = tuple(
+    getattr(matplotlib.dates, name)
+    for name in ["DateConverter", "_SwitchableDateConverter"]
+    if hasattr(matplotlib.dates, name)
+)
+
 
 def has_legend(axes):
     return axes.get_legend() is not None
 
 
-def get_legend_text(obj):
-    """Check if line is in legend."""
-    leg = obj.axes.get_legend()
-    if leg is None:
-        return None
+def get_legend_index(axes):
+    """Gathers what the legend of `axes` shows, such that the drawers can look up
+    their legend entries without going through the legend for every artist.
+    """
+    index = {"texts": {}, "label texts": set(), "handle labels": {}}
+    if axes is None:
+        return index
+
+    leg = axes.get_legend()
+    if leg is not None:
+        keys = [h.get_label() for h in leg.legendHandles if h is not None]
+        values = [t.get_text() for t in leg.texts]
+        index["texts"] = dict(zip(keys, values))
+        index["label texts"] = set(values)
 
-    keys = [h.get_label() for h in leg.legendHandles if h is not None]
-    values = [t.get_text() for t in leg.texts]
+    # Artists which are part of exactly one legend handle (e.g., the bars of a bar
+    # chart) get the label of that handle.
+    handle_labels = {}
+    handles, labels = axes.get_legend_handles_labels()
+    for h, label in zip(handles, labels):
+        for child in h.get_children():
+            handle_labels[id(child)] = None if id(child) in handle_labels else label
+    index["handle labels"] = {
+        key: label for key, label in handle_labels.items() if label is not None
+    }
+    return index
 
-    label = obj.get_label()
-    d = dict(zip(keys, values))
-    if label in d:
-        return d[label]
 
-    return None
+def get_legend_text(data, obj):
+    """Check if line is in legend."""
+    return data["legend index"]["texts"].get(obj.get_label())
 
 
 def transform_to_data_coordinates(obj, xdata, ydata):
@@ -33,9 +57,61 @@ def transform_to_data_coordinates(obj, xdata, ydata):
       2. from display to data.
     """
     if obj.axes is not None and obj.get_transform() != obj.axes.transData:
-        points = np.array([xdata, ydata]).T
         transform = matplotlib.transforms.composite_transform_factory(
             obj.get_transform(), obj.axes.transData.inverted()
         )
-        return transform.transform(points).T
+        if transform.is_affine and np.array_equal(transform.get_matrix(), np.eye(3)):
+            # e.g., a transform which is equal to transData, but not the same object
+            return xdata, ydata
+        return transform.transform(np.column_stack([xdata, ydata])).T
     return xdata, ydata
+
+
+def is_date_axis(axis):
+    """Check if the matplotlib axis (x or y) holds dates."""
+    return isinstance(axis.converter, _date_converters)
+
+
+def mpl_dates2strings(dates, resolution="m"):
+    """Converts matplotlib dates (floating point days since the epoch) or an array of
+    np.datetime64 into the date strings understood by PGFPlots' dateplot library, all
+    at once. The resolution is given as a NumPy datetime unit, e.g., ``"m"`` for
+    ``YYYY-MM-DD HH:MM`` or ``"s"`` for ``YYYY-MM-DD HH:MM:SS``.
+    """
+    dates = np.asarray(dates)
+    if dates.dtype.kind != "M":
+        # Like num2date, round to microseconds.
+        epoch = np.datetime64(matplotlib.dates.get_epoch(), "us")
+        is_finite = np.isfinite(dates)
+        microseconds = np.round(np.where(is_finite, dates, 0.0) * 86400e6)
+        dates = epoch + microseconds.astype("timedelta64[us]")
+        dates[~is_finite] = np.datetime64("NaT")
+    strings = np.datetime_as_string(dates, unit=resolution)
+    return np.char.replace(strings, "T", " ")
+
+
+def set_date_coordinates(data):
+    """Makes the current PGFPlots axis read its x-coordinates as dates."""
+    axis_options = data["current axes"].axis_options
+    if "date coordinates in=x" in axis_options:
+        return
+
+    # Replace float xmin/xmax by datetime
+    # <https://github.com/matplotlib/matplotlib/issues/13727>.
+    axis_options[:] = [
+        option for option in axis_options if not option.startswith("xmin")
+    ]
+    xlim = data["current mpl axes obj"].get_xlim()
+    axis_options.extend(get_date_options(data, xlim))
+
+
+def get_date_options(data, xlim=None):
+    """Returns the options of a PGFPlots axis which reads its x-coordinates as dates,
+    with the limits `xlim` (matplotlib dates or np.datetime64), if given.
+    """
+    data["pgfplots libs"].add("dateplot")
+    options = ["date coordinates in=x"]
+    if xlim is not None:
+        mindate, maxdate = mpl_dates2strings(xlim, data["date resolution"])
+        options.append(f"xmin={mindate}, xmax={maxdate}")
+    return options
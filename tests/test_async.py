@@ -0,0 +1,46 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+import tikzplotlib
+
+
+def plot():
+    fig = plt.figure()
+    x = np.linspace(0.0, 1.0, 50)
+    plt.plot(x, np.sin(5 * x))
+    plt.imshow(np.arange(6).reshape(2, 3), extent=(0.0, 1.0, 0.0, 1.0))
+    return fig
+
+
+def test(tmp_path):
+    fig = plot()
+    reference = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+
+    async def export_all():
+        semaphore = asyncio.Semaphore(2)
+        with ThreadPoolExecutor(4) as executor:
+            codes = asyncio.gather(
+                *[
+                    tikzplotlib.get_tikz_code_async(
+                        fig,
+                        include_disclaimer=False,
+                        executor=executor,
+                        semaphore=semaphore,
+                    )
+                    for _ in range(4)
+                ]
+            )
+            saved = tikzplotlib.save_async(
+                tmp_path / "out.tex", fig, include_disclaimer=False, executor=executor
+            )
+            return await asyncio.gather(codes, saved)
+
+    codes, _ = asyncio.run(export_all())
+    plt.close(fig)
+
+    assert codes == 4 * [reference]
+    assert (tmp_path / "out.tex").read_text().replace("out-000", "tmp-000") == reference
+    assert (tmp_path / "out-000.png").is_file()
@@ -0,0 +1,20 @@
+import matplotlib.pyplot as plt
+
+import tikzplotlib
+
+
+def test():
+    fig, ax = plt.subplots(1, 2)
+    ax[0].set_aspect("equal")
+    ax[0].set_xlim(0.0, 2.0)
+    ax[0].set_ylim(0.0, 1.0)
+    ax[1].set_aspect("equal")
+    ax[1].set_xlim(0.0, 1.0)
+    ax[1].set_ylim(0.0, 1.0)
+    code = tikzplotlib.get_tikz_code(fig, axis_width="8cm", include_disclaimer=False)
+    plt.close(fig)
+
+    # every axes gets the height of its own aspect ratio
+    assert "height=0.5*8cm" in code
+    assert "height=8cm" in code
+    assert code.count("width=8cm") == 2
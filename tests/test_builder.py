@@ -0,0 +1,124 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import tikzplotlib
+
+
+def _get_addplot(code):
+    return code[code.index("\\addplot") : code.index("\\end{axis}")]
+
+
+def test_same_as_figure():
+    x = np.linspace(0.0, 1.0, 5)
+    y = x**2
+    fig, ax = plt.subplots()
+    ax.plot(x, y, "o--", color="C1", label="squares")
+    ax.legend()
+    ref = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    plt.close(fig)
+
+    axis = tikzplotlib.TikzAxis().add_line(
+        x, y, color="C1", linestyle="--", marker="o", label="squares"
+    )
+    code = axis.get_tikz_code(include_disclaimer=False)
+    assert _get_addplot(code) == _get_addplot(ref)
+    assert "\\definecolor{darkorange25512714}{RGB}{255,127,14}" in code
+
+
+def test_axis_options():
+    axis = tikzplotlib.TikzAxis(
+        title="a & b", xlim=(0, 2), yscale="log", grid=True, options=["axis on top"]
+    )
+    code = axis.add_line([0, 1, 2], [1, 10, 100]).get_tikz_code()
+    for option in [
+        "axis on top",
+        "title={a \\& b}",
+        "xmin=0, xmax=2",
+        "ymode=log",
+        "xmajorgrids",
+    ]:
+        assert option + ",\n" in code or option + "\n]" in code
+    assert "unbounded coords=jump" not in code
+
+
+def test_unbounded():
+    x = np.arange(4.0)
+    y = np.ma.masked_array(x, [False, True, False, False])
+    code = tikzplotlib.TikzAxis().add_line(x, y).get_tikz_code()
+    assert "unbounded coords=jump" in code
+    assert "1 nan\n" in code
+
+
+def test_shapes():
+    with pytest.raises(ValueError):
+        tikzplotlib.TikzAxis().add_line([0, 1, 2], [0, 1])
+
+
+def test_save_externalized(tmp_path):
+    x = np.arange(10.0)
+    filepath = tmp_path / "test.tex"
+    tikzplotlib.TikzAxis().add_line(x, np.sin(x), label="sin").save(
+        filepath, externalize_tables=True
+    )
+    code = filepath.read_text()
+    assert "table {}{test-000.dat};\n" in code
+    assert "\\addlegendentry{sin}\n" in code
+    rows = (tmp_path / "test-000.dat").read_text().splitlines()
+    assert len(rows) == 10
+    assert float(rows[3].split()[1]) == pytest.approx(np.sin(3.0))
+
+
+def test_no_options():
+    code = tikzplotlib.TikzAxis().add_line([0, 1], [0, 1]).get_tikz_code()
+    assert "\\begin{axis}\n\\addplot [" in code
+
+
+def test_dates():
+    import datetime
+
+    pd = pytest.importorskip("pandas")
+
+    x = pd.Series(pd.date_range("2020-01-01 12:00", periods=3, freq="H", tz="UTC"))
+    x = x.dt.tz_convert("Europe/Berlin")
+    # pandas keeps timezone-aware dates as objects
+    assert np.asarray(x).dtype == object
+    axis = tikzplotlib.TikzAxis(xlim=(x[0], x[2])).add_line(x, [1.0, 2.0, 3.0])
+    code = axis.get_tikz_code(date_resolution="m")
+    # in UTC, as matplotlib plots them
+    assert "2020-01-01 13:00,2\n" in code
+    assert "xmin=2020-01-01 12:00, xmax=2020-01-01 14:00" in code
+    assert "date coordinates in=x" in code
+
+    tz = datetime.timezone(datetime.timedelta(hours=-5))
+    x = [datetime.datetime(2020, 1, 1, hour, tzinfo=tz) for hour in range(3)]
+    code = tikzplotlib.TikzAxis().add_line(x, [1, 2, 3]).get_tikz_code()
+    assert "2020-01-01 05:00,1\n" in code
+
+
+def test_nullable():
+    pd = pytest.importorskip("pandas")
+
+    y = pd.Series([1, None, 3], dtype="Int64")
+    # pandas gives the missing values as pd.NA
+    assert np.asarray(y).dtype == object
+    code = tikzplotlib.TikzAxis().add_line([0, 1, 2], y).get_tikz_code()
+    assert "unbounded coords=jump" in code
+    assert "0 1\n1 nan\n2 3\n" in code
+
+
+def test_types():
+    with pytest.raises(TypeError):
+        tikzplotlib.TikzAxis().add_line(["a", "b"], [0, 1])
+    with pytest.raises(TypeError):
+        tikzplotlib.TikzAxis().add_line([0, 1], np.array([None, "b"], dtype=object))
+    with pytest.raises(ValueError):
+        axis = tikzplotlib.TikzAxis().add_line([0, 1], [0, 1])
+        axis.add_line(np.array(["2020-01-01", "2020-01-02"], "datetime64[D]"), [0, 1])
+    # numbers as objects
+    code = (
+        tikzplotlib.TikzAxis()
+        .add_line(np.array([0, 1.5], dtype=object), [0, 1])
+        .get_tikz_code()
+    )
+    assert "1.5 1\n" in code
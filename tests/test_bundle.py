@@ -0,0 +1,51 @@
+import io
+import tempfile
+
+import matplotlib.pyplot as plt
+import numpy as np
+import PIL
+
+import tikzplotlib
+
+
+def plot():
+    fig, ax = plt.subplots(1, 2)
+    ax[0].imshow(np.arange(12).reshape(3, 4))
+    ax[1].plot([0.0, 1.0, 2.0], [1.0, 3.0, 2.0])
+    return fig
+
+
+def test(monkeypatch):
+    def mkdtemp(*args, **kwargs):
+        raise AssertionError("no directory must be created")
+
+    monkeypatch.setattr(tempfile, "mkdtemp", mkdtemp)
+
+    fig = plot()
+    code, files = tikzplotlib.get_tikz_bundle(
+        fig, include_disclaimer=False, externalize_tables=True
+    )
+    plt.close(fig)
+
+    assert sorted(files) == ["tmp-000.dat", "tmp-000.png"]
+    assert "{tmp-000.png}" in code
+    assert "{tmp-000.dat};" in code
+    assert bytes(files["tmp-000.dat"]) == b"0 1\n1 3\n2 2\n"
+    image = PIL.Image.open(io.BytesIO(files["tmp-000.png"]))
+    assert image.size == (4, 3)
+
+
+def test_cache():
+    fig = plot()
+    cache = {}
+    first = tikzplotlib.get_tikz_bundle(
+        fig, include_disclaimer=False, externalize_tables=True, cache=cache
+    )
+    # the files of cached axes are part of the bundle again
+    second = tikzplotlib.get_tikz_bundle(
+        fig, include_disclaimer=False, externalize_tables=True, cache=cache
+    )
+    plt.close(fig)
+
+    assert first[0] == second[0]
+    assert sorted(first[1]) == sorted(second[1])
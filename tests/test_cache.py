@@ -0,0 +1,45 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+import tikzplotlib
+
+
+def plot():
+    fig, axes = plt.subplots(2, 2)
+    x = np.linspace(0.0, 1.0, 20)
+    for k, ax in enumerate(axes.flat):
+        ax.plot(x, np.sin(k * x), label="sin")
+        ax.bar([0.2, 0.6], [0.5, 1.0], width=0.1, color="C3", label="bars")
+        ax.set_title(f"panel {k}")
+        ax.legend()
+    return fig, axes
+
+
+def test(monkeypatch):
+    fig, axes = plot()
+    cache = {}
+    tikzplotlib.get_tikz_code(fig, include_disclaimer=False, cache=cache)
+    assert len(cache) == 4
+
+    # Only the changed axes is exported again.
+    calls = []
+    draw_line2d = tikzplotlib._line2d.draw_line2d
+
+    def counting_draw_line2d(data, obj):
+        calls.append(obj)
+        return draw_line2d(data, obj)
+
+    monkeypatch.setattr(tikzplotlib._line2d, "draw_line2d", counting_draw_line2d)
+    axes[1, 0].lines[0].set_ydata(np.linspace(0.0, 1.0, 20))
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False, cache=cache)
+    assert calls == [axes[1, 0].lines[0]]
+
+    # ...and the code is the same as without cache
+    assert code == tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+
+    calls.clear()
+    axes[0, 1].set_xlim(0.0, 2.0)
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False, cache=cache)
+    assert calls == [axes[0, 1].lines[0]]
+    assert code == tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    plt.close(fig)
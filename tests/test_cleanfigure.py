@@ -1,3 +1,4 @@
+import matplotlib as mpl
 import numpy as np
 import pytest
 from matplotlib import pyplot as plt
@@ -42,8 +43,35 @@ class Test_plottypes:
             ax.step(x, y)
             ax.set_ylim([20, 80])
             ax.set_xlim([20, 80])
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            raw = get_tikz_code()
+
+            clean_figure(fig)
+            clean = get_tikz_code()
+
+            # every step is visible
+            assert raw.count("\n") == clean.count("\n")
+        plt.close("all")
+
+    @pytest.mark.parametrize("where", ["pre", "post", "mid"])
+    def test_step_runs(self, where):
+        x = np.arange(10000.0)
+        # long flat runs
+        y = np.floor(x / 1000)
+        y[5500] = 20.0
+
+        with plt.rc_context(rc=RC_PARAMS):
+            fig, ax = plt.subplots(1, 1, figsize=(5, 5))
+            (line,) = ax.step(x, y, where=where)
+            clean_figure(fig)
+
+            xdata, ydata = line.get_data()
+            assert len(xdata) < 50
+            assert line.get_drawstyle() == f"steps-{where}"
+            # the first and the last point, and the spike stay
+            assert xdata[0] == 0.0 and xdata[-1] == 9999.0
+            assert np.max(ydata) == 20.0
+            code = get_tikz_code(fig)
+            assert "const plot" in code
         plt.close("all")
 
     def test_scatter(self):
@@ -76,8 +104,7 @@ class Test_plottypes:
             ax.bar(x, y)
             ax.set_ylim([20, 80])
             ax.set_xlim([20, 80])
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            clean_figure(fig)
         plt.close("all")
 
     def test_hist(self):
@@ -88,8 +115,7 @@ class Test_plottypes:
             ax.hist(x, y)
             ax.set_ylim([20, 80])
             ax.set_xlim([20, 80])
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            clean_figure(fig)
         plt.close("all")
 
     def test_plot3d(self):
@@ -157,8 +183,11 @@ class Test_plottypes:
 
             # Plot a basic wireframe.
             ax.plot_wireframe(X, Y, Z, rstride=10, cstride=10)
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            raw = get_tikz_code(fig)
+            clean_figure(fig)
+            clean = get_tikz_code(fig)
+            # exported as a mesh of the whole grid, which isn't cleaned
+            assert raw == clean
         plt.close("all")
 
     def test_surface3D(self):
@@ -189,8 +218,7 @@ class Test_plottypes:
             # Add a color bar which maps values to colors.
             fig.colorbar(surf, shrink=0.5, aspect=5)
 
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            clean_figure(fig)
         plt.close("all")
 
     def test_trisurface3D(self):
@@ -220,8 +248,7 @@ class Test_plottypes:
             ax = plt.axes(projection="3d")
 
             ax.plot_trisurf(x, y, z, linewidth=0.2, antialiased=True)
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            clean_figure(fig)
         plt.close("all")
 
     def test_contour3D(self):
@@ -234,8 +261,7 @@ class Test_plottypes:
             X, Y, Z = axes3d.get_test_data(0.05)
             cset = ax.contour(X, Y, Z, cmap=cm.coolwarm)
             ax.clabel(cset, fontsize=9, inline=1)
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            clean_figure(fig)
         plt.close("all")
 
     def test_polygon3D(self):
@@ -274,8 +300,7 @@ class Test_plottypes:
             ax.set_ylim3d(-1, 4)
             ax.set_zlabel("Z")
             ax.set_zlim3d(0, 1)
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            clean_figure(fig)
         plt.close("all")
 
     def test_bar3D(self):
@@ -295,8 +320,7 @@ class Test_plottypes:
             ax.set_xlabel("X")
             ax.set_ylabel("Y")
             ax.set_zlabel("Z")
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            clean_figure(fig)
         plt.close("all")
 
     def test_quiver3D(self):
@@ -322,8 +346,7 @@ class Test_plottypes:
             )
 
             ax.quiver(x, y, z, u, v, w, length=0.1, normalize=True)
-            with pytest.warns(Warning):
-                clean_figure(fig)
+            clean_figure(fig)
         plt.close("all")
 
     def test_2D_in_3D(self):
@@ -514,6 +537,26 @@ class Test_subplots:
             assert num_lines_raw - num_lines_clean == 36
         plt.close("all")
 
+    def test_workers(self):
+        x = np.linspace(0, 10, 1000)
+
+        def plot():
+            fig, axes = plt.subplots(2, 2, figsize=(5, 5))
+            for k, ax in enumerate(axes.ravel()):
+                ax.plot(x, np.sin(k * x))
+                ax.plot(x, np.cos(k * x), linestyle="None", marker="o")
+                ax.scatter(x, np.sin(x + k))
+            return fig
+
+        with plt.rc_context(rc=RC_PARAMS):
+            fig = plot()
+            clean_figure(fig)
+            sequential = get_tikz_code(fig)
+            fig = plot()
+            clean_figure(fig, workers=4)
+            assert get_tikz_code(fig) == sequential
+        plt.close("all")
+
 
 class Test_logscale:
     def test_ylog(self):
@@ -663,6 +706,118 @@ class Test_logscale:
         plt.close("all")
 
 
+class Test_collections:
+    def test_line_collection(self):
+        from matplotlib.collections import LineCollection
+
+        x = np.linspace(0, 10, 200)
+        colors = ["r", "g", "b", "k"]
+        segments = [np.column_stack([x, np.sin(x) + k]) for k in range(len(colors))]
+        # a segment which isn't visible at all
+        segments.append(np.column_stack([x, np.full_like(x, 100.0)]))
+        colors.append("y")
+        with plt.rc_context(rc=RC_PARAMS):
+            fig, ax = plt.subplots(1, 1, figsize=(5, 5))
+            collection = LineCollection(segments, colors=colors, linewidths=[1, 2])
+            ax.add_collection(collection)
+            ax.set_xlim([2, 8])
+            ax.set_ylim([-1, 4])
+            clean_figure(fig)
+
+            cleaned = collection.get_segments()
+            assert sum(len(seg) for seg in cleaned) < 4 * len(x)
+            edgecolors = collection.get_edgecolor()
+            assert len(edgecolors) == len(cleaned)
+            for seg, color in zip(cleaned, edgecolors):
+                # the styles stay with the original segments
+                k = int(np.round(np.mean(seg[:, 1] - np.sin(seg[:, 0]))))
+                assert np.array_equal(color, mpl.colors.to_rgba(colors[k]))
+        plt.close("all")
+
+    def test_surface(self):
+        from tikzplotlib._surface import get_grid
+
+        X, Y = np.meshgrid(np.linspace(-1, 1, 5), np.linspace(-1, 1, 4))
+        with plt.rc_context(rc=RC_PARAMS):
+            fig = plt.figure()
+            ax = fig.add_subplot(111, projection="3d")
+            surf = ax.plot_surface(X, Y, X * Y, cmap="viridis")
+            clean_figure(fig)
+            # still exported as a grid
+            assert np.allclose(get_grid(surf)[..., 2], X * Y)
+        plt.close("all")
+
+
+class Test_out_of_range:
+    def test_zoomed_line(self):
+        x = np.linspace(0, 100, 10001)
+        y = np.sin(x)
+        with plt.rc_context(rc=RC_PARAMS):
+            fig, ax = plt.subplots(1, 1, figsize=(5, 5))
+            (line,) = ax.plot(x, y)
+            ax.set_xlim([10, 20])
+            ax.set_ylim([-1.5, 1.5])
+            clean_figure(fig)
+
+            xdata, ydata = line.get_xdata(), line.get_ydata()
+            assert len(xdata) < len(x) // 10
+            isFinite = np.isfinite(xdata)
+            # nothing is left outside of the box enlarged by 10 %
+            assert np.all(xdata[isFinite] >= 9.0 - 1e-10)
+            assert np.all(xdata[isFinite] <= 21.0 + 1e-10)
+            # the visible part is only simplified
+            isVisible = np.logical_and(x >= 10, x <= 20)
+            yInterp = np.interp(x[isVisible], xdata, ydata)
+            assert np.allclose(yInterp, y[isVisible], atol=1e-2)
+        plt.close("all")
+
+    def test_move_points_closer(self):
+        from tikzplotlib._cleanfigure import _move_points_closer
+
+        data = np.array([[0.0, 0.0], [0.5, 0.5], [100.0, 0.5], [0.5, 0.0]])
+        data, id_orig, isNew = _move_points_closer(
+            np.array([0.0, 1.0]), np.array([0.0, 1.0]), data
+        )
+        expected = [
+            [0.0, 0.0],
+            [0.5, 0.5],
+            [1.1, 0.5],
+            [np.nan, np.nan],
+            [1.1, 0.5 * 0.6 / 99.5],
+            [0.5, 0.0],
+        ]
+        assert np.allclose(data, expected, equal_nan=True)
+        assert np.array_equal(id_orig, [0, 1, 1, 2, 2, 3])
+        assert np.array_equal(isNew, [False, False, True, False, True, False])
+
+    def test_segment_visible(self):
+        from tikzplotlib._cleanfigure import _segment_visible
+
+        data = np.array(
+            [
+                [-1.0, 0.5],
+                [2.0, 0.5],
+                [2.0, 2.0],
+                [-1.0, 3.0],
+                [np.nan, 0.0],
+                [0.5, 0.5],
+            ]
+        )
+        mask = _segment_visible(data, np.array([0.0, 1.0]), np.array([0.0, 1.0]))
+        # crossing, outside, outside, NaN
+        assert np.array_equal(mask, [True, False, False, False, False])
+
+    def test_scatter(self):
+        with plt.rc_context(rc=RC_PARAMS):
+            fig, ax = plt.subplots(1, 1, figsize=(5, 5))
+            sc = ax.scatter([0.2, 0.5, 50.0, 0.8], [0.2, 0.5, 0.5, 0.8])
+            ax.set_xlim([0, 1])
+            ax.set_ylim([0, 1])
+            clean_figure(fig)
+            assert np.allclose(sc.get_offsets(), [[0.2, 0.2], [0.5, 0.5], [0.8, 0.8]])
+        plt.close("all")
+
+
 def test_memory():
     plt.plot(np.arange(100000))
     clean_figure()
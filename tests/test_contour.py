@@ -0,0 +1,73 @@
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.path import Path
+
+from tikzplotlib._contour import draw_contourset, get_table
+
+
+def plot():
+    fig, ax = plt.subplots()
+    x, y = np.meshgrid(np.linspace(-1, 1, 6), np.linspace(-1, 1, 6))
+    cs = ax.contour(x, y, x**2 + y**2, levels=[0.3, 1.5])
+    return fig, cs
+
+
+def test():
+    from .helpers import assert_equality
+
+    # before matplotlib 3.8, every level is a plot of its own
+    assert_equality(plot, __file__[:-3] + "_reference.tex")
+
+
+def test_table():
+    paths = [
+        Path([[0, 0], [1, 0], [1, 1], [5, 5]], closed=True),
+        Path([[2, 2], [3, 3], [4, 4], [5, 5]], [1, 2, 1, 2]),
+    ]
+    points, starts = get_table([0.5, 1.5], paths)
+    # the closing vertex is the start of the line
+    assert np.array_equal(points[3], [0, 0, 0.5])
+    assert np.array_equal(points[4:, 2], [1.5, 1.5, 1.5, 1.5])
+    assert np.array_equal(starts, [4, 6])
+
+
+def test_contourset():
+    fig, cs = plot()
+    data = {
+        "float format": ".8g",
+        "externalize tables": False,
+        "custom colors": {},
+        "custom colormaps": {},
+        "strict": False,
+    }
+    _, content = draw_contourset(data, cs)
+    assert len([line for line in content if line.startswith("\\addplot")]) == 1
+    assert content[0].startswith("\\addplot [contour prepared={labels=false}")
+    assert "colormap/viridis" in content[0]
+    table = "".join(content[2:-1])
+    # one line for the inner level, four for the corners
+    assert table.count("\n\n") == 4
+    assert table.count(" 1.5\n") == 8
+    plt.close(fig)
+
+
+def test_not_a_level():
+    import tikzplotlib
+    from tikzplotlib._contour import is_contour_level
+
+    fig, ax = plt.subplots()
+    square = Path([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]], closed=True)
+    triangle = Path([[2.0, 0.0], [3.0, 0.0], [2.5, 1.0]], closed=True)
+    collection = mpl.collections.PathCollection(
+        [square, triangle],
+        facecolors="none",
+        edgecolors=["r", "b"],
+        transform=ax.transData,
+    )
+    ax.add_collection(collection)
+    assert not is_contour_level(collection)
+    code = tikzplotlib.get_tikz_code(fig)
+    plt.close(fig)
+    assert "unbounded coords=jump" not in code
+    assert "blue" in code
@@ -0,0 +1,69 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+import tikzplotlib
+
+
+def _get_code(fig):
+    return tikzplotlib.get_tikz_code(fig, include_disclaimer=False, cull=True)
+
+
+def test_invisible():
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1])
+    ax.plot([0, 1], [1, 0], color="red").pop().set_visible(False)
+    ax.add_patch(plt.Rectangle((0.2, 0.2), 0.1, 0.1, visible=False))
+    code = _get_code(fig)
+    assert code.count("\\addplot") == 1
+    assert "red" not in code
+    # by default, everything is exported
+    assert "red" in tikzplotlib.get_tikz_code(fig)
+    plt.close(fig)
+
+
+def test_out_of_view():
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1], color="black")
+    ax.plot([5, 6], [0, 1], color="red")
+    ax.add_patch(plt.Rectangle((-3, 0.2), 1, 1, color="green"))
+    ax.scatter([10, 11], [10, 11], color="blue")
+    # with a legend entry, it's kept
+    ax.plot([8, 9], [0, 1], color="orange", label="far away")
+    ax.legend()
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    code = _get_code(fig)
+    for color in ["red", "green", "blue"]:
+        assert color not in code
+    assert "orange" in code
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    for color in ["red", "green", "blue"]:
+        assert color in code
+    plt.close(fig)
+
+
+def test_trim_line():
+    fig, ax = plt.subplots()
+    x = np.arange(1000.0)
+    y = np.sin(x)
+    line = ax.plot(x, y)[0]
+    ax.set_xlim(10.5, 20.5)
+    code = _get_code(fig)
+    table = code.split("table {%\n")[1].split("};")[0].splitlines()
+    # the visible points and one neighbor on each side
+    assert [float(row.split()[0]) for row in table] == list(range(10, 22))
+    # the line isn't changed
+    assert np.array_equal(line.get_xdata(), x)
+    plt.close(fig)
+
+
+def test_trim_crossing_segment():
+    # Neither point is in view, but the segment between them is.
+    fig, ax = plt.subplots()
+    ax.plot([-10, -5, 5, 10], [0, 0, 1, 1])
+    ax.set_xlim(-1, 1)
+    ax.set_ylim(0, 1)
+    code = _get_code(fig)
+    table = code.split("table {%\n")[1].split("};")[0].splitlines()
+    assert [float(row.split()[0]) for row in table] == [-5, 5]
+    plt.close(fig)
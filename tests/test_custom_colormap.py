@@ -0,0 +1,75 @@
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import LinearSegmentedColormap, ListedColormap
+
+import tikzplotlib
+
+
+def plot():
+    fig, axes = plt.subplots(1, 3)
+    x = np.linspace(0.0, 1.0, 5)
+    for ax in axes[:2]:
+        ax.scatter(x, x, c=x, cmap="jet")
+    cmap = ListedColormap([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]], name="jet")
+    axes[2].scatter(x, x, c=x, cmap=cmap)
+    return fig
+
+
+def test():
+    fig = plot()
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    plt.close(fig)
+
+    # shared color maps are defined once, different ones get unique names, none of
+    # which redefines a built-in color map of PGFPlots
+    assert "colormap={jet}" not in code
+    assert (
+        code.count(
+            "\\pgfplotsset{colormap={tikzplotlib-jet}{[1pt]\n  rgb(0pt)=(0,0,0.5);"
+        )
+        == 1
+    )
+    assert code.count("colormap name=tikzplotlib-jet,") == 2
+    assert (
+        "\\pgfplotsset{colormap={tikzplotlib-jet2}{[1pt]\n"
+        "  rgb(0pt)=(1,0,0);\n  rgb(1pt)=(0,0,1)\n}}" in code
+    )
+    assert code.count("colormap name=tikzplotlib-jet2,") == 1
+
+
+def test_segment_values():
+    from tikzplotlib._axes import _handle_linear_segmented_color_map
+
+    cmap = LinearSegmentedColormap.from_list("mymap", ["red", "green", "blue"])
+    X, colors = _handle_linear_segmented_color_map(cmap._segmentdata)
+    assert X == [0, 1, 2]
+    assert np.allclose(
+        colors, [[1.0, 0.0, 0.0], [0.0, 0.50196078, 0.0], [0.0, 0.0, 1.0]]
+    )
+
+    # a discontinuity in green and an extra node in blue
+    segdata = {
+        "red": [(0.0, 0.0, 0.0), (1.0, 1.0, 1.0)],
+        "green": [(0.0, 0.0, 0.0), (0.5, 0.2, 0.8), (1.0, 1.0, 1.0)],
+        "blue": [(0.0, 1.0, 1.0), (0.25, 0.5, 0.5), (1.0, 0.0, 0.0)],
+    }
+    X, colors = _handle_linear_segmented_color_map(segdata)
+    assert X == [0, 1, 2, 4]
+    assert np.allclose(
+        colors,
+        [[0.0, 0.0, 1.0], [0.25, 0.1, 0.5], [0.5, 0.2, 1.0 / 3.0], [1.0, 1.0, 0.0]],
+    )
+
+
+def test_changed_in_place():
+    from tikzplotlib._axes import _mpl_cmap2pgf_cmap
+
+    cmap = LinearSegmentedColormap.from_list("mymap", ["red", "blue"])
+    data = {"float format": ".15g", "custom colormaps": {}}
+    _mpl_cmap2pgf_cmap(cmap, data)
+    assert "rgb(0pt)=(1,0,0)" in data["custom colormaps"]["tikzplotlib-mymap"]
+
+    cmap._segmentdata["red"][0] = (0.0, 0.5, 0.5)
+    data = {"float format": ".15g", "custom colormaps": {}}
+    _mpl_cmap2pgf_cmap(cmap, data)
+    assert "rgb(0pt)=(0.5,0,0)" in data["custom colormaps"]["tikzplotlib-mymap"]
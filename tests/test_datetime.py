@@ -20,3 +20,19 @@ def test():
     from .helpers import assert_equality
 
     assert_equality(plot, __file__[:-3] + "_reference.tex")
+
+
+def test_seconds():
+    import numpy as np
+
+    import tikzplotlib
+
+    fig = plt.figure()
+    time = np.array(["2016-10-10T18:00:30", "2016-10-10T18:15:45"], dtype="datetime64")
+    plt.plot(time, [50, 50.02])
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False, date_resolution="s")
+    plt.close(fig)
+
+    assert "date coordinates in=x" in code
+    assert "2016-10-10 18:00:30,50\n" in code
+    assert "2016-10-10 18:15:45,50.02\n" in code
@@ -0,0 +1,24 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from tikzplotlib._axes import get_figure_index
+
+
+def test():
+    fig, axes = plt.subplots(1, 2)
+    im = axes[0].imshow(np.eye(3))
+    cbar = fig.colorbar(im, ax=axes[0])
+    axes[1].plot([0, 1], [0, 1], label="line")
+    axes[1].legend()
+    inset = axes[1].inset_axes([0.5, 0.5, 0.4, 0.4])
+
+    index = get_figure_index(fig)
+    plt.close(fig)
+
+    assert len(index) == 4
+    assert index[id(axes[0])]["colorbar"] is cbar
+    assert index[id(axes[0])]["geometry"] == (1, 2, 0, 0)
+    assert index[id(cbar.ax)]["is colorbar"]
+    assert not index[id(axes[1])]["is colorbar"]
+    assert index[id(axes[1])]["legend index"]["texts"] == {"line": "line"}
+    assert index[id(inset)]["geometry"] is None
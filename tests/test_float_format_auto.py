@@ -0,0 +1,48 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+import tikzplotlib
+
+
+def plot():
+    fig, ax = plt.subplots(1, 2, figsize=(5, 3))
+    x = np.linspace(0.0, 1.0, 100)
+    ax[0].plot(x, np.sin(7 * x))
+    ax[1].semilogy(x, np.exp(5 * x))
+    return fig
+
+
+def test():
+    plot()
+    full = tikzplotlib.get_tikz_code(include_disclaimer=False)
+    auto = tikzplotlib.get_tikz_code(include_disclaimer=False, float_format="auto")
+    plt.close("all")
+
+    assert len(auto) < 0.6 * len(full)
+    # the output is identical up to the number of digits
+    assert auto.count("\n") == full.count("\n")
+    assert "0.07071 0.475\n" in auto
+    assert "0.0707070707070707 0.474987207800991\n" in full
+
+
+def test_significant_digits():
+    from tikzplotlib._axes import _get_significant_digits
+
+    # 0.001 resolution on an axis going up to 1
+    assert _get_significant_digits((0.0, 1.0), "linear", 1000) == 4
+    assert _get_significant_digits((1000.0, 1001.0), "linear", 1000) == 7
+    assert _get_significant_digits((1.0, 1.0), "linear", 1000) == 15
+    assert _get_significant_digits((1.0, 100.0), "log", 1000) == 4
+    assert _get_significant_digits((1.0, 100.0), "symlog", 1000) == 15
+
+
+def test_3d():
+    fig = plt.figure()
+    ax = fig.add_subplot(projection="3d")
+    x, y = np.meshgrid(np.linspace(0.0, 1.0, 5), np.linspace(0.0, 1.0, 5))
+    # small variations on a large offset
+    ax.plot_surface(x, y, 1000.0 + 0.01 * x * y, cmap="viridis")
+    code = tikzplotlib.get_tikz_code(fig, float_format="auto")
+    plt.close(fig)
+    assert "\\addplot3" in code
+    assert " 1000.01\n" in code
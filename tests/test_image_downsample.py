@@ -0,0 +1,74 @@
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+
+import tikzplotlib
+
+
+def _export(fig, **kwargs):
+    _, files = tikzplotlib.get_tikz_bundle(fig, **kwargs)
+    plt.close(fig)
+    assert len(files) == 1
+    return np.asarray(Image.open(io.BytesIO(files["tmp-000.png"])))
+
+
+def plot(img, interpolation="antialiased"):
+    fig = plt.figure(figsize=(2.0, 1.0), dpi=100)
+    ax = plt.axes([0, 0, 1, 1])
+    ax.imshow(img, interpolation=interpolation, aspect="auto")
+    return fig
+
+
+def test_image_dpi(monkeypatch):
+    from tikzplotlib import _image
+
+    # several tiles of 7 input rows
+    monkeypatch.setattr(_image, "_tile_bytes", 7 * 8 * 600)
+
+    # a 2in x 1in image with 300 dpi
+    img = np.arange(600 * 300, dtype=float).reshape(300, 600)
+    assert _export(plot(img), image_dpi=150).shape[:2] == (150, 300)
+    # never upsampled
+    assert _export(plot(img), image_dpi=600).shape[:2] == (300, 600)
+    assert _export(plot(img), max_image_pixels=5000).shape[:2] == (50, 100)
+
+
+def test_resampling():
+    from tikzplotlib._image import _downsample
+
+    fig = plot(np.zeros((4, 4)))
+    (obj,) = fig.axes[0].images
+    data = {"image dpi": None, "max image pixels": 4}
+    img = np.arange(16, dtype=np.uint8).reshape(4, 4)
+    assert np.array_equal(_downsample(data, obj, img), [[2, 4], [10, 12]])
+
+    obj.set_interpolation("nearest")
+    assert np.array_equal(_downsample(data, obj, img), [[5, 7], [13, 15]])
+
+    # masked pixels don't contribute
+    obj.set_interpolation("antialiased")
+    img = np.ma.masked_array(np.arange(16.0).reshape(4, 4), mask=np.zeros((4, 4)))
+    img.mask[:2, :2] = True
+    img.mask[0, 2] = True
+    out = _downsample(data, obj, img)
+    plt.close(fig)
+    assert out.mask.tolist() == [[True, False], [False, False]]
+    assert out[0, 1] == (3.0 + 6.0 + 7.0) / 3
+
+
+def test_tiles(monkeypatch):
+    from tikzplotlib import _image
+
+    fig = plot(np.zeros((4, 4)))
+    (obj,) = fig.axes[0].images
+    data = {"image dpi": None, "max image pixels": 15 * 10}
+    img = np.random.default_rng(0).random((45, 30, 3))
+    expected = img.reshape(15, 3, 10, 3, 3).mean(axis=(1, 3))
+    # output rows are split between tiles of 2 input rows
+    monkeypatch.setattr(_image, "_tile_bytes", 2 * 8 * 30 * 3)
+    assert np.allclose(_image._downsample(data, obj, img), expected)
+    obj.set_interpolation("nearest")
+    assert np.array_equal(_image._downsample(data, obj, img), img[1::3, 1::3])
+    plt.close(fig)
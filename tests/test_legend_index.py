@@ -0,0 +1,30 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from tikzplotlib._util import get_legend_index
+
+
+def test():
+    fig, ax = plt.subplots()
+    (line,) = ax.plot([0, 1], [0, 1], label="line")
+    bars = ax.bar(np.arange(3), [1, 2, 3], label="bars")
+    ax.bar(np.arange(3), [1, 1, 1], label="_hidden")
+    ax.legend()
+
+    index = get_legend_index(ax)
+    plt.close(fig)
+
+    assert index["texts"]["line"] == "line"
+    assert index["label texts"] == {"line", "bars"}
+    assert index["handle labels"] == {id(bar): "bars" for bar in bars}
+    assert id(line) not in index["handle labels"]
+
+
+def test_no_legend():
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1], label="line")
+    index = get_legend_index(ax)
+    plt.close(fig)
+
+    assert index["texts"] == {}
+    assert index["label texts"] == set()
@@ -0,0 +1,40 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+import tikzplotlib
+
+
+def test_masked_data_unchanged():
+    fig = plt.figure()
+    y = np.ma.masked_array([1.0, 2.0, 3.0, 4.0], mask=[False, True, False, False])
+    (line,) = plt.plot(y)
+    xydata = line.get_xydata().copy()
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    plt.close(fig)
+
+    assert "unbounded coords=jump" in code
+    assert "1 nan\n" in code
+    # the data of the line itself isn't touched
+    assert np.array_equal(line.get_xydata(), xydata, equal_nan=True)
+
+
+def test_float32_memmap(tmp_path, monkeypatch):
+    from tikzplotlib import _line2d
+
+    # several chunks
+    monkeypatch.setattr(_line2d, "_chunk_size", 3)
+
+    n = 10
+    x = np.memmap(tmp_path / "x.bin", dtype=np.float32, mode="w+", shape=(n,))
+    y = np.memmap(tmp_path / "y.bin", dtype=np.float32, mode="w+", shape=(n,))
+    x[:] = np.arange(n)
+    y[:] = np.arange(n) / 4
+    fig = plt.figure()
+    (line,) = plt.plot(x, y)
+    xdata, ydata = _line2d._get_xydata(line)
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    plt.close(fig)
+
+    assert xdata.dtype == np.float32 and ydata.dtype == np.float32
+    rows = "".join(f"{k} {k / 4:.15g}\n" for k in range(n))
+    assert "table {%\n" + rows + "};\n" in code
@@ -0,0 +1,69 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+def plot():
+    fig, ax = plt.subplots(1, 2)
+    x, y = np.meshgrid(np.arange(3.0), np.arange(2.0))
+    u, v = np.cos(x + y), np.sin(x)
+    ax[0].quiver(x, y, u, v, color="r", angles="xy", scale_units="xy", scale=2)
+    ax[1].quiver(x, y, u, v, u, cmap="viridis", pivot="middle")
+    return fig
+
+
+def test():
+    from .helpers import assert_equality
+
+    assert_equality(plot, __file__[:-3] + "_reference.tex")
+
+
+def test_arrows():
+    from tikzplotlib._quiver import _get_arrows
+
+    fig, ax = plt.subplots()
+    x, y = np.meshgrid(np.arange(4.0), np.arange(3.0))
+    u = np.ma.masked_array(np.cos(x + y), mask=x == 1.0)
+    quiver = ax.quiver(x, y, u, np.sin(x), pivot="tip", units="inches")
+    tails, vectors, mask = _get_arrows(quiver)
+
+    # the tips of the arrows matplotlib draws
+    fig.canvas.draw()
+    verts = np.array([path.vertices[3] for path in quiver.get_paths()])
+    offsets = ax.transData.transform(quiver.get_offsets())
+    tips = ax.transData.inverted().transform(
+        offsets + quiver.get_transform().transform(verts)
+    )
+    plt.close(fig)
+
+    assert np.array_equal(mask, (x != 1.0).ravel())
+    assert np.allclose(tails[mask] + vectors[mask], tips[mask])
+    # pivot="tip"
+    assert np.allclose(tips[mask], quiver.get_offsets()[mask])
+
+
+def test_fallback(monkeypatch):
+    import matplotlib as mpl
+
+    from tikzplotlib._quiver import _get_arrows
+
+    fig, ax = plt.subplots()
+    quiver = ax.quiver([0.0, 1.0], [0.0, 1.0], [1.0, 1.0], [0.0, 1.0], pivot="tip")
+    tails, vectors, mask = _get_arrows(quiver)
+
+    # e.g., a changed private API; drawing still works
+    init = mpl.quiver.Quiver._init
+    calls = []
+
+    def first_call_fails(self):
+        calls.append(self)
+        if len(calls) == 1:
+            raise AttributeError()
+        init(self)
+
+    monkeypatch.setattr(mpl.quiver.Quiver, "_init", first_call_fails)
+    fallback = _get_arrows(quiver)
+    plt.close(fig)
+    assert len(calls) == 2
+    assert np.allclose(fallback[0], tails)
+    assert np.allclose(fallback[1], vectors)
+    assert np.array_equal(fallback[2], mask)
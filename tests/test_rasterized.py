@@ -0,0 +1,71 @@
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+
+import tikzplotlib
+
+
+def plot():
+    fig, ax = plt.subplots()
+    x = np.linspace(0.0, 1.0, 1000)
+    ax.scatter(x, np.sin(10 * x), rasterized=True)
+    ax.plot(x, np.cos(10 * x), "k")
+    ax.plot([0.0, 1.0], [0.0, 0.5], "r", label="vector")
+    ax.set_xlabel("x")
+    return fig
+
+
+def test(tmp_path, monkeypatch):
+    fig = plot()
+
+    # the figure isn't touched
+    def set_dpi(*args):
+        raise AssertionError("the dpi of the figure must not change")
+
+    monkeypatch.setattr(fig, "set_dpi", set_dpi)
+    monkeypatch.setattr(fig, "_set_dpi", set_dpi)
+
+    code = tikzplotlib.get_tikz_code(fig, tmp_path / "test.tex", dpi=50)
+    assert code.count("\\addplot graphics") == 1
+    assert "test-000.png" in code
+    assert code.count("\\addplot [") == 2
+    assert "xlabel={x}" in code
+
+    image = Image.open(tmp_path / "test-000.png")
+    bbox = fig.axes[0].bbox
+    assert abs(image.size[0] - bbox.width / fig.dpi * 50) <= 1
+    assert abs(image.size[1] - bbox.height / fig.dpi * 50) <= 1
+    # something was drawn
+    assert np.asarray(image)[..., 3].max() > 0
+
+    code = tikzplotlib.get_tikz_code(
+        fig, tmp_path / "test.tex", dpi=50, rasterize_threshold=100
+    )
+    plt.close(fig)
+    assert code.count("\\addplot graphics") == 2
+    assert code.count("\\addplot [") == 1
+
+
+def test_scaled_renderer():
+    import matplotlib as mpl
+    from matplotlib.backends.backend_agg import RendererAgg
+
+    from tikzplotlib._rasterize import _ScaledRenderer
+
+    fig, ax = plt.subplots(dpi=50)
+    image = ax.imshow(np.arange(12.0).reshape(3, 4))
+    text = ax.text(1.0, 1.0, "two\nlines", ha="center", fontsize=20)
+    fig.canvas.draw()
+    width, height = int(fig.bbox.width * 4), int(fig.bbox.height * 4)
+    for artist in [image, text]:
+        scaled = RendererAgg(width, height, 200)
+        artist.draw(_ScaledRenderer(scaled, mpl.transforms.Affine2D().scale(4)))
+        fig.set_dpi(200)
+        reference = RendererAgg(width, height, 200)
+        artist.draw(reference)
+        fig.set_dpi(50)
+        reference = np.asarray(reference.buffer_rgba(), dtype=int)
+        diff = np.abs(np.asarray(scaled.buffer_rgba(), dtype=int) - reference)
+        # up to the edges of the image
+        assert np.mean(diff > 64) < 0.05 * np.mean(reference[..., 3] > 0)
+    plt.close(fig)
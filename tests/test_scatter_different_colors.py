@@ -33,3 +33,32 @@ def test():
     from .helpers import assert_equality
 
     assert_equality(plot, __file__[:-3] + "_reference.tex")
+
+
+def test_classes():
+    import tikzplotlib
+
+    fig = plt.figure()
+    n = 1000
+    colors = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 0.0, 0.0]])
+    plt.scatter(np.arange(n), np.arange(n), color=colors[np.arange(n) % 3])
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    plt.close(fig)
+
+    assert "c0={draw=black,fill=black},\n  c1={draw=blue,fill=blue}" in code
+    assert code.count(" c0\n") + code.count(" c1\n") + code.count(" c2\n") == n
+
+
+def test_many_colors():
+    import tikzplotlib
+
+    fig = plt.figure()
+    n = 300
+    np.random.seed(123)
+    plt.scatter(np.arange(n), np.arange(n), color=np.random.rand(n, 3))
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    plt.close(fig)
+
+    # too many classes, color the points individually
+    assert "scatter/classes" not in code
+    assert "\\noexpand\\definecolor{thispointfillcolor}{RGB}{\\fillcolor}" in code
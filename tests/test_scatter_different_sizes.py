@@ -1,4 +1,5 @@
 import matplotlib.pyplot as plt
+import numpy as np
 
 
 # https://github.com/nschloe/tikzplotlib/issues/414
@@ -18,3 +19,36 @@ def test():
     from .helpers import assert_equality
 
     assert_equality(plot, __file__[:-3] + "_reference.tex")
+
+
+def test_tolerance():
+    import tikzplotlib
+
+    fig = plt.figure()
+    # radii 1.0, 1.01, 2.0 pt
+    plt.scatter([1, 2, 3], [5, 7, 1], s=np.pi * np.array([1.0, 1.01, 2.0]) ** 2)
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    rounded = tikzplotlib.get_tikz_code(
+        fig, include_disclaimer=False, marker_size_tolerance=0.1
+    )
+    plt.close(fig)
+
+    assert "c0={mark size=1},\n  c1={mark size=1.01},\n  c2={mark size=2}" in code
+    assert "c0={mark size=1},\n  c1={mark size=2}\n" in rounded
+    assert "1 5 c0\n2 7 c0\n3 1 c1\n" in rounded
+
+
+def test_many_sizes():
+    import tikzplotlib
+
+    fig = plt.figure()
+    n = 300
+    plt.scatter(np.arange(n), np.arange(n), s=np.arange(1, n + 1))
+    code = tikzplotlib.get_tikz_code(fig, include_disclaimer=False)
+    plt.close(fig)
+
+    # too many classes, size the points individually
+    assert "scatter/classes" not in code
+    assert (
+        "visualization depends on={\\thisrow{sizedata} \\as\\perpointmarksize}" in code
+    )
@@ -0,0 +1,43 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+import tikzplotlib
+
+
+def plot():
+    fig, axes = plt.subplots(2, 2)
+    x = np.linspace(0.0, 1.0, 5)
+    for k, ax in enumerate(axes.flat):
+        ax.plot(x, k * x)
+        ax.set_xlim(0.0, 1.0)
+        ax.set_title(f"panel {k}")
+    return fig
+
+
+def test():
+    fig = plot()
+    code = tikzplotlib.get_tikz_code(
+        fig, include_disclaimer=False, share_axis_options=True
+    )
+    plt.close(fig)
+
+    assert (
+        "\\pgfplotsset{tikzplotlib/axis common/.style={\n"
+        "  tick align=outside,\n"
+        "  tick pos=left,\n"
+        "  x grid style={darkgray176},\n"
+        "  xmin=0, xmax=1,\n"
+    ) in code
+    assert code.count("\\nextgroupplot[\ntikzplotlib/axis common,\ntitle={panel") == 4
+    assert code.count("tick align=outside") == 1
+
+
+def test_single_axes():
+    fig = plt.figure()
+    plt.plot([0.0, 1.0], [0.0, 1.0])
+    code = tikzplotlib.get_tikz_code(
+        fig, include_disclaimer=False, share_axis_options=True
+    )
+    plt.close(fig)
+
+    assert "tikzplotlib/axis common" not in code
@@ -0,0 +1,51 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+def plot():
+    fig = plt.figure()
+    ax = fig.add_subplot(projection="3d")
+    x, y = np.meshgrid(np.linspace(0.0, 1.0, 4), np.linspace(0.0, 2.0, 3))
+    ax.plot_surface(x, y, x * y, cmap="viridis")
+    ax.plot_wireframe(x, y, x * y + 1.0, color="r")
+    ax.set_zlabel("z")
+    return fig
+
+
+def test():
+    from .helpers import assert_equality
+
+    assert_equality(plot, __file__[:-3] + "_reference.tex")
+
+
+def test_grid():
+    from tikzplotlib._surface import get_grid
+
+    fig = plt.figure()
+    ax = fig.add_subplot(projection="3d")
+    x, y = np.meshgrid(np.linspace(0.0, 1.0, 60), np.linspace(0.0, 2.0, 101) ** 2)
+    z = np.sin(5 * x) + y
+    # the strides don't divide the grid, the last patches are smaller
+    surface = ax.plot_surface(x, y, z, cmap="viridis", rstride=3, cstride=7)
+    rows = list(range(0, 100, 3)) + [100]
+    cols = list(range(0, 59, 7)) + [59]
+    expected = np.stack([a[np.ix_(rows, cols)] for a in [x, y, z]], axis=-1)
+    assert np.array_equal(get_grid(surface), expected)
+
+    # shaded surfaces and NaNs aren't structured
+    assert get_grid(ax.plot_surface(x, y, z)) is None
+    z[3, 4] = np.nan
+    assert get_grid(ax.plot_surface(x, y, z, cmap="viridis")) is None
+    plt.close(fig)
+
+
+def test_color_limits():
+    import tikzplotlib
+
+    fig = plt.figure()
+    ax = fig.add_subplot(projection="3d")
+    x, y = np.meshgrid(np.linspace(0.0, 1.0, 4), np.linspace(0.0, 2.0, 3))
+    ax.plot_surface(x, y, x * y, cmap="viridis", vmin=-1.0, vmax=4.0)
+    code = tikzplotlib.get_tikz_code(fig)
+    plt.close(fig)
+    assert "point meta min=-1, point meta max=4," in code